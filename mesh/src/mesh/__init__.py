@@ -1,8 +1,16 @@
 """Mesh network setup tools (Headscale + Syncthing)."""
 
-from importlib.metadata import PackageNotFoundError, version
 
-try:
-    __version__ = version("mesh")
-except PackageNotFoundError:
-    __version__ = "0.0.0.dev"
+def __getattr__(name: str) -> str:
+    # Resolved on first access: importlib.metadata scans every installed
+    # distribution, which every command would otherwise pay at import time.
+    if name == "__version__":
+        from importlib.metadata import PackageNotFoundError, version
+
+        try:
+            value = version("mesh")
+        except PackageNotFoundError:
+            value = "0.0.0.dev"
+        globals()["__version__"] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,46 +1,87 @@
 """Main CLI application."""
 
+import functools
+from importlib import import_module
+
+import click
 import typer
+from typer.core import TyperGroup
+
+import mesh
+
+# Subcommand groups: name -> module exposing a Typer ``app``
+LAZY_GROUPS: dict[str, str] = {
+    "server": "mesh.commands.server",
+    "client": "mesh.commands.client",
+    "host": "mesh.commands.host",
+    "wsl": "mesh.commands.wsl",
+    "windows": "mesh.commands.windows",
+    "ubuntu": "mesh.commands.ubuntu",
+    "remote": "mesh.commands.remote",
+    "smb": "mesh.commands.smb",
+    "harden": "mesh.commands.harden",
+}
+
+# Standalone commands: name -> (module, function)
+LAZY_COMMANDS: dict[str, tuple[str, str]] = {
+    "init": ("mesh.commands.init", "init"),
+    "status": ("mesh.commands.status", "status"),
+    "peer": ("mesh.commands.peer", "peer"),
+}
+
+
+@functools.cache
+def _load_command(cmd_name: str):
+    """Import and build a lazily registered command (once per process)."""
+    if cmd_name in LAZY_GROUPS:
+        module = import_module(LAZY_GROUPS[cmd_name])
+        return typer.main.get_group(module.app)
+
+    module_name, func_name = LAZY_COMMANDS[cmd_name]
+    module = import_module(module_name)
+    wrapper = typer.Typer(add_completion=False, rich_markup_mode="rich")
+    wrapper.command(name=cmd_name)(getattr(module, func_name))
+    return typer.main.get_command(wrapper)
+
+
+class LazyGroup(TyperGroup):
+    """Top-level group that imports command modules only when they are needed.
+
+    `mesh --version` and `mesh host list` no longer pay for importing every
+    command module (httpx, zeroconf, yaml, ...) at startup.
+    """
+
+    def list_commands(self, ctx) -> list[str]:
+        """List commands in Typer's order: standalone commands, then groups.
+
+        Eager and lazy entries are merged so `mesh --help` keeps the order
+        it had when every module was registered up front.
+        """
+        eager = super().list_commands(ctx)
+        eager_groups = [name for name in eager if isinstance(self.commands[name], click.Group)]
+        eager_commands = [name for name in eager if name not in eager_groups]
+        return [*eager_commands, *LAZY_COMMANDS, *eager_groups, *LAZY_GROUPS]
+
+    def get_command(self, ctx, cmd_name: str):
+        """Return the named command, importing its module on first use."""
+        if cmd_name in LAZY_GROUPS or cmd_name in LAZY_COMMANDS:
+            return _load_command(cmd_name)
+        return super().get_command(ctx, cmd_name)
 
-from mesh import __version__
-from mesh.commands import (
-    client,
-    harden,
-    host,
-    init,
-    peer,
-    remote,
-    server,
-    smb,
-    status,
-    ubuntu,
-    windows,
-    wsl,
-)
 
 app = typer.Typer(
     name="mesh",
+    cls=LazyGroup,
     help="Mesh network setup tools (Headscale + Syncthing)",
     no_args_is_help=True,
     rich_markup_mode="rich",
 )
 
-# Add subcommand groups
-app.add_typer(server.app, name="server")
-app.add_typer(client.app, name="client")
-app.add_typer(host.app, name="host")
-app.add_typer(wsl.app, name="wsl")
-app.add_typer(windows.app, name="windows")
-app.add_typer(ubuntu.app, name="ubuntu")
-app.add_typer(remote.app, name="remote")
-app.add_typer(smb.app, name="smb")
-app.add_typer(harden.app, name="harden")
-
 
 def version_callback(value: bool) -> None:
     """Print version and exit."""
     if value:
-        typer.echo(f"mesh {__version__}")
+        typer.echo(f"mesh {mesh.__version__}")
         raise typer.Exit()
 
 
@@ -59,11 +100,5 @@ def main(
     pass
 
 
-# Register standalone commands
-app.command(name="init")(init.init)
-app.command(name="status")(status.status)
-app.command(name="peer")(peer.peer)
-
-
 if __name__ == "__main__":
     app()
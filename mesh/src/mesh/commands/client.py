@@ -1,5 +1,9 @@
 """Client setup commands (Tailscale + Syncthing)."""
 
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import typer
 
 from mesh.core import headscale, tailscale
@@ -27,37 +31,29 @@ def install_tailscale_linux() -> bool:
 
 
 def install_syncthing_ubuntu() -> bool:
-    """Install Syncthing on Ubuntu/WSL2."""
+    """Install Syncthing on Ubuntu/WSL2.
+
+    Key import, repo setup and apt install run as one sudo shell so the
+    whole chain costs a single process spawn (and a single sudo prompt).
+    The release key is already a binary keyring, so curl writes it straight
+    to its final path.
+    """
     info("Installing Syncthing...")
-    # Add GPG key
-    run_sudo(["mkdir", "-p", "/etc/apt/keyrings"])
-    result = run(
-        ["curl", "-fsSL", "https://syncthing.net/release-key.gpg"],
-    )
-    if result.success:
-        from pathlib import Path
-
-        Path("/tmp/syncthing.gpg").write_text(result.stdout)
-        run_sudo(
-            [
-                "gpg",
-                "--dearmor",
-                "-o",
-                "/etc/apt/keyrings/syncthing-archive-keyring.gpg",
-                "/tmp/syncthing.gpg",
-            ]
-        )
-
-    # Add repo
     repo_line = (
         "deb [signed-by=/etc/apt/keyrings/syncthing-archive-keyring.gpg] "
         "https://apt.syncthing.net/ syncthing stable"
     )
-    run_sudo(["sh", "-c", f'echo "{repo_line}" > /etc/apt/sources.list.d/syncthing.list'])
-
-    # Install
-    run_sudo(["apt-get", "update"])
-    result = run_sudo(["apt-get", "install", "-y", "syncthing"])
+    script = f"""set -e
+mkdir -p /etc/apt/keyrings
+curl -fsSL -o /etc/apt/keyrings/syncthing-archive-keyring.gpg \\
+    https://syncthing.net/release-key.gpg
+cat > /etc/apt/sources.list.d/syncthing.list <<'REPO'
+{repo_line}
+REPO
+apt-get update
+apt-get install -y syncthing
+"""
+    result = run_sudo(["bash", "-c", script])
     return result.success
 
 
@@ -112,14 +108,17 @@ def setup(
     save_headscale_server(server)
     ok(f"Server URL saved: {server}")
 
-    # Check server health
-    if headscale.get_health(server):
-        ok("Server is reachable")
-    else:
-        warn("Server health check failed - continuing anyway")
+    # Check server health (best-effort) while probing for Tailscale
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        health_future = pool.submit(headscale.get_health, server, timeout=2)
+        tailscale_installed = tailscale.is_installed()
+        if health_future.result():
+            ok("Server is reachable")
+        else:
+            warn("Server health check failed - continuing anyway")
 
     # Install Tailscale
-    if tailscale.is_installed():
+    if tailscale_installed:
         ok("Tailscale is already installed")
     else:
         if os_type in (OSType.UBUNTU, OSType.WSL2):
@@ -134,9 +133,9 @@ def setup(
 
     # Connect to mesh
     info("Connecting to mesh network...")
-    if tailscale.up(server, key):
+    connected, ip = tailscale.up_and_get_ip(server, key)
+    if connected:
         ok("Connected to mesh network")
-        ip = tailscale.get_ip()
         if ip:
             info(f"Tailscale IP: {ip}")
     else:
@@ -144,9 +143,6 @@ def setup(
         raise typer.Exit(1)
 
     # Check and offer logtail suppression
-    import tempfile
-    from pathlib import Path
-
     from mesh.core.privacy import check_logtail_suppression
 
     logtail = check_logtail_suppression()
@@ -220,9 +216,9 @@ def join(
         info("Run 'mesh client setup' first")
         raise typer.Exit(1)
 
-    if tailscale.up(server, key):
+    connected, ip = tailscale.up_and_get_ip(server, key)
+    if connected:
         ok("Connected to mesh network")
-        ip = tailscale.get_ip()
         if ip:
             info(f"Tailscale IP: {ip}")
     else:
@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
+import contextlib
 import json
 import subprocess
 import tempfile
+import time
 from pathlib import Path
 
 import typer
@@ -18,7 +20,8 @@ from mesh.core.privacy import (
 )
 from mesh.core.templates import get_template, list_templates
 from mesh.utils.output import error, info, ok, section, warn
-from mesh.utils.process import run_sudo
+from mesh.utils.process import run, run_sudo
+from mesh.utils.ssh import multiplexed_ssh
 
 app = typer.Typer(
     name="harden",
@@ -66,9 +69,18 @@ def _require_server() -> None:
         raise typer.Exit(1)
 
 
-def _ssh_run(host: str, port: int, cmd: str, timeout: int = 120) -> tuple[bool, str]:
-    """Run a command on remote host via SSH."""
-    ssh_cmd = ["ssh"] + SSH_OPTS + ["-p", str(port), host, cmd]
+def _ssh_run(
+    host: str,
+    port: int,
+    cmd: str,
+    timeout: int = 120,
+    extra_opts: list[str] | None = None,
+) -> tuple[bool, str]:
+    """Run a command on remote host via SSH.
+
+    ``extra_opts`` are spliced in before the host, e.g. control_master_opts().
+    """
+    ssh_cmd = ["ssh", *SSH_OPTS, *(extra_opts or []), "-p", str(port), host, cmd]
     try:
         result = subprocess.run(
             ssh_cmd,
@@ -83,9 +95,9 @@ def _ssh_run(host: str, port: int, cmd: str, timeout: int = 120) -> tuple[bool,
         return False, "SSH not found"
 
 
-def _detect_remote_os(host: str, port: int) -> str | None:
+def _detect_remote_os(host: str, port: int, extra_opts: list[str] | None = None) -> str | None:
     """Detect OS type of remote host. Returns 'linux', 'windows', or None."""
-    success, output = _ssh_run(host, port, "uname -s", timeout=15)
+    success, output = _ssh_run(host, port, "uname -s", timeout=15, extra_opts=extra_opts)
     if success:
         out = output.strip().lower()
         if "linux" in out:
@@ -94,7 +106,7 @@ def _detect_remote_os(host: str, port: int) -> str | None:
             return "windows"
 
     # Try Windows-specific command
-    success, output = _ssh_run(host, port, "echo %OS%", timeout=15)
+    success, output = _ssh_run(host, port, "echo %OS%", timeout=15, extra_opts=extra_opts)
     if success and "windows" in output.lower():
         return "windows"
 
@@ -206,14 +218,10 @@ def server(
         raise typer.Exit(1)
 
     # Health check
-    import time
-
     info("Waiting for health check...")
     time.sleep(2)
 
-    from mesh.utils.process import run
-
-    health = run(["curl", "-sf", "http://127.0.0.1:8080/health"], timeout=10)
+    health = run(["curl", "-sf", "-o", "/dev/null", "http://127.0.0.1:8080/health"], timeout=10)
     if health.success:
         ok("Health check passed")
     else:
@@ -301,8 +309,6 @@ def client(
             warn("File exists but TS_NO_LOGS_NO_SUPPORT=true not found")
     else:
         # On Linux, may need sudo to read
-        from mesh.utils.process import run
-
         verify = run(["sudo", "cat", file_path], timeout=5)
         if verify.success and "TS_NO_LOGS_NO_SUPPORT=true" in verify.stdout:
             ok("Verification passed: logtail suppression is active")
@@ -318,87 +324,98 @@ def remote(
     """Deploy logtail suppression on a remote node via SSH."""
     section(f"Remote Hardening: {host}:{port}")
 
-    # Test connectivity
-    info("Testing SSH connectivity...")
-    success, output = _ssh_run(host, port, "echo connected")
-    if not success:
-        error(f"Cannot connect to {host}:{port}")
-        error(f"SSH error: {output}")
-        raise typer.Exit(1)
-    ok("SSH connection successful")
-
-    # Detect remote OS
-    info("Detecting remote OS...")
-    remote_os = _detect_remote_os(host, port)
-    if not remote_os:
-        error("Could not detect remote OS")
-        raise typer.Exit(1)
-    ok(f"Detected OS: {remote_os}")
-
-    # Determine file path and content
-    if remote_os == "windows":
-        file_path = "C:\\ProgramData\\Tailscale\\tailscaled-env.txt"
-        content = get_template("windows-tailscaled-env.txt")
-    else:
-        file_path = "/etc/default/tailscaled"
-        content = get_template("tailscaled.default.private")
-
-    info(f"Deploying logtail suppression to {file_path}...")
-
-    if remote_os == "windows":
-        # Write via PowerShell
-        escaped_content = content.replace("'", "''")
-        write_cmd = (
-            f"powershell -Command \"Set-Content"
-            f" -Path '{file_path}' -Value '{escaped_content}'\""
-        )
-        success, output = _ssh_run(host, port, write_cmd, timeout=15)
+    # Reuse one SSH connection for the probe, OS detection, write, restart
+    # and verify steps. Windows' OpenSSH client has no ControlMaster support.
+    mux_ctx = (
+        contextlib.nullcontext([])
+        if detect_os_type() == OSType.WINDOWS
+        else multiplexed_ssh(host, port)
+    )
+    with mux_ctx as mux:
+        # Test connectivity
+        info("Testing SSH connectivity...")
+        success, output = _ssh_run(host, port, "echo connected", extra_opts=mux)
         if not success:
-            error(f"Failed to write file: {output}")
+            error(f"Cannot connect to {host}:{port}")
+            error(f"SSH error: {output}")
             raise typer.Exit(1)
-        ok(f"Written to {file_path}")
-
-        # Restart Tailscale service
-        info("Restarting Tailscale service...")
-        success, output = _ssh_run(
-            host, port,
-            'powershell -Command "Restart-Service Tailscale"',
-            timeout=30,
-        )
-        if success:
-            ok("Tailscale service restarted")
-        else:
-            warn(f"Could not restart service: {output}")
-    else:
-        # Linux: write via sudo tee
-        escaped_content = content.replace("'", "'\\''")
-        write_cmd = f"echo '{escaped_content}' | sudo tee {file_path} > /dev/null"
-        success, output = _ssh_run(host, port, write_cmd, timeout=15)
-        if not success:
-            error(f"Failed to write file: {output}")
+        ok("SSH connection successful")
+
+        # Detect remote OS
+        info("Detecting remote OS...")
+        remote_os = _detect_remote_os(host, port, mux)
+        if not remote_os:
+            error("Could not detect remote OS")
             raise typer.Exit(1)
-        ok(f"Written to {file_path}")
+        ok(f"Detected OS: {remote_os}")
 
-        # Restart tailscaled
-        info("Restarting tailscaled service...")
-        success, output = _ssh_run(host, port, "sudo systemctl restart tailscaled", timeout=30)
-        if success:
-            ok("tailscaled restarted")
+        # Determine file path and content
+        if remote_os == "windows":
+            file_path = "C:\\ProgramData\\Tailscale\\tailscaled-env.txt"
+            content = get_template("windows-tailscaled-env.txt")
         else:
-            warn(f"Could not restart service: {output}")
+            file_path = "/etc/default/tailscaled"
+            content = get_template("tailscaled.default.private")
+
+        info(f"Deploying logtail suppression to {file_path}...")
+
+        if remote_os == "windows":
+            # Write via PowerShell
+            escaped_content = content.replace("'", "''")
+            write_cmd = (
+                f"powershell -Command \"Set-Content"
+                f" -Path '{file_path}' -Value '{escaped_content}'\""
+            )
+            success, output = _ssh_run(host, port, write_cmd, timeout=15, extra_opts=mux)
+            if not success:
+                error(f"Failed to write file: {output}")
+                raise typer.Exit(1)
+            ok(f"Written to {file_path}")
 
-    # Verify by reading back
-    info("Verifying deployment...")
-    if remote_os == "windows":
-        verify_cmd = f"powershell -Command \"Get-Content '{file_path}'\""
-    else:
-        verify_cmd = f"cat {file_path}"
+            # Restart Tailscale service
+            info("Restarting Tailscale service...")
+            success, output = _ssh_run(
+                host, port,
+                'powershell -Command "Restart-Service Tailscale"',
+                timeout=30,
+                extra_opts=mux,
+            )
+            if success:
+                ok("Tailscale service restarted")
+            else:
+                warn(f"Could not restart service: {output}")
+        else:
+            # Linux: write via sudo tee
+            escaped_content = content.replace("'", "'\\''")
+            write_cmd = f"echo '{escaped_content}' | sudo tee {file_path} > /dev/null"
+            success, output = _ssh_run(host, port, write_cmd, timeout=15, extra_opts=mux)
+            if not success:
+                error(f"Failed to write file: {output}")
+                raise typer.Exit(1)
+            ok(f"Written to {file_path}")
 
-    success, output = _ssh_run(host, port, verify_cmd, timeout=10)
-    if success and "TS_NO_LOGS_NO_SUPPORT=true" in output:
-        ok("Verification passed: logtail suppression is active")
-    else:
-        warn("Could not verify file contents")
+            # Restart tailscaled
+            info("Restarting tailscaled service...")
+            success, output = _ssh_run(
+                host, port, "sudo systemctl restart tailscaled", timeout=30, extra_opts=mux
+            )
+            if success:
+                ok("tailscaled restarted")
+            else:
+                warn(f"Could not restart service: {output}")
+
+        # Verify by reading back
+        info("Verifying deployment...")
+        if remote_os == "windows":
+            verify_cmd = f"powershell -Command \"Get-Content '{file_path}'\""
+        else:
+            verify_cmd = f"cat {file_path}"
+
+        success, output = _ssh_run(host, port, verify_cmd, timeout=10, extra_opts=mux)
+        if success and "TS_NO_LOGS_NO_SUPPORT=true" in output:
+            ok("Verification passed: logtail suppression is active")
+        else:
+            warn("Could not verify file contents")
 
     ok(f"Remote hardening complete for {host}")
 
@@ -1,11 +1,30 @@
 """Host registry commands for managing mesh hosts."""
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import typer
 
-from mesh.core.config import InvalidHostnameError, add_host, get_host, load_hosts, remove_host
+from mesh.core.config import (
+    InvalidHostnameError,
+    add_host,
+    add_hosts,
+    get_host,
+    load_hosts,
+    parse_hosts_yaml,
+    remove_host,
+)
 from mesh.core.headscale import list_nodes
-from mesh.utils.output import error, info, ok, section, warn
-from mesh.utils.ssh import add_ssh_host, host_exists, remove_ssh_host, ssh_to_host
+from mesh.utils.output import create_table, error, info, ok, print_table, section, warn
+from mesh.utils.ssh import (
+    add_ssh_host,
+    host_exists,
+    load_ssh_config,
+    remove_ssh_host,
+    ssh_config_batch,
+    ssh_to_host,
+)
 
 app = typer.Typer(
     name="host",
@@ -13,6 +32,17 @@ app = typer.Typer(
     no_args_is_help=True,
 )
 
+# Fallback SSH user for `host add` when --user is not given
+_DEFAULT_USER = os.environ.get("USER", "ubuntu")
+
+# `host list` status label keyed on (has SSH config entry, provisioned in Headscale)
+_HOST_STATUS: dict[tuple[bool, bool], str] = {
+    (False, False): "registered",
+    (True, False): "SSH",
+    (False, True): "MESH",
+    (True, True): "SSH MESH",
+}
+
 
 @app.command(name="add")
 def add(
@@ -21,26 +51,26 @@ def add(
     port: int = typer.Option(22, "--port", "-p", help="SSH port"),
     user: str = typer.Option(None, "--user", "-u", help="SSH username (defaults to current user)"),
     no_ssh: bool = typer.Option(False, "--no-ssh", help="Don't add SSH config entry"),
+    compress: bool = typer.Option(
+        False, "--compress", help="Use SSH compression when provisioning (slow WAN links)"
+    ),
 ) -> None:
     """Add a host to the mesh registry.
 
     This command:
-    - Adds the host to ~/.config/mesh/hosts.yaml
+    - Adds the host to ~/.config/mesh/hosts.json
     - Creates an SSH config entry in ~/.ssh/config
 
     Examples:
         mesh host add ubu1 --ip 192.168.50.10
         mesh host add ubu1 --ip 192.168.50.10 --port 22 --user ubuntu
     """
-    import os
-
-    if user is None:
-        user = os.environ.get("USER", "ubuntu")
+    user = user or _DEFAULT_USER
     section(f"Adding host: {name}")
 
     # Add to registry
     try:
-        host = add_host(name, ip, port, user)
+        host = add_host(name, ip, port, user, compression=compress)
     except InvalidHostnameError as e:
         error(str(e))
         raise typer.Exit(1) from None
@@ -58,6 +88,58 @@ def add(
     info(f"To provision: mesh remote provision {name}")
 
 
+@app.command(name="add-batch")
+def add_batch(
+    file: str = typer.Argument(..., help="YAML file listing hosts (hosts.yaml layout)"),
+    no_ssh: bool = typer.Option(False, "--no-ssh", help="Don't add SSH config entries"),
+) -> None:
+    """Add several hosts to the mesh registry in one pass.
+
+    The registry and ~/.ssh/config are each written once, however many
+    hosts the file contains. The file uses the hosts.yaml layout:
+
+        hosts:
+          ubu1:
+            ip: 192.168.50.10
+          ubu2:
+            ip: 192.168.50.11
+            port: 2222
+            user: ubuntu
+
+    Examples:
+        mesh host add-batch hosts.yaml
+    """
+    section("Adding hosts")
+
+    path = Path(file)
+    if not path.exists():
+        error(f"File not found: {file}")
+        raise typer.Exit(1)
+
+    hosts = list(parse_hosts_yaml(path.read_text()).values())
+    if not hosts:
+        error(f"No hosts found in {file}")
+        raise typer.Exit(1)
+
+    # Add to registry
+    try:
+        add_hosts(hosts)
+    except InvalidHostnameError as e:
+        error(str(e))
+        raise typer.Exit(1) from None
+    ok(f"Added {len(hosts)} host(s) to registry")
+
+    # Add SSH config entries
+    if not no_ssh:
+        with ssh_config_batch():
+            for host in hosts:
+                add_ssh_host(host.name, host.ip, host.port, host.user)
+        ok(f"SSH config entries created for {len(hosts)} host(s)")
+
+    for host in hosts:
+        info(f"  {host.name} ({host.ip}:{host.port})")
+
+
 @app.command(name="remove")
 def remove(
     name: str = typer.Argument(..., help="Hostname to remove"),
@@ -101,7 +183,7 @@ def list_hosts() -> None:
     """List all registered hosts with their status.
 
     Shows:
-    - Registered: In ~/.config/mesh/hosts.yaml
+    - Registered: In ~/.config/mesh/hosts.json
     - SSH: Has SSH config entry
     - Provisioned: Appears in Headscale nodes list
     """
@@ -113,26 +195,28 @@ def list_hosts() -> None:
         info("Add a host: mesh host add <name> --ip <IP>")
         return
 
-    # Get provisioned nodes from Headscale
-    try:
-        nodes = list_nodes(user="mesh")
-        provisioned = {n.get("givenName", "").lower() for n in nodes}
-    except Exception:
-        provisioned = set()
-        warn("Could not query Headscale (server may not be running)")
+    # Query Headscale in the background while SSH config is parsed (once)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        nodes_future = pool.submit(list_nodes, user="mesh")
+        ssh_aliases = load_ssh_config()
+
+        # Get provisioned nodes from Headscale
+        try:
+            nodes = nodes_future.result()
+            provisioned = {n.get("givenName", "").lower() for n in nodes}
+        except Exception:
+            provisioned = set()
+            warn("Could not query Headscale (server may not be running)")
 
-    # Display hosts
-    info(f"{'NAME':<15} {'IP':<20} {'PORT':<6} {'USER':<10} {'STATUS'}")
-    info("-" * 70)
+    # Display hosts (rendered in a single write)
+    table = create_table("Hosts", ["NAME", "IP", "PORT", "USER", "STATUS"])
 
     for host in hosts.values():
-        # Check SSH config
-        has_ssh = "SSH" if host_exists(host.name) else ""
-        # Check if provisioned
-        is_provisioned = "MESH" if host.name.lower() in provisioned else ""
-        status = " ".join(filter(None, [has_ssh, is_provisioned])) or "registered"
+        status = _HOST_STATUS[host.name in ssh_aliases, host.name.lower() in provisioned]
+
+        table.add_row(host.name, host.ip, str(host.port), host.user, status)
 
-        info(f"{host.name:<15} {host.ip:<20} {host.port:<6} {host.user:<10} {status}")
+    print_table(table)
 
 
 @app.command(name="status")
@@ -158,36 +242,38 @@ def status(
 
     ok(f"Registry: {host.ip}:{host.port} (user: {host.user})")
 
-    # Check SSH config
-    if host_exists(name):
-        ok("SSH config: entry exists")
-    else:
-        warn("SSH config: no entry (use --no-ssh to skip)")
-
-    # Test SSH connectivity
-    info("Testing SSH connectivity...")
+    # SSH and Headscale probes are independent - start both before reporting
     target = f"{host.user}@{host.ip}"
-    success, output = ssh_to_host(target, "echo connected", timeout=10, port=host.port)
-    if success:
-        ok("SSH: connected")
-    else:
-        warn(f"SSH: cannot connect ({output.strip()})")
-
-    # Check Headscale nodes
-    info("Checking mesh membership...")
-    try:
-        nodes = list_nodes(user="mesh")
-        node_names = {n.get("givenName", "").lower() for n in nodes}
-        if name.lower() in node_names:
-            ok("Mesh: provisioned")
-            # Find the node to show more details
-            for node in nodes:
-                if node.get("givenName", "").lower() == name.lower():
-                    ts_ip = node.get("ipAddresses", ["?"])[0]
-                    info(f"  Tailscale IP: {ts_ip}")
-                    break
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        ssh_future = pool.submit(ssh_to_host, target, "echo connected", timeout=10, port=host.port)
+        nodes_future = pool.submit(list_nodes, user="mesh")
+
+        # Check SSH config
+        if host_exists(name):
+            ok("SSH config: entry exists")
+        else:
+            warn("SSH config: no entry (use --no-ssh to skip)")
+
+        # Test SSH connectivity
+        info("Testing SSH connectivity...")
+        success, output = ssh_future.result()
+        if success:
+            ok("SSH: connected")
         else:
-            warn("Mesh: not provisioned")
-            info(f"  To provision: mesh remote provision {name}")
-    except Exception as e:
-        warn(f"Mesh: cannot query ({e})")
+            warn(f"SSH: cannot connect ({output.strip()})")
+
+        # Check Headscale nodes
+        info("Checking mesh membership...")
+        try:
+            nodes = nodes_future.result()
+            nodes_by_name = {n.get("givenName", "").lower(): n for n in nodes}
+            node = nodes_by_name.get(name.lower())
+            if node is not None:
+                ok("Mesh: provisioned")
+                ts_ip = node.get("ipAddresses", ["?"])[0]
+                info(f"  Tailscale IP: {ts_ip}")
+            else:
+                warn("Mesh: not provisioned")
+                info(f"  To provision: mesh remote provision {name}")
+        except Exception as e:
+            warn(f"Mesh: cannot query ({e})")
@@ -1,5 +1,6 @@
 """Interactive setup wizard for mesh network configuration."""
 
+import os
 import platform
 import shutil
 import socket
@@ -108,8 +109,6 @@ def prompt_server_config(hostname: str) -> dict[str, str]:
     )
 
     # Default user for SSH
-    import os
-
     default_user = os.environ.get("USER", "ubuntu")
     config["MESH_DEFAULT_USER"] = Prompt.ask(
         "Default SSH user",
@@ -119,8 +118,11 @@ def prompt_server_config(hostname: str) -> dict[str, str]:
     return config
 
 
-def prompt_client_config(hostname: str, os_type: OSType) -> dict[str, str]:
-    """Gather client configuration via prompts."""
+def prompt_client_config(hostname: str, os_type: OSType, dry_run: bool = False) -> dict[str, str]:
+    """Gather client configuration via prompts.
+
+    The server URL is saved for later client commands unless ``dry_run``.
+    """
     config: dict[str, str] = {}
 
     # Server URL - save to ~/.config/mesh/headscale-server for use by client commands
@@ -128,7 +130,10 @@ def prompt_client_config(hostname: str, os_type: OSType) -> dict[str, str]:
         "Headscale server URL",
         default="http://server.local:8080",
     )
-    save_headscale_server(server_url)
+    if dry_run:
+        info(f"Would save server URL: {server_url}")
+    else:
+        save_headscale_server(server_url)
 
     # Client hostname mapping based on OS type
     if os_type == OSType.WSL2:
@@ -213,7 +218,7 @@ def init(
                 setup()
 
     else:
-        config = prompt_client_config(hostname, os_type)
+        config = prompt_client_config(hostname, os_type, dry_run=dry_run)
 
         write_env_file(config, dry_run=dry_run)
 
@@ -1,21 +1,23 @@
 """Syncthing peer exchange command."""
 
+import re
+
 import typer
-from rich.prompt import Prompt
 
 from mesh.core.config import get_syncthing_port
 from mesh.core.syncthing import SyncthingClient
 from mesh.utils.output import error, info, ok, section, warn
 
+# Dash-separated groups of RFC 4648 base32 characters (A-Z, 2-7)
+DEVICE_ID_PATTERN = re.compile(r"^[A-Z2-7]+(?:-[A-Z2-7]+)*$", re.IGNORECASE)
+
 
 def validate_device_id(device_id: str) -> bool:
     """Validate Syncthing device ID format."""
-    # Device IDs are 52 characters, base32 encoded with dashes
-    clean_id = device_id.replace("-", "")
-    if len(clean_id) < 52:
+    # Device IDs are 52+ base32 characters, grouped with dashes
+    if len(device_id) - device_id.count("-") < 52:
         return False
-    # Should be alphanumeric (base32)
-    return clean_id.isalnum()
+    return bool(DEVICE_ID_PATTERN.match(device_id))
 
 
 def peer() -> None:
@@ -54,7 +56,9 @@ def peer() -> None:
     except Exception:
         pass  # Non-critical
 
-    # Prompt for peer device ID
+    # Prompt for peer device ID (imported here so non-interactive paths skip it)
+    from rich.prompt import Prompt
+
     section("Add a Peer")
     info("Enter the device ID of the peer you want to add")
     info("(or 'q' to quit)")
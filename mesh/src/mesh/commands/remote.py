@@ -1,14 +1,26 @@
 """Remote provisioning commands (run from Headscale server to set up clients via SSH)."""
 
+import base64
+import functools
+import ipaddress
 import re
+import shlex
 import socket
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import IO
+from urllib.parse import urlparse
 
 import typer
+from rich.markup import escape
 
 from mesh.core.config import get_host, load_hosts
 from mesh.core.headscale import create_preauth_key, list_nodes
-from mesh.utils.output import error, info, ok, section, warn
+from mesh.utils.output import create_table, error, info, ok, print_table, section, warn
+from mesh.utils.process import budget_remaining, thread_budget
+from mesh.utils.ssh import close_control_master, control_master_opts
 
 app = typer.Typer(
     name="remote",
@@ -20,10 +32,12 @@ app = typer.Typer(
 HEADSCALE_PORT = 8080
 
 
+@functools.lru_cache(maxsize=1)
 def get_local_ip() -> str:
     """Get the local machine's IP address that's routable to other hosts.
 
     Returns the IP of the default route interface, not localhost.
+    Cached: the outbound IP does not change during a provisioning run.
     """
     try:
         # Connect to a public IP (doesn't actually send data) to find our outbound IP
@@ -38,12 +52,25 @@ def get_local_ip() -> str:
             return "127.0.0.1"
 
 
+@functools.lru_cache(maxsize=1)
 def get_default_server_url() -> str:
     """Get the default Headscale server URL using local IP."""
     ip = get_local_ip()
     return f"http://{ip}:{HEADSCALE_PORT}"
 
 
+def _server_host(server_url: str) -> str:
+    """Extract the host (usually an IP) from a Headscale server URL.
+
+    Returns:
+        The hostname, or an empty string if the URL has none.
+    """
+    return urlparse(server_url).hostname or ""
+
+
+# Prefix for one-off PowerShell commands; skipping the profile saves its load time
+POWERSHELL = "powershell -NoProfile -NonInteractive -Command"
+
 # SSH options for non-interactive connections
 SSH_OPTS = [
     "-o",
@@ -52,90 +79,263 @@ SSH_OPTS = [
     "ConnectTimeout=10",
     "-o",
     "StrictHostKeyChecking=accept-new",
+    # Drop a silent peer after ~60s instead of waiting out the command timeout
+    "-o",
+    "ServerAliveInterval=15",
+    "-o",
+    "ServerAliveCountMax=4",
 ]
 
 
-def ssh_run(host: str, port: int, cmd: str, timeout: int = 120) -> tuple[bool, str]:
-    """Run a command on remote host via SSH."""
-    ssh_cmd = ["ssh"] + SSH_OPTS + ["-p", str(port), host, cmd]
+# Extra options for IP-literal hosts: nothing to resolve, so skip lookups
+# that would otherwise stall on slow DNS
+SSH_IP_LITERAL_OPTS = [
+    "-o",
+    "CheckHostIP=no",
+    "-o",
+    "GSSAPIAuthentication=no",
+]
+
+
+def _is_ip_literal(host: str) -> bool:
+    """Check whether host (optionally user@host) is an IP address literal."""
+    try:
+        ipaddress.ip_address(host.rpartition("@")[2])
+    except ValueError:
+        return False
+    return True
+
+
+def _wants_compression(host: str) -> bool:
+    """Check whether host is a registry entry with SSH compression enabled.
+
+    Args:
+        host: Host as passed to ssh (registry name or user@ip)
+    """
+    return any(host in (h.name, f"{h.user}@{h.ip}") for h in load_hosts().values() if h.compression)
+
+
+def _ssh_command(host: str, port: int, cmd: str) -> list[str]:
+    """Build an ssh command line that reuses a ControlMaster connection."""
+    ip_opts = SSH_IP_LITERAL_OPTS if _is_ip_literal(host) else []
+    compress_opts = ["-C"] if _wants_compression(host) else []
+    return [
+        "ssh",
+        *SSH_OPTS,
+        *ip_opts,
+        *compress_opts,
+        *control_master_opts(),
+        "-p",
+        str(port),
+        host,
+        cmd,
+    ]
+
+
+def _budgeted(timeout: float) -> float:
+    """Cap an ssh timeout by the active thread/command budget, if any."""
+    remaining = budget_remaining()
+    return timeout if remaining is None else min(timeout, remaining)
+
+
+def _run_captured(ssh_cmd: list[str], timeout: int, stdin: str | None = None) -> tuple[bool, str]:
+    """Run an ssh command and return (success, stdout+stderr).
+
+    Output is captured as bytes and decoded once, replacing anything that
+    is not valid UTF-8 (Windows hosts may answer in a legacy code page).
+    """
+    budget = _budgeted(timeout)
+    if budget <= 0:
+        return False, "Command timed out"
     try:
         result = subprocess.run(
             ssh_cmd,
+            input=stdin.encode() if stdin is not None else None,
             capture_output=True,
-            text=True,
-            timeout=timeout,
+            timeout=budget,
         )
-        return result.returncode == 0, result.stdout + result.stderr
+        return result.returncode == 0, (result.stdout + result.stderr).decode("utf-8", "replace")
     except subprocess.TimeoutExpired:
         return False, "Command timed out"
     except FileNotFoundError:
         return False, "SSH not found"
 
 
+def ssh_run(host: str, port: int, cmd: str | list[str], timeout: int = 120) -> tuple[bool, str]:
+    """Run a command on remote host via SSH.
+
+    A list is an argv for a POSIX host and is quoted with shlex.join, so
+    arguments (URLs, keys) reach the program unmangled. Pass a string for
+    anything that must be parsed by the remote shell (cmd.exe included).
+    """
+    if isinstance(cmd, list):
+        cmd = shlex.join(cmd)
+    return _run_captured(_ssh_command(host, port, cmd), timeout)
+
+
+def _pump_output(stream: IO[str], buf: list[str], host: str) -> None:
+    """Echo remote output line by line as it arrives, keeping a copy in buf."""
+    for line in iter(stream.readline, ""):
+        buf.append(line)
+        info(f"  {host}: {escape(line.rstrip())}")
+
+
+def _feed_stdin(stream: IO[str], data: str) -> None:
+    """Write data to a child's stdin and close it, tolerating an early exit."""
+    try:
+        stream.write(data)
+        stream.close()
+    except (OSError, ValueError):
+        pass  # The child exited or was killed before reading everything
+
+
+def _run_streamed(
+    ssh_cmd: list[str], host: str, timeout: int, stdin: str | None = None
+) -> tuple[bool, str]:
+    """Run an ssh command, echoing its output live and returning it as well."""
+    budget = _budgeted(timeout)
+    if budget <= 0:
+        return False, "Command timed out"
+    buf: list[str] = []
+    try:
+        proc = subprocess.Popen(
+            ssh_cmd,
+            stdin=subprocess.PIPE if stdin is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        )
+    except FileNotFoundError:
+        return False, "SSH not found"
+
+    reader = threading.Thread(target=_pump_output, args=(proc.stdout, buf, host), daemon=True)
+    reader.start()
+    if stdin is not None:
+        # Feed stdin from its own thread so a child that stops reading
+        # can't block us past the timeout below
+        assert proc.stdin is not None
+        threading.Thread(target=_feed_stdin, args=(proc.stdin, stdin), daemon=True).start()
+    try:
+        returncode = proc.wait(timeout=budget)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        reader.join(timeout=1)
+        return False, "".join(buf) + "Command timed out"
+    reader.join()
+    return returncode == 0, "".join(buf)
+
+
+def ssh_run_streamed(host: str, port: int, cmd: str, timeout: int = 180) -> tuple[bool, str]:
+    """Run a long command on remote host via SSH, showing output as it arrives.
+
+    Returns:
+        Tuple of (success, output) where output is the combined stdout/stderr.
+    """
+    return _run_streamed(_ssh_command(host, port, cmd), host, timeout)
+
+
+def ssh_run_script(
+    host: str,
+    port: int,
+    script: str,
+    shell: str = "bash",
+    timeout: int = 120,
+    stream: bool = False,
+) -> tuple[bool, str]:
+    """Run a multi-line script on remote host in a single SSH session.
+
+    Bash scripts are piped over stdin (``bash -s``). PowerShell scripts are
+    sent with -EncodedCommand instead, because ``powershell -Command -``
+    reads stdin line by line and breaks multi-line blocks.
+
+    With stream=True the output is echoed live as well as returned.
+    """
+    if shell == "powershell":
+        encoded = base64.b64encode(script.encode("utf-16-le")).decode("ascii")
+        remote_cmd = f"powershell -NoProfile -NonInteractive -EncodedCommand {encoded}"
+        stdin = ""
+    else:
+        remote_cmd = f"{shell} -s"
+        stdin = script
+    if stream:
+        return _run_streamed(_ssh_command(host, port, remote_cmd), host, timeout, stdin)
+    return _run_captured(_ssh_command(host, port, remote_cmd), timeout, stdin)
+
+
 def detect_remote_os(host: str, port: int) -> str | None:
     """Detect OS type of remote host. Returns 'linux', 'windows', or None."""
-    # Try uname first (works on Linux/WSL/MSYS)
-    success, output = ssh_run(host, port, "uname -s", timeout=15)
-    if success:
-        out = output.strip().lower()
-        if "linux" in out:
-            return "linux"
-        if "darwin" in out:
-            return "macos"
-        # MSYS/Git Bash on Windows reports as MSYS_NT-*
-        if "msys" in out or "mingw" in out or "cygwin" in out:
-            return "windows"
-
-    # Try Windows-specific command
-    success, output = ssh_run(host, port, "echo %OS%", timeout=15)
-    if success and "windows" in output.lower():
+    # One probe for POSIX shells and cmd.exe: uname works on Linux/WSL/MSYS;
+    # under cmd.exe it is not found, so the %OS% echo runs instead
+    success, output = ssh_run(host, port, "uname -s || echo %OS%", timeout=15)
+    out = output.strip().casefold()
+    if success and "linux" in out:
+        return "linux"
+    if success and "darwin" in out:
+        return "macos"
+    # MSYS/Git Bash on Windows reports as MSYS_NT-*
+    if "msys" in out or "mingw" in out or "cygwin" in out or "windows_nt" in out:
         return "windows"
 
     # Try PowerShell as fallback for Windows
-    success, output = ssh_run(host, port, 'powershell -Command "$env:OS"', timeout=15)
-    if success and "windows" in output.lower():
+    success, output = ssh_run(host, port, f'{POWERSHELL} "$env:OS"', timeout=15)
+    if success and "windows" in output.casefold():
         return "windows"
 
     return None
 
 
+# sudo asked for a password or a TTY, i.e. `mesh remote prepare` hasn't been run
+SUDO_PROMPT_PATTERN = re.compile(r"password|terminal", re.IGNORECASE)
+
+# Printed by TAILSCALE_INSTALL_SCRIPT when Tailscale is already installed
+TAILSCALE_PRESENT_MARKER = "MESH_TAILSCALE_PRESENT"
+
+TAILSCALE_INSTALL_SCRIPT = f"""set -o pipefail
+if command -v tailscale >/dev/null 2>&1; then
+    echo {TAILSCALE_PRESENT_MARKER}
+else
+    curl -fsSL https://tailscale.com/install.sh | sudo sh
+fi
+"""
+
+
 def provision_linux(host: str, port: int, server_url: str, auth_key: str) -> bool:
     """Provision Tailscale on a Linux host."""
     info("Installing Tailscale on Linux...")
 
-    # Check if already installed
-    success, _ = ssh_run(host, port, "which tailscale")
-    if success:
+    # Check for Tailscale and run the official installer if missing, in one session
+    success, output = ssh_run_script(host, port, TAILSCALE_INSTALL_SCRIPT, timeout=180, stream=True)
+    if not success:
+        if SUDO_PROMPT_PATTERN.search(output):
+            error("sudo requires password - run 'mesh remote prepare' first")
+            info(f"  mesh remote prepare {host} -p {port}")
+        else:
+            error(f"Failed to install Tailscale: {output}")
+        return False
+    if TAILSCALE_PRESENT_MARKER in output:
         ok("Tailscale already installed")
     else:
-        # Install via official script
-        info("Downloading and running Tailscale installer...")
-        success, output = ssh_run(
-            host,
-            port,
-            "curl -fsSL https://tailscale.com/install.sh | sudo sh",
-            timeout=180,
-        )
-        if not success:
-            if "password" in output.lower() or "terminal" in output.lower():
-                error("sudo requires password - run 'mesh remote prepare' first")
-                info(f"  mesh remote prepare {host} -p {port}")
-            else:
-                error(f"Failed to install Tailscale: {output}")
-            return False
         ok("Tailscale installed")
 
     # Connect to Headscale
     info("Connecting to mesh network...")
-    ts_cmd = (
-        f"sudo tailscale up --login-server={server_url} "
-        f"--authkey={auth_key} --accept-routes --accept-dns=true"
-    )
+    ts_cmd = [
+        "sudo",
+        "tailscale",
+        "up",
+        f"--login-server={server_url}",
+        f"--authkey={auth_key}",
+        "--accept-routes",
+        "--accept-dns=true",
+    ]
     success, output = ssh_run(host, port, ts_cmd, timeout=60)
     if not success:
         # Check if already connected
-        success, status = ssh_run(host, port, "tailscale status")
-        if success and server_url.split("//")[1].split(":")[0] in status:
+        success, status = ssh_run(host, port, ["tailscale", "status"])
+        # An empty host would match any status output
+        if success and (server_host := _server_host(server_url)) and server_host in status:
             ok("Already connected to mesh")
         else:
             error(f"Failed to connect: {output}")
@@ -144,7 +344,7 @@ def provision_linux(host: str, port: int, server_url: str, auth_key: str) -> boo
         ok("Connected to mesh network")
 
     # Get Tailscale IP
-    success, output = ssh_run(host, port, "tailscale ip -4")
+    success, output = ssh_run(host, port, ["tailscale", "ip", "-4"])
     if success:
         info(f"Tailscale IP: {output.strip()}")
 
@@ -159,7 +359,7 @@ def provision_linux(host: str, port: int, server_url: str, auth_key: str) -> boo
     if success:
         ok("Logtail suppression deployed")
         # Restart tailscaled to pick up the new config
-        ssh_run(host, port, "sudo systemctl restart tailscaled", timeout=30)
+        ssh_run(host, port, ["sudo", "systemctl", "restart", "tailscaled"], timeout=30)
     else:
         warn(f"Could not deploy logtail suppression: {output}")
         info("Run 'mesh harden remote' to deploy manually")
@@ -175,53 +375,64 @@ def check_windows_vpn_lan_access(host: str, port: int, server_ip: str) -> bool:
     # Just check if we can reach the Headscale server directly
     # This is the definitive test - if curl works, we're good
     cmd = (
-        f"powershell -Command \"curl.exe -s -o NUL -w '%{{http_code}}' "
+        f"{POWERSHELL} \"curl.exe -s -o NUL -w '%{{http_code}}' "
         f'-m 5 http://{server_ip}:8080/health"'
     )
     success, output = ssh_run(host, port, cmd, timeout=10)
     return not success or "200" not in output
 
 
+# VPN services that conflict with Tailscale on Windows: service name pattern -> VPN name
+WINDOWS_VPN_SERVICES = {
+    "NordVPN*": "NordVPN",  # uses WireGuard on port 41641
+    "ExpressVPN*": "ExpressVPN",
+    "Surfshark*": "Surfshark",
+    "CyberGhost*": "CyberGhost",
+    "pia*": "Private Internet Access",
+}
+
+# Network adapters that indicate a conflicting VPN: adapter name -> VPN name
+WINDOWS_VPN_ADAPTERS = {
+    "NordLynx": "NordLynx (NordVPN WireGuard)",
+}
+
+# Lines emitted by the VPN probe script: SVC:<pattern> or ADAPTER:<name>
+VPN_MATCH_PATTERN = re.compile(r"^(SVC|ADAPTER):(.+?)\s*$", re.MULTILINE)
+
+
 def check_windows_vpn_conflicts(host: str, port: int) -> list[str]:
     """Check for VPN software that conflicts with Tailscale on Windows.
 
+    All services and adapters are probed in a single PowerShell session.
+
     Returns list of detected conflicting VPNs.
     """
-    conflicts = []
-
-    # Check for NordVPN (uses WireGuard on port 41641)
-    cmd = (
-        'powershell -Command "Get-Service NordVPN* 2>$null | Select-Object -ExpandProperty Status"'
+    patterns = ",".join(_ps_quote(p) for p in WINDOWS_VPN_SERVICES)
+    adapters = ",".join(_ps_quote(a) for a in WINDOWS_VPN_ADAPTERS)
+    script = (
+        f"foreach ($p in @({patterns})) {{ "
+        "if (Get-Service $p -ErrorAction SilentlyContinue | Where-Object Status -eq Running) "
+        '{ "SVC:$p" } }\n'
+        f"foreach ($a in @({adapters})) {{ "
+        "if ((Get-NetAdapter -Name $a -ErrorAction SilentlyContinue).Status -eq 'Up') "
+        '{ "ADAPTER:$a" } }\n'
     )
-    success, output = ssh_run(host, port, cmd, timeout=10)
-    if success and "Running" in output:
-        conflicts.append("NordVPN")
+    success, output = ssh_run_script(host, port, script, shell="powershell", timeout=20)
+    if not success:
+        return []
 
-    # Check for NordLynx adapter (NordVPN WireGuard)
-    cmd = (
-        'powershell -Command "'
-        'Get-NetAdapter -Name NordLynx 2>$null | Select-Object -ExpandProperty Status"'
-    )
-    success, output = ssh_run(host, port, cmd, timeout=10)
-    if success and "Up" in output:
-        conflicts.append("NordLynx (NordVPN WireGuard)")
-
-    # Check for other common VPNs that might conflict
-    vpn_services = [
-        ("ExpressVPN", "ExpressVPN*"),
-        ("Surfshark", "Surfshark*"),
-        ("CyberGhost", "CyberGhost*"),
-        ("Private Internet Access", "pia*"),
+    names = {"SVC": WINDOWS_VPN_SERVICES, "ADAPTER": WINDOWS_VPN_ADAPTERS}
+    return [
+        names[kind][key] for kind, key in VPN_MATCH_PATTERN.findall(output) if key in names[kind]
     ]
-    for name, pattern in vpn_services:
-        cmd = (
-            f'powershell -Command "Get-Service {pattern} 2>$null | Where-Object Status -eq Running"'
-        )
-        success, output = ssh_run(host, port, cmd, timeout=10)
-        if success and output.strip():
-            conflicts.append(name)
 
-    return conflicts
+
+def _ps_quote(value: str) -> str:
+    """Quote a value as a PowerShell single-quoted string literal.
+
+    Embedded single quotes are doubled, PowerShell's escape inside '...'.
+    """
+    return "'" + value.replace("'", "''") + "'"
 
 
 def provision_windows(host: str, port: int, server_url: str, auth_key: str) -> bool:
@@ -239,8 +450,7 @@ def provision_windows(host: str, port: int, server_url: str, auth_key: str) -> b
     ts_exe = "C:\\Program Files\\Tailscale\\tailscale.exe"
 
     # Extract server IP from URL for connectivity checks
-    server_match = re.search(r"://([^:/]+)", server_url)
-    server_ip = server_match.group(1) if server_match else ""
+    server_ip = _server_host(server_url)
 
     # Check for VPN conflicts FIRST
     info("Checking for VPN conflicts...")
@@ -261,24 +471,24 @@ def provision_windows(host: str, port: int, server_url: str, auth_key: str) -> b
         info("")
 
     # Check if Tailscale is installed
-    check_cmd = f"powershell -Command \"Test-Path '{ts_exe}'\""
+    check_cmd = f'{POWERSHELL} "Test-Path {_ps_quote(ts_exe)}"'
     success, output = ssh_run(host, port, check_cmd)
     if not success or "False" in output:
         # Try to install via winget (use --source winget to avoid msstore cert issues)
         info("Tailscale not found, attempting winget install...")
         install_cmd = (
-            'powershell -Command "winget install --id Tailscale.Tailscale '
+            f'{POWERSHELL} "winget install --id Tailscale.Tailscale '
             '--source winget --accept-source-agreements --accept-package-agreements --silent"'
         )
         success, output = ssh_run(host, port, install_cmd, timeout=180)
-        if not success and "already installed" not in output.lower():
+        if not success and "already installed" not in output.casefold():
             error("Failed to install Tailscale via winget")
             info("Install manually from: https://tailscale.com/download/windows")
             return False
         ok("Tailscale installed via winget")
         # Wait for service to start after fresh install
         info("Waiting for Tailscale service to initialize...")
-        ssh_run(host, port, 'powershell -Command "Start-Sleep 5"', timeout=15)
+        ssh_run(host, port, f'{POWERSHELL} "Start-Sleep 5"', timeout=15)
     else:
         ok("Tailscale is installed")
 
@@ -288,11 +498,11 @@ def provision_windows(host: str, port: int, server_url: str, auth_key: str) -> b
     registry_cmds = [
         "$regPath = 'HKLM:\\SOFTWARE\\Tailscale IPN'",
         "if (!(Test-Path $regPath)) { New-Item -Path $regPath -Force | Out-Null }",
-        f"Set-ItemProperty -Path $regPath -Name 'LoginURL' -Value '{server_url}'",
-        f"Set-ItemProperty -Path $regPath -Name 'AuthKey' -Value '{auth_key}'",
+        f"Set-ItemProperty -Path $regPath -Name 'LoginURL' -Value {_ps_quote(server_url)}",
+        f"Set-ItemProperty -Path $regPath -Name 'AuthKey' -Value {_ps_quote(auth_key)}",
         "Set-ItemProperty -Path $regPath -Name 'UnattendedMode' -Value 'always'",
     ]
-    reg_cmd = f'powershell -Command "{"; ".join(registry_cmds)}"'
+    reg_cmd = f'{POWERSHELL} "{"; ".join(registry_cmds)}"'
     success, output = ssh_run(host, port, reg_cmd, timeout=15)
     if success:
         ok("Registry configured for mesh connection")
@@ -328,10 +538,10 @@ def provision_windows(host: str, port: int, server_url: str, auth_key: str) -> b
 
     lines = header_lines + [
         "$ErrorActionPreference = 'Continue'",
-        f"$TailscaleExe = '{ts_exe}'",
-        f"$ServerUrl = '{server_url}'",
-        f"$AuthKey = '{auth_key}'",
-        f"$LogFile = '{log_path}'",
+        f"$TailscaleExe = {_ps_quote(ts_exe)}",
+        f"$ServerUrl = {_ps_quote(server_url)}",
+        f"$AuthKey = {_ps_quote(auth_key)}",
+        f"$LogFile = {_ps_quote(log_path)}",
         "",
         "# Start transcript logging",
         "Start-Transcript -Path $LogFile -Force",
@@ -417,26 +627,12 @@ def provision_windows(host: str, port: int, server_url: str, auth_key: str) -> b
     # Write script content by piping via stdin (avoids command-line length limits)
     script_content = "\n".join(lines)
 
-    # Use subprocess directly with stdin
-    ps_write_cmd = f"powershell -Command \"$input | Set-Content -Path '{script_path}'\""
-    ssh_cmd = ["ssh"] + SSH_OPTS + ["-p", str(port), host, ps_write_cmd]
-    # First ensure temp directory exists
-    mkdir_cmd = (
-        "powershell -Command \"New-Item -Path 'C:\\temp' -ItemType Directory -Force | Out-Null\""
+    # Ensure the temp directory exists and write the script in one SSH session
+    ps_write_cmd = (
+        f"{POWERSHELL} \"New-Item -Path 'C:\\temp' -ItemType Directory -Force | Out-Null; "
+        f'$input | Set-Content -Path {_ps_quote(script_path)}"'
     )
-    ssh_run(host, port, mkdir_cmd)
-
-    try:
-        result = subprocess.run(
-            ssh_cmd,
-            input=script_content,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        success = result.returncode == 0
-    except subprocess.TimeoutExpired:
-        success = False
+    success, _ = _run_captured(_ssh_command(host, port, ps_write_cmd), 30, script_content)
 
     if success:
         ok("Script created on Windows")
@@ -477,22 +673,33 @@ def _extract_hostname(host: str) -> str:
     return host.split(".")[0].lower()
 
 
-def _is_already_provisioned(hostname: str, user: str = "mesh") -> bool:
-    """Check if a host is already provisioned in the mesh.
+def _already_provisioned_set(user: str = "mesh") -> set[str]:
+    """Get the lowercased names of all nodes already in the mesh.
 
     Args:
-        hostname: Hostname to check
         user: Headscale user/namespace
 
     Returns:
-        True if host is already in Headscale nodes list.
+        Set of node givenNames (empty if Headscale can't be queried).
     """
     try:
         nodes = list_nodes(user=user)
-        node_names = {n.get("givenName", "").lower() for n in nodes}
-        return hostname.lower() in node_names
+        return {n.get("givenName", "").lower() for n in nodes}
     except Exception:
-        return False
+        return set()
+
+
+def _is_already_provisioned(hostname: str, provisioned: set[str]) -> bool:
+    """Check if a host is already provisioned in the mesh.
+
+    Args:
+        hostname: Hostname to check
+        provisioned: Node names from _already_provisioned_set()
+
+    Returns:
+        True if host is already in Headscale nodes list.
+    """
+    return hostname.lower() in provisioned
 
 
 @app.command()
@@ -544,7 +751,7 @@ def provision(
     hostname = original_name if registered_host else _extract_hostname(host)
 
     # Check if already provisioned (unless --force)
-    if not force and _is_already_provisioned(hostname, user):
+    if not force and _is_already_provisioned(hostname, _already_provisioned_set(user)):
         ok(f"{hostname} is already provisioned in the mesh")
         info("Use --force to re-provision anyway")
         return
@@ -598,12 +805,12 @@ def provision(
     # Install Syncthing (Linux only for now)
     if not skip_syncthing and os_type == "linux":
         info("Installing Syncthing...")
-        success, _ = ssh_run(host, port, "which syncthing")
+        success, _ = ssh_run(host, port, ["which", "syncthing"])
         if success:
             ok("Syncthing already installed")
         else:
             # Install via apt
-            success, output = ssh_run(
+            success, output = ssh_run_streamed(
                 host,
                 port,
                 "sudo apt-get update && sudo apt-get install -y syncthing",
@@ -640,11 +847,11 @@ def status(
     # Check Tailscale
     info("Checking Tailscale...")
     if os_type == "linux":
-        success, output = ssh_run(host, port, "tailscale status")
+        success, output = ssh_run(host, port, ["tailscale", "status"])
         if success:
             ok("Tailscale connected")
             # Get IP
-            success, ip = ssh_run(host, port, "tailscale ip -4")
+            success, ip = ssh_run(host, port, ["tailscale", "ip", "-4"])
             if success:
                 info(f"Tailscale IP: {ip.strip()}")
         else:
@@ -653,7 +860,7 @@ def status(
         success, output = ssh_run(
             host,
             port,
-            'powershell -Command "& \\"C:\\Program Files\\Tailscale\\tailscale.exe\\" status"',
+            f'{POWERSHELL} "& \\"C:\\Program Files\\Tailscale\\tailscale.exe\\" status"',
         )
         if success and "100.64" in output:
             ok("Tailscale connected")
@@ -663,11 +870,11 @@ def status(
     # Check Syncthing (Linux only)
     if os_type == "linux":
         info("Checking Syncthing...")
-        success, _ = ssh_run(host, port, "which syncthing")
+        success, _ = ssh_run(host, port, ["which", "syncthing"])
         if success:
             ok("Syncthing installed")
             # Check if running
-            success, _ = ssh_run(host, port, "pgrep syncthing")
+            success, _ = ssh_run(host, port, ["pgrep", "syncthing"])
             if success:
                 ok("Syncthing running")
             else:
@@ -676,6 +883,88 @@ def status(
             warn("Syncthing not installed")
 
 
+# Serialises Headscale pre-auth key creation across provision-all workers
+_preauth_lock = threading.Lock()
+
+
+def _provision_one(
+    host: str,
+    port: int,
+    label: str,
+    server: str,
+    user: str,
+    force: bool,
+    provisioned: set[str],
+) -> tuple[str, bool, str, str | None]:
+    """Provision a single registry host (one provision-all worker).
+
+    Args:
+        provisioned: Node names already in the mesh, fetched once per run
+
+    Returns:
+        Tuple of (label, success, status, os_type).
+    """
+    info(f"\n--- {label} ({host}:{port}) ---")
+    try:
+        # Check if already provisioned (unless --force)
+        if not force and _is_already_provisioned(label, provisioned):
+            ok(f"{label} already provisioned, skipping")
+            return label, True, "already provisioned", None
+
+        # Test connectivity first
+        success, _ = ssh_run(host, port, "echo connected", timeout=10)
+        if not success:
+            warn(f"Cannot reach {label}, skipping")
+            return label, False, "unreachable", None
+
+        # Detect OS
+        os_type = detect_remote_os(host, port)
+        if not os_type:
+            warn(f"Cannot detect OS for {label}, skipping")
+            return label, False, "unknown OS", None
+
+        # Generate auth key for this host
+        with _preauth_lock:
+            auth_key = create_preauth_key(user)
+        if not auth_key:
+            warn(f"Could not generate auth key for {label}, skipping")
+            return label, False, "no auth key", None
+
+        # Provision
+        if os_type == "linux":
+            success = provision_linux(host, port, server, auth_key)
+        elif os_type == "windows":
+            success = provision_windows(host, port, server, auth_key)
+        else:
+            success = False
+
+        return label, success, "provisioned" if success else "failed", os_type
+
+    except Exception as e:
+        return label, False, str(e), None
+    finally:
+        # Don't leave this host's master socket lingering after its last command
+        close_control_master(host, port)
+
+
+def _provision_with_budget(
+    budget: int, host: str, port: int, label: str, *args
+) -> tuple[str, bool, str, str | None]:
+    """Run _provision_one() for a host, giving up after budget seconds.
+
+    The budget caps every subprocess the host's provisioning starts, so a
+    hung host is killed at the deadline rather than left running in the
+    background while the command moves on.
+    """
+    start = time.monotonic()
+    with thread_budget(budget):
+        result = _provision_one(host, port, label, *args)
+    if not result[1] and time.monotonic() - start >= budget:
+        warn(f"{label}: no result after {budget}s, giving up")
+        return label, False, f"timed out after {budget}s", None
+    return result
+
+
 @app.command(name="provision-all")
 def provision_all(
     server: str | None = typer.Option(
@@ -685,13 +974,24 @@ def provision_all(
     force: bool = typer.Option(
         False, "--force", "-f", help="Force re-provision even if already in mesh"
     ),
+    concurrency: int = typer.Option(
+        8, "--concurrency", "-C", min=1, help="Number of hosts to provision in parallel"
+    ),
+    host_timeout: int = typer.Option(
+        600, "--host-timeout", min=1, help="Give up on a host after this many seconds"
+    ),
+    raw: bool = typer.Option(
+        False, "--raw", help="Show the final node list as raw `headscale nodes list` output"
+    ),
 ) -> None:
     """Provision all hosts from the registry.
 
-    Uses hosts from ~/.config/mesh/hosts.yaml.
+    Uses hosts from ~/.config/mesh/hosts.json.
     Add hosts first with: mesh host add <name> --ip <IP>
 
     Skips hosts that are already provisioned (use --force to override).
+    Hosts are provisioned in parallel (see --concurrency); use -C 1 for
+    sequential, easier-to-read output.
     """
     # Auto-detect server URL if not provided
     if server is None:
@@ -711,56 +1011,35 @@ def provision_all(
     hosts = [(f"{h.user}@{h.ip}", h.port, h.name) for h in registry.values()]
     info(f"Found {len(hosts)} host(s) in registry")
 
-    results = []
-    for host, port, label in hosts:
-        info(f"\n--- {label} ({host}:{port}) ---")
-        try:
-            # Check if already provisioned (unless --force)
-            if not force and _is_already_provisioned(label, user):
-                ok(f"{label} already provisioned, skipping")
-                results.append((label, True, "already provisioned", None))
-                continue
-
-            # Test connectivity first
-            success, _ = ssh_run(host, port, "echo connected", timeout=10)
-            if not success:
-                warn(f"Cannot reach {label}, skipping")
-                results.append((label, False, "unreachable", None))
-                continue
-
-            # Detect OS
-            os_type = detect_remote_os(host, port)
-            if not os_type:
-                warn(f"Cannot detect OS for {label}, skipping")
-                results.append((label, False, "unknown OS", None))
-                continue
-
-            # Generate auth key for this host
-            auth_key = create_preauth_key(user)
-            if not auth_key:
-                warn("Could not generate auth key, skipping")
-                results.append((label, False, "no auth key", None))
-                continue
-
-            # Provision
-            if os_type == "linux":
-                success = provision_linux(host, port, server, auth_key)
-            elif os_type == "windows":
-                success = provision_windows(host, port, server, auth_key)
-            else:
-                success = False
+    # Query Headscale once rather than once per host
+    provisioned = set() if force else _already_provisioned_set(user)
 
-            results.append((label, success, "provisioned" if success else "failed", os_type))
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(
+                _provision_with_budget,
+                host_timeout,
+                host,
+                port,
+                label,
+                server,
+                user,
+                force,
+                provisioned,
+            )
+            for host, port, label in hosts
+        ]
+        for future in as_completed(futures):
+            label, _, status, _ = future.result()
+            info(f"{label} finished: {status}")
 
-        except Exception as e:
-            results.append((label, False, str(e), None))
+    # Futures are in registry order, so the summary keeps that order
+    results = [future.result() for future in futures]
 
     # Summary
     section("Provisioning Summary")
     windows_failed = False
-    for item in results:
-        label, success, status = item[0], item[1], item[2]
-        detected_os = item[3] if len(item) > 3 else None
+    for label, success, status, detected_os in results:
         if success:
             ok(f"{label}: {status}")
         else:
@@ -774,8 +1053,24 @@ def provision_all(
         info("See the instructions printed above to complete Windows setup.")
 
     # Show final mesh status
-    info("\nHeadscale nodes:")
-    subprocess.run(["sudo", "headscale", "nodes", "list"], timeout=10)
+    if raw:
+        info("\nHeadscale nodes:")
+        subprocess.run(["sudo", "headscale", "nodes", "list"], timeout=10)
+        return
+
+    nodes = list_nodes()
+    if not nodes:
+        warn("Could not list Headscale nodes")
+        return
+    table = create_table("Headscale Nodes", ["ID", "Name", "IP", "Status"])
+    for node in nodes:
+        table.add_row(
+            str(node.get("id", "")),
+            node.get("givenName", node.get("name", "unknown")),
+            (node.get("ipAddresses") or [""])[0],
+            "[green]online[/green]" if node.get("online") else "[red]offline[/red]",
+        )
+    print_table(table)
 
 
 @app.command()
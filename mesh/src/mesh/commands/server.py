@@ -1,5 +1,7 @@
 """Server management commands (Headscale coordination server)."""
 
+import time
+
 import typer
 
 from mesh.core import headscale
@@ -91,8 +93,6 @@ def setup(
             info("Clients can use: mesh client setup --discover --key <KEY>")
             info("Press Ctrl+C to stop advertising")
             try:
-                import time
-
                 while True:
                     time.sleep(1)
             except KeyboardInterrupt:
@@ -1,16 +1,49 @@
 """Samba/SMB file sharing commands."""
 
-import getpass
+import functools
+import re
+import shlex
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import typer
 
-from mesh.core.config import get_shared_folder
 from mesh.core.environment import OSType, detect_os_type
+from mesh.core.probes import probe_context
 from mesh.utils.output import error, info, ok, section, warn
-from mesh.utils.process import command_exists, run_sudo
-from mesh.utils.ssh import ssh_to_host
+from mesh.utils.process import CommandResult, command_budget, command_exists, run, run_sudo
+
+# Samba daemons managed by setup-server and checked by status
+SMB_SERVICES = ("smbd", "nmbd")
+
+# systemd ActiveState values treated as running
+LIVE_UNIT_STATES = frozenset({"active", "activating"})
+
+# testparm prints each section header as [name] on its own line
+SECTION_HEADER_PATTERN = re.compile(r"^\s*\[([^\]]+)\]\s*$", re.MULTILINE)
+
+# smb.conf sections that are not user shares
+BUILTIN_SECTIONS = frozenset({"global", "printers", "print$"})
+
+# Touched by apt's periodic job after a successful package list update
+APT_UPDATE_STAMP = Path("/var/lib/apt/periodic/update-success-stamp")
+APT_FRESH_SECONDS = 3600
+
+# Restart policy installed as a drop-in for each Samba service
+SYSTEMD_RESTART_DROPIN = "[Service]\nRestart=on-failure\nRestartSec=5\n"
+
+# Per-step result lines printed by _service_setup_script
+SERVICE_STEP_PATTERN = re.compile(
+    r"^(share|password|ufw|dropin|enable) (\S+) (ok|failed|skipped)$", re.MULTILINE
+)
+
+# Kernel TCP socket tables (IPv4, IPv6)
+PROC_TCP_TABLES = ("/proc/net/tcp", "/proc/net/tcp6")
+
+# How long setup-server waits for services to become active after enabling them
+SERVICE_WAIT_TIMEOUT = 10.0
 
 app = typer.Typer(
     name="smb",
@@ -19,112 +52,301 @@ app = typer.Typer(
 )
 
 
+# Drive-mapping script written by setup-client; rendered with str.format_map,
+# so literal PowerShell braces are doubled
+MAP_DRIVE_SCRIPT = r"""# map-smb-drive.ps1 - Generated by mesh smb setup-client
+# Server: {server}
+# Share: {share}
+# Drive: {drive}
+# User: {user}
+
+$ErrorActionPreference = 'Continue'
+
+Write-Host '=== SMB Drive Mapping ===' -ForegroundColor Cyan
+
+# Step 1: Get credentials
+Write-Host 'Enter SMB password for {user}' -ForegroundColor Yellow
+$Cred = Get-Credential -UserName '{user}' -Message 'Enter SMB password'
+if (-not $Cred) {{
+    Write-Host 'Cancelled.' -ForegroundColor Red
+    Read-Host 'Press Enter to exit'
+    exit 1
+}}
+$Password = $Cred.GetNetworkCredential().Password
+
+# Step 2: Remove existing mapping
+Write-Host 'Removing existing {drive} mapping...' -ForegroundColor Yellow
+net use {drive} /delete /y 2>$null
+
+# Step 3: Map drive
+Write-Host 'Mapping {drive} to \\{server}\{share}...' -ForegroundColor Yellow
+$mapResult = net use {drive} \\{server}\{share} /user:{user} $Password /persistent:yes 2>&1
+if ($LASTEXITCODE -eq 0) {{
+    Write-Host 'SUCCESS: {drive} mapped to \\{server}\{share}' -ForegroundColor Green
+}} else {{
+    Write-Host 'FAILED to map {drive}' -ForegroundColor Red
+    Write-Host $mapResult -ForegroundColor Red
+    Read-Host 'Press Enter to exit'
+    exit 1
+}}
+
+# Step 4: Enable linked connections (for elevated processes)
+Write-Host 'Setting EnableLinkedConnections...' -ForegroundColor Yellow
+$regPath = 'HKLM:\SOFTWARE\Microsoft\Windows\CurrentVersion\Policies\System'
+try {{
+    Set-ItemProperty -Path $regPath -Name 'EnableLinkedConnections' -Value 1 -Type DWord
+    Write-Host 'EnableLinkedConnections set' -ForegroundColor Green
+}} catch {{
+    Write-Host 'WARNING: Could not set EnableLinkedConnections (run as admin)' `
+        -ForegroundColor Yellow
+}}
+
+# Step 5: Create reconnect script in Startup folder
+Write-Host 'Creating startup reconnect script...' -ForegroundColor Yellow
+$startupPath = "$env:APPDATA\Microsoft\Windows\Start Menu\Programs\Startup"
+$cmdPath = Join-Path $startupPath 'reconnect-smb.cmd'
+$cmdContent = @"
+@echo off
+net use {drive} \\{server}\{share} /user:{user} /persistent:yes
+"@
+try {{
+    $cmdContent | Set-Content -Path $cmdPath -Force
+    Write-Host "Startup script created: $cmdPath" -ForegroundColor Green
+}} catch {{
+    Write-Host "WARNING: Could not create startup script: $_" -ForegroundColor Yellow
+}}
+
+Write-Host ''
+Write-Host '{drive} is now mapped to \\{server}\{share}' -ForegroundColor Cyan
+Write-Host 'Note: Log off and back on for EnableLinkedConnections to take effect' `
+    -ForegroundColor Yellow
+Write-Host ''
+Read-Host 'Press Enter to exit'
+"""
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
 
-def _is_tailscale_connected() -> bool:
-    """Check if Tailscale is connected."""
-    try:
-        result = subprocess.run(
-            ["tailscale", "status", "--json"],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        if result.returncode == 0:
-            import json
+@functools.lru_cache(maxsize=1)
+def _testparm_output() -> CommandResult:
+    """Run ``testparm -s`` once per invocation and memoize the result.
+
+    testparm parses the whole Samba config, so setup-server and status share
+    one run. Call ``_testparm_output.cache_clear()`` after changing smb.conf.
+    """
+    return run(["testparm", "-s"], timeout=10)
+
 
-            data = json.loads(result.stdout)
-            return data.get("BackendState") == "Running"
-    except (subprocess.TimeoutExpired, FileNotFoundError, ValueError):
-        pass
-    return False
+def _testparm_sections(output: str) -> list[str]:
+    """Extract section names from testparm output, in file order."""
+    return SECTION_HEADER_PATTERN.findall(output)
 
 
 def _share_exists_in_testparm(share_name: str) -> bool:
     """Check if a share section already exists via testparm."""
+    return share_name in _testparm_sections(_testparm_output().stdout)
+
+
+def _apt_lists_fresh(max_age: float = APT_FRESH_SECONDS) -> bool:
+    """Check whether apt package lists were refreshed recently."""
     try:
-        result = subprocess.run(
-            ["testparm", "-s"],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        # testparm outputs section headers as [name]
-        for line in result.stdout.splitlines():
-            stripped = line.strip()
-            if stripped == f"[{share_name}]":
-                return True
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        pass
-    return False
+        return time.time() - APT_UPDATE_STAMP.stat().st_mtime < max_age
+    except OSError:
+        return False
 
 
-def _set_smb_password(user: str, password: str) -> bool:
-    """Set Samba password for a user via smbpasswd.
+def _samba_install_script() -> str:
+    """Build the apt script that installs Samba under a single sudo.
 
-    Uses subprocess directly because run_sudo() does not support input=.
+    ``apt-get update`` is skipped when the lists are fresh; as before, an
+    update failure does not stop the install attempt.
     """
-    try:
-        result = subprocess.run(
-            ["sudo", "smbpasswd", "-a", "-s", user],
-            input=f"{password}\n{password}\n",
-            text=True,
-            capture_output=True,
-            timeout=30,
-        )
-        return result.returncode == 0
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        return False
+    lines = ["export DEBIAN_FRONTEND=noninteractive"]
+    if not _apt_lists_fresh():
+        lines.append("apt-get update -qq")
+    lines.append("apt-get install -y --no-install-recommends samba")
+    return "\n".join(lines) + "\n"
 
 
-def _systemctl_is_active(service: str) -> bool:
-    """Check if a systemd service is active."""
+def _set_smb_password(user: str, password: str) -> bool:
+    """Set Samba password for a user via smbpasswd."""
+    result = run_sudo(
+        ["smbpasswd", "-a", "-s", user],
+        input=f"{password}\n{password}\n",
+        timeout=30,
+    )
+    return result.success
+
+
+def _dbus_active_states(services: tuple[str, ...]) -> dict[str, str] | None:
+    """Read unit ActiveState straight from systemd over the system bus.
+
+    Uses jeepney (the ``dbus`` extra) when it is installed, which avoids
+    spawning systemctl.
+
+    Returns:
+        Dict mapping each service to its ActiveState, or None if jeepney is
+        missing or the bus is unreachable (e.g. containers without systemd).
+    """
     try:
-        result = subprocess.run(
-            ["systemctl", "is-active", service],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        return result.stdout.strip() == "active"
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        return False
+        from jeepney import DBusAddress, Properties, new_method_call
+        from jeepney.io.blocking import open_dbus_connection
+        from jeepney.wrappers import unwrap_msg
+    except ImportError:
+        return None
+
+    manager = DBusAddress(
+        "/org/freedesktop/systemd1",
+        bus_name="org.freedesktop.systemd1",
+        interface="org.freedesktop.systemd1.Manager",
+    )
+    states: dict[str, str] = {}
+    try:
+        with open_dbus_connection(bus="SYSTEM") as conn:
+            for service in services:
+                # LoadUnit (unlike GetUnit) also answers for units that are not loaded
+                load = new_method_call(manager, "LoadUnit", "s", (f"{service}.service",))
+                (unit_path,) = unwrap_msg(conn.send_and_get_reply(load, timeout=5))
+                unit = DBusAddress(
+                    unit_path,
+                    bus_name="org.freedesktop.systemd1",
+                    interface="org.freedesktop.systemd1.Unit",
+                )
+                reply = conn.send_and_get_reply(Properties(unit).get("ActiveState"), timeout=5)
+                ((_signature, state),) = unwrap_msg(reply)
+                states[service] = state
+    except Exception:
+        return None
+    return states
+
+
+def _systemctl_cli_states(services: tuple[str, ...]) -> dict[str, str]:
+    """Read unit states with a single ``systemctl is-active`` call.
+
+    ``is-active`` accepts multiple units and prints one state per line in
+    argument order.
+
+    Returns:
+        Dict mapping each service to its state ("unknown" if unavailable).
+    """
+    states = dict.fromkeys(services, "unknown")
+    result = run(["systemctl", "is-active", *services], timeout=10)
+    states.update(zip(services, result.stdout.split(), strict=False))
+    return states
+
 
+def _systemctl_active_states(services: tuple[str, ...]) -> dict[str, bool]:
+    """Check whether systemd services are live.
 
-def _write_systemd_dropin(service: str) -> bool:
-    """Create a systemd restart drop-in for the given service.
+    Prefers D-Bus and falls back to one batched systemctl call. Units that
+    are still starting ("activating") count as live.
 
-    Creates /etc/systemd/system/{service}.service.d/10-restart.conf.
-    Uses subprocess + sudo tee since Write tool cannot access /etc.
+    Returns:
+        Dict mapping each service to whether it is active.
     """
-    dropin_dir = f"/etc/systemd/system/{service}.service.d"
-    dropin_path = f"{dropin_dir}/10-restart.conf"
-    dropin_content = "[Service]\nRestart=on-failure\nRestartSec=5\n"
+    states = _unit_states(services)
+    return {service: states.get(service) in LIVE_UNIT_STATES for service in services}
 
-    # Check if already exists
-    if Path(dropin_path).exists():
-        return True
 
-    # Create directory
-    result = run_sudo(["mkdir", "-p", dropin_dir])
-    if not result.success:
-        return False
+def _unit_states(services: tuple[str, ...]) -> dict[str, str]:
+    """Get raw ActiveState per service, via D-Bus or one systemctl call."""
+    states = _dbus_active_states(services)
+    if states is None:
+        states = _systemctl_cli_states(services)
+    return states
 
-    # Write file via sudo tee
-    try:
-        proc = subprocess.run(
-            ["sudo", "tee", dropin_path],
-            input=dropin_content,
-            text=True,
-            capture_output=True,
-            timeout=10,
-        )
-        return proc.returncode == 0
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        return False
+
+def _wait_services_active(
+    services: tuple[str, ...], timeout: float = SERVICE_WAIT_TIMEOUT
+) -> dict[str, str]:
+    """Poll until every service is fully active, backing off exponentially.
+
+    Units still "activating" are treated as in progress. Polling starts at
+    50 ms and doubles up to a 2 s cap, so fast starts return almost
+    immediately while slow ones are not hammered.
+
+    Returns:
+        Last observed state per service.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while True:
+        states = _unit_states(services)
+        remaining = deadline - time.monotonic()
+        if all(states.get(s) == "active" for s in services) or remaining <= 0:
+            return states
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 2.0)
+
+
+def _service_setup_script(
+    services: tuple[str, ...],
+    share_block: str | None = None,
+    smb_user: str | None = None,
+) -> str:
+    """Build one root script that runs setup-server's privileged steps in order.
+
+    The steps keep the order of the separate sudo calls they replace:
+
+    1. Append ``share_block`` to /etc/samba/smb.conf, when given.
+    2. Set ``smb_user``'s Samba password, when given. smbpasswd reads the
+       password twice from the script's stdin.
+    3. Allow Samba through UFW if UFW is installed and active.
+    4. Write /etc/systemd/system/{service}.service.d/10-restart.conf for each
+       service (unless present), reload systemd and run ``enable --now``.
+
+    A failed share or password step stops the script, so nothing later is
+    applied. Each step prints a ``<step> <target> ok|failed|skipped`` line
+    (see SERVICE_STEP_PATTERN) so the caller can report per-step results
+    from a single sudo call.
+    """
+    units = " ".join(shlex.quote(s) for s in services)
+    steps = []
+    if share_block is not None:
+        steps.append(f"""if printf '%s' {shlex.quote(share_block)} >> /etc/samba/smb.conf; then
+    echo "share smb.conf ok"
+else
+    echo "share smb.conf failed"
+    exit 1
+fi
+""")
+    if smb_user is not None:
+        steps.append(f"""if smbpasswd -a -s {shlex.quote(smb_user)} >&2; then
+    echo "password smbpasswd ok"
+else
+    echo "password smbpasswd failed"
+    exit 1
+fi
+""")
+    steps.append(f"""if ! command -v ufw >/dev/null 2>&1; then
+    echo "ufw missing skipped"
+elif ufw status | grep -q '^Status: active'; then
+    if ufw allow samba >&2; then echo "ufw samba ok"; else echo "ufw samba failed"; fi
+else
+    echo "ufw inactive skipped"
+fi
+dropin={shlex.quote(SYSTEMD_RESTART_DROPIN)}
+for svc in {units}; do
+    p="/etc/systemd/system/$svc.service.d/10-restart.conf"
+    if [ -e "$p" ] || printf '%s' "$dropin" | install -D -m 0644 /dev/stdin "$p"; then
+        echo "dropin $svc ok"
+    else
+        echo "dropin $svc failed"
+    fi
+done
+systemctl daemon-reload
+for svc in {units}; do
+    if systemctl enable --now "$svc" </dev/null; then
+        echo "enable $svc ok"
+    else
+        echo "enable $svc failed"
+    fi
+done
+""")
+    return "".join(steps)
 
 
 # ---------------------------------------------------------------------------
@@ -157,8 +379,9 @@ def setup_server(
         raise typer.Exit(1)
 
     # --- 2. Check Tailscale ---
-    if command_exists("tailscale"):
-        if _is_tailscale_connected():
+    ctx = probe_context()
+    if ctx.tailscale_installed:
+        if ctx.tailscale_connected:
             ok("Tailscale connected")
         else:
             warn("Tailscale not connected - SMB will work on LAN but mesh IPs won't resolve")
@@ -166,6 +389,10 @@ def setup_server(
         warn("Tailscale not installed - SMB will only be available on LAN")
 
     # --- Resolve defaults ---
+    import getpass
+
+    from mesh.core.config import get_shared_folder
+
     share_path = Path(path) if path else get_shared_folder()
     smb_user = user or getpass.getuser()
 
@@ -174,14 +401,7 @@ def setup_server(
         ok("Samba already installed")
     else:
         info("Installing Samba...")
-        run_sudo(
-            ["apt-get", "update"],
-            env={"DEBIAN_FRONTEND": "noninteractive"},
-        )
-        result = run_sudo(
-            ["apt-get", "install", "-y", "samba"],
-            env={"DEBIAN_FRONTEND": "noninteractive"},
-        )
+        result = run_sudo(["bash", "-c", _samba_install_script()])
         if result.success:
             ok("Samba installed")
         else:
@@ -193,22 +413,29 @@ def setup_server(
         ok(f"Share directory exists: {share_path}")
     else:
         info(f"Creating share directory: {share_path}")
-        result = run_sudo(["mkdir", "-p", str(share_path)])
+        # Create, hand to the SMB user and set setgid in one sudo call
+        quoted_path = shlex.quote(str(share_path))
+        owner = shlex.quote(f"{smb_user}:{smb_user}")
+        result = run_sudo(
+            [
+                "sh",
+                "-c",
+                f"mkdir -p {quoted_path} && chown {owner} {quoted_path} "
+                f"&& chmod 2775 {quoted_path}",
+            ]
+        )
         if result.success:
-            # Set ownership to the SMB user
-            run_sudo(["chown", f"{smb_user}:{smb_user}", str(share_path)])
-            run_sudo(["chmod", "2775", str(share_path)])
             ok(f"Created {share_path}")
         else:
             error(f"Failed to create directory: {result.stderr}")
             raise typer.Exit(1)
 
-    # --- 5. Configure share in smb.conf ---
+    # --- 5. Prepare share config ---
+    share_block = None
     if _share_exists_in_testparm(share):
         ok(f"Share [{share}] already configured")
     else:
-        info(f"Adding [{share}] to /etc/samba/smb.conf...")
-        share_config = (
+        share_block = (
             f"\n[{share}]\n"
             f"   path = {share_path}\n"
             f"   browseable = yes\n"
@@ -218,85 +445,64 @@ def setup_server(
             f"   create mask = 0664\n"
             f"   directory mask = 2775\n"
         )
-        try:
-            proc = subprocess.run(
-                ["sudo", "tee", "-a", "/etc/samba/smb.conf"],
-                input=share_config,
-                text=True,
-                capture_output=True,
-                timeout=10,
-            )
-            if proc.returncode == 0:
-                ok(f"Share [{share}] added to smb.conf")
-            else:
-                error(f"Failed to update smb.conf: {proc.stderr}")
-                raise typer.Exit(1)
-        except subprocess.TimeoutExpired:
-            error("Timed out writing to smb.conf")
-            raise typer.Exit(1) from None
 
-    # --- 6. Set SMB password ---
+    # --- 5-9. Append share, set SMB password, open UFW, create drop-ins,
+    # enable and start services: one sudo call, steps in that order ---
+    if share_block is not None:
+        info(f"Adding [{share}] to /etc/samba/smb.conf...")
     info(f"Setting SMB password for user '{smb_user}'...")
-    if _set_smb_password(smb_user, password):
+    script = _service_setup_script(SMB_SERVICES, share_block, smb_user)
+    result = run_sudo(["sh", "-c", script], input=f"{password}\n{password}\n", timeout=120)
+    matches = SERVICE_STEP_PATTERN.findall(result.stdout)
+    steps = {(step, target): status for step, target, status in matches}
+    if share_block is not None:
+        _testparm_output.cache_clear()
+        if steps.get(("share", "smb.conf")) == "ok":
+            ok(f"Share [{share}] added to smb.conf")
+        else:
+            error(f"Failed to update smb.conf: {result.stderr.strip()}")
+            raise typer.Exit(1)
+    if steps.get(("password", "smbpasswd")) == "ok":
         ok(f"SMB password set for '{smb_user}'")
     else:
         error(f"Failed to set SMB password for '{smb_user}'")
         raise typer.Exit(1)
 
-    # --- 7. Check UFW ---
-    if command_exists("ufw"):
-        try:
-            result = subprocess.run(
-                ["ufw", "status"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            if "active" in result.stdout.lower() and "inactive" not in result.stdout.lower():
-                info("UFW active - adding Samba rule...")
-                fw_result = run_sudo(["ufw", "allow", "samba"])
-                if fw_result.success:
-                    ok("Samba allowed through UFW")
-                else:
-                    warn(f"Failed to add UFW rule: {fw_result.stderr}")
-            else:
-                info("UFW inactive - no firewall rule needed")
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            info("Could not check UFW status")
-    else:
+    ufw = next(((target, status) for step, target, status in matches if step == "ufw"), None)
+    if ufw == ("samba", "ok"):
+        ok("Samba allowed through UFW")
+    elif ufw == ("samba", "failed"):
+        warn(f"Failed to add UFW rule: {result.stderr.strip()}")
+    elif ufw == ("inactive", "skipped"):
+        info("UFW inactive - no firewall rule needed")
+    elif ufw == ("missing", "skipped"):
         info("UFW not installed - skipping firewall configuration")
+    else:
+        info("Could not check UFW status")
 
-    # --- 8. Create systemd drop-ins ---
-    for service in ("smbd", "nmbd"):
-        if _write_systemd_dropin(service):
+    for service in SMB_SERVICES:
+        if steps.get(("dropin", service)) == "ok":
             ok(f"Systemd restart drop-in for {service}")
         else:
             warn(f"Failed to create systemd drop-in for {service}")
-
-    # --- 9. Enable and start services ---
-    run_sudo(["systemctl", "daemon-reload"])
-    for service in ("smbd", "nmbd"):
-        result = run_sudo(["systemctl", "enable", "--now", service])
-        if result.success:
+    for service in SMB_SERVICES:
+        if steps.get(("enable", service)) == "ok":
             ok(f"{service} enabled and started")
         else:
-            warn(f"Failed to enable {service}: {result.stderr}")
+            warn(f"Failed to enable {service}: {result.stderr.strip()}")
 
     # --- 10. Verify ---
     info("Verifying configuration...")
-    try:
-        result = subprocess.run(
-            ["testparm", "-s"],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        if result.returncode == 0 and f"[{share}]" in result.stdout:
-            ok("Configuration verified via testparm")
-        else:
-            warn("testparm did not confirm share - check /etc/samba/smb.conf manually")
-    except (subprocess.TimeoutExpired, FileNotFoundError):
+    for service, state in _wait_services_active(SMB_SERVICES).items():
+        if state != "active":
+            warn(f"{service} is {state} - check with: systemctl status {service}")
+    result = _testparm_output()
+    if result.returncode == -1:
         warn("Could not run testparm to verify")
+    elif result.success and share in _testparm_sections(result.stdout):
+        ok("Configuration verified via testparm")
+    else:
+        warn("testparm did not confirm share - check /etc/samba/smb.conf manually")
 
     section("SMB Server Setup Complete")
     info(f"Share: \\\\<this-host>\\{share}")
@@ -326,19 +532,20 @@ def add_user(
 
     # Verify user appears in pdbedit
     info("Verifying user in Samba database...")
-    try:
-        result = subprocess.run(
-            ["sudo", "pdbedit", "-L"],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        if result.returncode == 0 and user in result.stdout:
-            ok(f"User '{user}' confirmed in Samba database")
-        else:
-            warn(f"Could not confirm '{user}' in pdbedit output")
-    except (subprocess.TimeoutExpired, FileNotFoundError):
+    result = run_sudo(["pdbedit", "-L"], timeout=10)
+    if result.returncode == -1:
         warn("Could not run pdbedit to verify")
+    elif result.success and user in result.stdout:
+        ok(f"User '{user}' confirmed in Samba database")
+    else:
+        warn(f"Could not confirm '{user}' in pdbedit output")
+
+
+def _map_drive_script(server: str, share: str, drive: str, user: str) -> str:
+    """Render the Windows drive-mapping PowerShell script (CRLF line endings)."""
+    return MAP_DRIVE_SCRIPT.format_map(
+        {"server": server, "share": share, "drive": drive, "user": user}
+    ).replace("\n", "\r\n")
 
 
 @app.command()
@@ -357,150 +564,87 @@ def setup_client(
     """
     section("SMB Client Setup")
 
-    # --- 1. Test SSH connectivity ---
-    info(f"Testing SSH connectivity to {host}:{port}...")
-    success, output = ssh_to_host(host, "echo connected", port=port)
-    if not success:
-        error(f"Cannot SSH to {host}:{port}: {output}")
-        raise typer.Exit(1)
-    ok(f"Connected to {host}")
-
-    # --- 2. Test SMB port on server ---
-    info(f"Testing SMB connectivity from {host} to {server}:445...")
-    smb_test_cmd = (
-        f'powershell -Command "'
-        f"(Test-NetConnection {server} -Port 445 -WarningAction SilentlyContinue)"
-        f'.TcpTestSucceeded"'
-    )
-    success, output = ssh_to_host(host, smb_test_cmd, port=port)
-    if success and "True" in output:
-        ok(f"SMB port 445 reachable on {server}")
-    else:
-        warn(f"SMB port 445 may not be reachable on {server} from {host}")
-        info("Continuing anyway - the generated script will retry at runtime")
-
-    # --- 3. Ensure C:\temp exists ---
-    info("Ensuring C:\\temp exists on Windows...")
-    mkdir_cmd = (
-        'powershell -Command "New-Item -Path C:\\temp -ItemType Directory -Force | Out-Null"'
-    )
-    success, output = ssh_to_host(host, mkdir_cmd, port=port)
-    if success:
-        ok("C:\\temp ready")
-    else:
-        warn(f"Could not create C:\\temp: {output}")
+    from mesh.utils.ssh import multiplexed_ssh, ssh_to_host
 
-    # --- 4. Generate PS1 script ---
     script_path = "C:\\temp\\map-smb-drive.ps1"
     smb_path = f"\\\\{server}\\{share}"
-    startup_folder = "$env:APPDATA\\Microsoft\\Windows\\Start Menu\\Programs\\Startup"
-
-    lines = [
-        "# map-smb-drive.ps1 - Generated by mesh smb setup-client",
-        f"# Server: {server}",
-        f"# Share: {share}",
-        f"# Drive: {drive}",
-        f"# User: {user}",
-        "",
-        "$ErrorActionPreference = 'Continue'",
-        "",
-        "Write-Host '=== SMB Drive Mapping ===' -ForegroundColor Cyan",
-        "",
-        "# Step 1: Get credentials",
-        f"Write-Host 'Enter SMB password for {user}' -ForegroundColor Yellow",
-        f"$Cred = Get-Credential -UserName '{user}' -Message 'Enter SMB password'",
-        "if (-not $Cred) {",
-        "    Write-Host 'Cancelled.' -ForegroundColor Red",
-        "    Read-Host 'Press Enter to exit'",
-        "    exit 1",
-        "}",
-        "$Password = $Cred.GetNetworkCredential().Password",
-        "",
-        "# Step 2: Remove existing mapping",
-        f"Write-Host 'Removing existing {drive} mapping...' -ForegroundColor Yellow",
-        f"net use {drive} /delete /y 2>$null",
-        "",
-        "# Step 3: Map drive",
-        f"Write-Host 'Mapping {drive} to {smb_path}...' -ForegroundColor Yellow",
-        f"$mapResult = net use {drive} {smb_path} /user:{user} $Password /persistent:yes 2>&1",
-        "if ($LASTEXITCODE -eq 0) {",
-        f"    Write-Host 'SUCCESS: {drive} mapped to {smb_path}' -ForegroundColor Green",
-        "} else {",
-        f"    Write-Host 'FAILED to map {drive}' -ForegroundColor Red",
-        "    Write-Host $mapResult -ForegroundColor Red",
-        "    Read-Host 'Press Enter to exit'",
-        "    exit 1",
-        "}",
-        "",
-        "# Step 4: Enable linked connections (for elevated processes)",
-        "Write-Host 'Setting EnableLinkedConnections...' -ForegroundColor Yellow",
-        "$regPath = 'HKLM:\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Policies\\System'",
-        "try {",
-        "    Set-ItemProperty -Path $regPath -Name 'EnableLinkedConnections' -Value 1 -Type DWord",
-        "    Write-Host 'EnableLinkedConnections set' -ForegroundColor Green",
-        "} catch {",
-        "    Write-Host 'WARNING: Could not set EnableLinkedConnections (run as admin)'"
-        " -ForegroundColor Yellow",
-        "}",
-        "",
-        "# Step 5: Create reconnect script in Startup folder",
-        "Write-Host 'Creating startup reconnect script...' -ForegroundColor Yellow",
-        f'$startupPath = "{startup_folder}"',
-        "$cmdPath = Join-Path $startupPath 'reconnect-smb.cmd'",
-        '$cmdContent = @"',
-        "@echo off",
-        f"net use {drive} {smb_path} /user:{user} /persistent:yes",
-        '"@',
-        "try {",
-        "    $cmdContent | Set-Content -Path $cmdPath -Force",
-        '    Write-Host "Startup script created: $cmdPath" -ForegroundColor Green',
-        "} catch {",
-        '    Write-Host "WARNING: Could not create startup script: $_" -ForegroundColor Yellow',
-        "}",
-        "",
-        "Write-Host ''",
-        f"Write-Host '{drive} is now mapped to {smb_path}' -ForegroundColor Cyan",
-        "Write-Host 'Note: Log off and back on for EnableLinkedConnections to take effect'"
-        " -ForegroundColor Yellow",
-        "Write-Host ''",
-        "Read-Host 'Press Enter to exit'",
-    ]
-
-    # --- 5. Write script via SSH + stdin pipe ---
-    info("Writing PowerShell script to Windows...")
-    script_content = "\n".join(lines)
-    ps_write_cmd = f"powershell -Command \"$input | Set-Content -Path '{script_path}'\""
-
-    try:
-        result = subprocess.run(
-            [
-                "ssh",
-                "-o",
-                "BatchMode=yes",
-                "-o",
-                "ConnectTimeout=30",
-                "-o",
-                "StrictHostKeyChecking=accept-new",
-                "-p",
-                str(port),
-                host,
-                ps_write_cmd,
-            ],
-            input=script_content,
-            capture_output=True,
-            text=True,
-            timeout=30,
+    script = _map_drive_script(server, share, drive, user)
+
+    # All SSH round trips below share one multiplexed connection
+    with multiplexed_ssh(host, port) as mux:
+        # --- 1. Test SSH connectivity ---
+        info(f"Testing SSH connectivity to {host}:{port}...")
+        success, output = ssh_to_host(host, "echo connected", port=port, extra_opts=mux)
+        if not success:
+            error(f"Cannot SSH to {host}:{port}: {output}")
+            raise typer.Exit(1)
+        ok(f"Connected to {host}")
+
+        # --- 2. Test SMB port on server and ensure C:\temp exists (one round trip) ---
+        info(f"Testing SMB connectivity from {host} to {server}:445...")
+        info("Ensuring C:\\temp exists on Windows...")
+        prepare_cmd = (
+            'powershell -Command "'
+            "try { New-Item -Path C:\\temp -ItemType Directory -Force -ErrorAction Stop | Out-Null;"
+            " 'TEMP=ok' } catch { 'TEMP=' + $_ };"
+            f" 'SMB445=' + (Test-NetConnection {server} -Port 445 -WarningAction SilentlyContinue)"
+            '.TcpTestSucceeded"'
         )
-        if result.returncode == 0:
-            ok(f"Script written to {script_path}")
+        _, output = ssh_to_host(host, prepare_cmd, port=port, extra_opts=mux)
+        markers = dict(line.strip().split("=", 1) for line in output.splitlines() if "=" in line)
+        if markers.get("SMB445") == "True":
+            ok(f"SMB port 445 reachable on {server}")
         else:
-            error(f"Failed to write script: {result.stdout + result.stderr}")
-            raise typer.Exit(1)
-    except subprocess.TimeoutExpired:
-        error("Timed out writing script to Windows")
-        raise typer.Exit(1) from None
+            warn(f"SMB port 445 may not be reachable on {server} from {host}")
+            info("Continuing anyway - the generated script will retry at runtime")
+        if markers.get("TEMP") == "ok":
+            ok("C:\\temp ready")
+        else:
+            warn(f"Could not create C:\\temp: {markers.get('TEMP', output.strip())}")
+
+        # --- 3. Write script via SSH + stdin pipe ---
+        info("Writing PowerShell script to Windows...")
+        # Encoded once; PowerShell reads stdin in a single call instead of
+        # materialising $input as an array of lines
+        script_bytes = script.encode()
+        ps_write_cmd = (
+            'powershell -NoProfile -Command "'
+            "[Console]::InputEncoding = [Text.Encoding]::UTF8;"
+            f" [IO.File]::WriteAllText('{script_path}', [Console]::In.ReadToEnd(),"
+            ' [Text.Encoding]::UTF8)"'
+        )
 
-    # --- 6. Print instructions ---
+        try:
+            result = subprocess.run(
+                [
+                    "ssh",
+                    "-o",
+                    "BatchMode=yes",
+                    "-o",
+                    "ConnectTimeout=30",
+                    "-o",
+                    "StrictHostKeyChecking=accept-new",
+                    *mux,
+                    "-p",
+                    str(port),
+                    host,
+                    ps_write_cmd,
+                ],
+                input=script_bytes,
+                capture_output=True,
+                timeout=30,
+            )
+            if result.returncode == 0:
+                ok(f"Script written to {script_path}")
+            else:
+                output = (result.stdout + result.stderr).decode(errors="replace")
+                error(f"Failed to write script: {output}")
+                raise typer.Exit(1)
+        except subprocess.TimeoutExpired:
+            error("Timed out writing script to Windows")
+            raise typer.Exit(1) from None
+
+    # --- 4. Print instructions ---
     section("SMB Client Setup Complete")
     info("Run the following on the Windows desktop (as Administrator):")
     info(f"  powershell -ExecutionPolicy Bypass -File {script_path}")
@@ -512,7 +656,54 @@ def setup_client(
     info("  4. Create a startup script for automatic reconnection")
 
 
+def _probe_testparm_shares() -> tuple[list[str] | None, str]:
+    """List user shares from testparm.
+
+    Returns:
+        Tuple of (shares, error). shares is None if testparm could not be read.
+    """
+    result = _testparm_output()
+    if result.returncode == -1:
+        return None, "Could not run testparm"
+    if not result.success:
+        return None, f"testparm failed: {result.stderr.strip()}"
+    shares = [name for name in _testparm_sections(result.stdout) if name not in BUILTIN_SECTIONS]
+    return shares, ""
+
+
+def _tcp_port_listening(port: int) -> bool | None:
+    """Check the kernel socket tables for a TCP listener on ``port``.
+
+    Reads /proc/net/tcp{,6} in-process instead of forking ``ss``, and unlike
+    a connect() probe it does not make smbd accept (and fork for) a session.
+
+    Returns:
+        True if listening, False if not, None if the tables are unreadable.
+    """
+    local_port = f":{port:04X}"
+    readable = False
+    for table in PROC_TCP_TABLES:
+        try:
+            with open(table) as f:
+                next(f, None)  # header
+                readable = True
+                for line in f:
+                    fields = line.split()
+                    # local_address is hex ip:port; st 0A is TCP_LISTEN
+                    if fields[1].endswith(local_port) and fields[3] == "0A":
+                        return True
+        except OSError:
+            continue
+    return False if readable else None
+
+
+def _probe_port445() -> bool | None:
+    """Check whether anything listens on TCP 445 (None if unknown)."""
+    return _tcp_port_listening(445)
+
+
 @app.command()
+@command_budget()
 def status() -> None:
     """Check SMB/Samba status on this host."""
     section("SMB Status")
@@ -534,10 +725,21 @@ def status() -> None:
         info("Install with: mesh smb setup-server")
         return
 
+    # Remaining probes are independent: run them together, print in order after
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        active_future = pool.submit(_systemctl_active_states, SMB_SERVICES)
+        shares_future = pool.submit(_probe_testparm_shares)
+        port_future = pool.submit(_probe_port445)
+        ctx_future = pool.submit(probe_context)
+        active = active_future.result()
+        shares, shares_error = shares_future.result()
+        listening = port_future.result()
+        ctx = ctx_future.result()
+
     # Check service status
     info("Checking services...")
-    for service in ("smbd", "nmbd"):
-        if _systemctl_is_active(service):
+    for service in SMB_SERVICES:
+        if active[service]:
             ok(f"{service} is active")
         else:
             warn(f"{service} is not active")
@@ -545,50 +747,26 @@ def status() -> None:
 
     # List shares via testparm
     info("Checking shares...")
-    try:
-        result = subprocess.run(
-            ["testparm", "-s"],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        if result.returncode == 0:
-            shares = []
-            for line in result.stdout.splitlines():
-                stripped = line.strip()
-                if stripped.startswith("[") and stripped.endswith("]"):
-                    name = stripped[1:-1]
-                    if name not in ("global", "printers", "print$"):
-                        shares.append(name)
-            if shares:
-                ok(f"Shares: {', '.join(shares)}")
-            else:
-                warn("No user shares configured")
-                info("Add a share with: mesh smb setup-server")
-        else:
-            warn(f"testparm failed: {result.stderr.strip()}")
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        warn("Could not run testparm")
+    if shares is None:
+        warn(shares_error)
+    elif shares:
+        ok(f"Shares: {', '.join(shares)}")
+    else:
+        warn("No user shares configured")
+        info("Add a share with: mesh smb setup-server")
 
     # Check port 445
     info("Checking port 445...")
-    try:
-        result = subprocess.run(
-            ["ss", "-tlnp"],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        if result.returncode == 0 and ":445 " in result.stdout:
-            ok("Port 445 is listening")
-        else:
-            warn("Port 445 is not listening")
-    except (subprocess.TimeoutExpired, FileNotFoundError):
+    if listening is None:
         warn("Could not check port 445")
+    elif listening:
+        ok("Port 445 is listening")
+    else:
+        warn("Port 445 is not listening")
 
     # Check Tailscale for mesh accessibility
-    if command_exists("tailscale"):
-        if _is_tailscale_connected():
+    if ctx.tailscale_installed:
+        if ctx.tailscale_connected:
             ok("Tailscale connected - share accessible via mesh IPs")
         else:
             warn("Tailscale not connected - share only accessible on LAN")
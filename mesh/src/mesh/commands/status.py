@@ -1,77 +1,173 @@
 """Status command for mesh network health check."""
 
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
 import typer
 
 from mesh.core import tailscale
 from mesh.core.config import get_headscale_server, get_syncthing_port
-from mesh.core.environment import detect_os_type, detect_role, get_hostname, is_server
-from mesh.core.syncthing import SyncthingClient
+from mesh.core.environment import get_hostname
+from mesh.core.privacy import (
+    DerpStatus,
+    DnsStatus,
+    HeadscaleConfigStatus,
+    LogtailStatus,
+    check_derp_map,
+    check_dns_acceptance,
+    check_headscale_config,
+    check_logtail_suppression,
+)
+from mesh.core.probes import ProbeContext, probe_context
 from mesh.utils.output import create_table, error, info, ok, print_table, section, warn
+from mesh.utils.process import command_budget
+
+
+@dataclass
+class TailscaleProbe:
+    """Collected Tailscale state."""
+
+    installed: bool
+    connected: bool = False
+    ip: str | None = None
+    peers: list[tailscale.Peer] = field(default_factory=list)
+
+
+@dataclass
+class SyncthingProbe:
+    """Collected Syncthing state."""
+
+    port: int
+    running: bool
+    device_id: str | None = None
+    connections: dict = field(default_factory=dict)
+    error: str | None = None
+
 
+@dataclass
+class TailnetPrivacyProbe:
+    """DERP and DNS checks, only collected while Tailscale is connected."""
 
+    derp: DerpStatus
+    dns: DnsStatus
+
+
+def _probe_tailscale(ctx: ProbeContext, verbose: bool) -> TailscaleProbe:
+    """Collect Tailscale install/connection state without printing."""
+    if not ctx.tailscale_installed:
+        return TailscaleProbe(installed=False)
+    if not ctx.tailscale_connected:
+        return TailscaleProbe(installed=True)
+    return TailscaleProbe(
+        installed=True,
+        connected=True,
+        ip=tailscale.get_ip(),
+        peers=tailscale.get_peers() if verbose else [],
+    )
+
+
+def _probe_syncthing(verbose: bool) -> SyncthingProbe:
+    """Collect Syncthing API state without printing."""
+    # httpx dominates this module's import time; only pay it when probing
+    from mesh.core.syncthing import SyncthingClient
+
+    port = get_syncthing_port()
+    with SyncthingClient(port) as client:
+        if not client.is_running():
+            return SyncthingProbe(port=port, running=False)
+        probe = SyncthingProbe(port=port, running=True)
+        try:
+            probe.device_id = client.get_device_id()
+            if verbose:
+                probe.connections = client.get_connections().get("connections", {})
+        except Exception as e:
+            probe.error = str(e)
+    return probe
+
+
+def _probe_tailnet_privacy(ctx: ProbeContext) -> TailnetPrivacyProbe | None:
+    """Collect DERP map and DNS acceptance, or None if Tailscale is down."""
+    if not ctx.tailscale_connected:
+        return None
+    return TailnetPrivacyProbe(derp=check_derp_map(), dns=check_dns_acceptance())
+
+
+def _probe_headscale_config(ctx: ProbeContext) -> HeadscaleConfigStatus | None:
+    """Collect Headscale config hardening (server only)."""
+    if not ctx.is_server:
+        return None
+    return check_headscale_config()
+
+
+@command_budget()
 def status(
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Show detailed diagnostics"),
 ) -> None:
     """Show mesh network status."""
-    section("Environment")
-    info(f"Hostname: {get_hostname()}")
-    info(f"OS Type: {detect_os_type().value}")
-    info(f"Role: {detect_role().value}")
+    # Probes are independent and I/O bound: run them together, print in order after
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        st_future = pool.submit(_probe_syncthing, verbose)
+        logtail_future = pool.submit(check_logtail_suppression)
+        # Shared host facts, taken once; the remaining probes branch on them
+        ctx = probe_context()
+        ts_future = pool.submit(_probe_tailscale, ctx, verbose)
+        tailnet_future = pool.submit(_probe_tailnet_privacy, ctx)
+        hs_future = pool.submit(_probe_headscale_config, ctx)
+
+        section("Environment")
+        info(f"Hostname: {get_hostname()}")
+        info(f"OS Type: {ctx.os_type.value}")
+        info(f"Role: {ctx.role.value}")
+
+        ts = ts_future.result()
+        st = st_future.result()
+        logtail: LogtailStatus = logtail_future.result()
+        tailnet = tailnet_future.result()
+        hs_config = hs_future.result()
 
     issues = 0
 
     # Tailscale status
     section("Tailscale")
-    if not tailscale.is_installed():
+    if not ts.installed:
         error("Tailscale is not installed")
         issues += 1
-    elif not tailscale.is_connected():
+    elif not ts.connected:
         warn("Tailscale is not connected")
         issues += 1
     else:
         ok("Tailscale is connected")
-        ip = tailscale.get_ip()
-        if ip:
-            info(f"IP: {ip}")
-
-        if verbose:
-            peers = tailscale.get_peers()
-            if peers:
-                table = create_table("Tailscale Peers", ["Hostname", "IP", "Status"])
-                for peer in peers:
-                    status_str = "[green]online[/green]" if peer["online"] else "[red]offline[/red]"
-                    table.add_row(peer["hostname"], peer["ip"], status_str)
-                print_table(table)
+        if ts.ip:
+            info(f"IP: {ts.ip}")
+
+        if verbose and ts.peers:
+            table = create_table("Tailscale Peers", ["Hostname", "IP", "Status"])
+            for peer in ts.peers:
+                status_str = "[green]online[/green]" if peer.online else "[red]offline[/red]"
+                table.add_row(peer.hostname, peer.ip, status_str)
+            print_table(table)
 
     # Syncthing status
     section("Syncthing")
-    port = get_syncthing_port()
-    client = SyncthingClient(port)
-
-    if not client.is_running():
-        warn(f"Syncthing is not running (port {port})")
+    if not st.running:
+        warn(f"Syncthing is not running (port {st.port})")
         issues += 1
     else:
-        ok(f"Syncthing is running on port {port}")
-        try:
-            device_id = client.get_device_id()
-            short_id = device_id[:7] + "..."
-            info(f"Device ID: {short_id}")
+        ok(f"Syncthing is running on port {st.port}")
+        if st.device_id:
+            info(f"Device ID: {st.device_id[:7]}...")
 
-            if verbose:
-                info(f"Full Device ID: {device_id}")
+            if verbose and not st.error:
+                info(f"Full Device ID: {st.device_id}")
 
                 # Show connected devices
-                connections = client.get_connections()
-                connected = connections.get("connections", {})
-                if connected:
-                    info(f"Connected peers: {len(connected)}")
-                    for peer_id, conn_info in connected.items():
+                if st.connections:
+                    info(f"Connected peers: {len(st.connections)}")
+                    for peer_id, conn_info in st.connections.items():
                         if conn_info.get("connected"):
-                            short_peer = peer_id[:7] + "..."
-                            info(f"  - {short_peer}")
-        except Exception as e:
-            warn(f"Could not get Syncthing info: {e}")
+                            info(f"  - {peer_id[:7]}...")
+        if st.error:
+            warn(f"Could not get Syncthing info: {st.error}")
             issues += 1
 
     # Server URL
@@ -84,15 +180,8 @@ def status(
 
     # Security hardening checks
     section("Security")
-    from mesh.core.privacy import (
-        check_derp_map,
-        check_dns_acceptance,
-        check_headscale_config,
-        check_logtail_suppression,
-    )
 
     # Logtail suppression (always check)
-    logtail = check_logtail_suppression()
     if logtail.suppressed:
         ok(f"Logtail suppression: deployed ({logtail.file_path})")
     elif logtail.error:
@@ -103,8 +192,8 @@ def status(
         issues += 1
 
     # DERP map (only if Tailscale is connected)
-    if tailscale.is_connected():
-        derp = check_derp_map()
+    if tailnet:
+        derp = tailnet.derp
         if derp.error:
             info(f"DERP map: {derp.error}")
         elif derp.is_private:
@@ -120,7 +209,7 @@ def status(
             issues += 1
 
         # DNS acceptance
-        dns = check_dns_acceptance()
+        dns = tailnet.dns
         if dns.error:
             info(f"DNS acceptance: {dns.error}")
         elif dns.accept_dns:
@@ -131,8 +220,7 @@ def status(
                 info("  MagicDNS may not resolve mesh hostnames")
 
     # Headscale config (server only)
-    if is_server():
-        hs_config = check_headscale_config()
+    if hs_config:
         if hs_config.error:
             info(f"Headscale config: {hs_config.error}")
         elif hs_config.is_hardened:
@@ -1,15 +1,33 @@
 """Ubuntu provisioning commands (run on target Ubuntu machine)."""
 
-import subprocess
+import functools
+import os
+import re
 from pathlib import Path
 
 import typer
 
+from mesh.core import tailscale
 from mesh.core.environment import OSType, detect_os_type
 from mesh.utils.output import error, info, ok, section, warn
-from mesh.utils.process import command_exists, run_sudo
+from mesh.utils.process import CommandResult, command_exists, run, run_sudo
 from mesh.utils.ssh import ssh_to_host
 
+SSHD_CONFIG_PATH = Path("/etc/ssh/sshd_config")
+SSHD_PID_PATH = Path("/run/sshd.pid")
+UFW_CONF_PATH = Path("/etc/ufw/ufw.conf")
+
+# sshd defaults for the settings setup-ssh manages, used when only the
+# config file can be read
+SSHD_DEFAULTS = {"port": "22", "passwordauthentication": "yes"}
+
+# sshd_config lines setup-ssh rewrites: the stock commented default port or
+# an explicit Port, and an enabled (possibly commented) PasswordAuthentication
+SSHD_PORT_LINE_PATTERN = re.compile(r"^(?:#Port 22|Port [0-9]*)$", re.MULTILINE)
+SSHD_PASSWORD_AUTH_PATTERN = re.compile(r"^#?PasswordAuthentication yes$", re.MULTILINE)
+# Start of the first Match block; global keywords such as Port must come before it
+SSHD_MATCH_LINE_PATTERN = re.compile(r"^[ \t]*Match[ \t]", re.MULTILINE | re.IGNORECASE)
+
 app = typer.Typer(
     name="ubuntu",
     help="Ubuntu provisioning commands",
@@ -23,34 +41,152 @@ def is_sshd_installed() -> bool:
 
 
 def is_sshd_running() -> bool:
-    """Check if sshd is running."""
+    """Check if sshd is running.
+
+    Probes the PID in /run/sshd.pid first and only asks systemd when there
+    is no live pidfile (e.g. socket-activated ssh on newer releases).
+    """
     try:
-        result = subprocess.run(
-            ["systemctl", "is-active", "ssh"],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        return result.stdout.strip() == "active"
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        return False
+        os.kill(int(SSHD_PID_PATH.read_text().strip()), 0)
+        return True
+    except PermissionError:
+        return True  # Process exists but belongs to root
+    except (OSError, ValueError):
+        pass
+    result = run(["systemctl", "is-active", "--quiet", "ssh"], timeout=10)
+    return result.success
+
+
+def is_ufw_enabled() -> bool | None:
+    """Check UFW's configured state without root.
+
+    ``ufw status`` needs root; ufw.conf is world-readable and records
+    whether the firewall is enabled at boot.
+
+    Returns:
+        True/False from ENABLED= in ufw.conf, or None if it can't be read.
+    """
+    try:
+        content = UFW_CONF_PATH.read_text()
+    except OSError:
+        return None
+    for line in content.splitlines():
+        key, _, value = line.partition("=")
+        if key.strip() == "ENABLED":
+            return value.strip().strip("\"'").lower() == "yes"
+    return None
 
 
 def get_sshd_port() -> int | None:
     """Get the configured SSH port."""
-    config_path = Path("/etc/ssh/sshd_config")
-    if not config_path.exists():
+    settings = get_sshd_settings()
+    if settings is None:
+        return None
+    try:
+        return int(settings["port"])
+    except ValueError:
+        return None
+
+
+def get_sshd_settings() -> dict[str, str] | None:
+    """Get the effective sshd settings, keyed by lower-case keyword.
+
+    Asks ``sshd -T`` for the effective configuration, which follows Include
+    directives and sshd_config.d drop-ins, and falls back to scanning
+    sshd_config when that fails. The answer is cached until sshd_config's
+    mtime or size changes.
+
+    Returns:
+        Settings dict, or None if sshd_config is missing or unreadable.
+    """
+    try:
+        st = SSHD_CONFIG_PATH.stat()
+    except OSError:
         return None
+    settings = _read_sshd_settings(st.st_mtime_ns, st.st_size)
+    # Copy so callers can mutate the result without corrupting the cache
+    return None if settings is None else dict(settings)
+
+
+@functools.lru_cache(maxsize=1)
+def _read_sshd_settings(mtime_ns: int, size: int) -> dict[str, str] | None:
+    """Resolve sshd settings (cache key: sshd_config mtime and size)."""
+    # sshd -T needs the host keys, so it must run as root; never prompt for it
+    cmd = ["sshd", "-T"] if os.geteuid() == 0 else ["sudo", "-n", "sshd", "-T"]
+    result = run(cmd, timeout=10)
+    if result.success:
+        settings = _parse_sshd_settings(result.stdout)
+        if "port" in settings:
+            return settings
 
     try:
-        content = config_path.read_text()
-        for line in content.splitlines():
-            line = line.strip()
-            if line.startswith("Port "):
-                return int(line.split()[1])
-        return 22  # Default port if not specified
-    except (ValueError, IndexError, PermissionError):
+        content = SSHD_CONFIG_PATH.read_text()
+    except OSError:
         return None
+    return {**SSHD_DEFAULTS, **_parse_sshd_settings(content)}
+
+
+def _parse_sshd_settings(text: str) -> dict[str, str]:
+    """Parse sshd_config or ``sshd -T`` output; the first value of a keyword wins."""
+    settings: dict[str, str] = {}
+    for line in text.splitlines():
+        parts = line.split(None, 1)
+        if len(parts) == 2 and not parts[0].startswith("#"):
+            settings.setdefault(parts[0].lower(), parts[1].strip())
+    return settings
+
+
+def rewrite_sshd_config(
+    content: str, port: int | None = None, disable_password_auth: bool = False
+) -> str:
+    """Apply setup-ssh's edits to sshd_config text.
+
+    Args:
+        content: Current sshd_config content
+        port: New port for the Port line, or None to leave it alone
+        disable_password_auth: Turn ``PasswordAuthentication yes`` into ``no``
+
+    Returns:
+        The edited content. If no Port line could be rewritten, one is added
+        before the first Match block (sshd rejects Port inside one), or at
+        the end when there is none.
+    """
+    if port is not None:
+        content, count = SSHD_PORT_LINE_PATTERN.subn(f"Port {port}", content)
+        if not count:
+            match = SSHD_MATCH_LINE_PATTERN.search(content)
+            if match:
+                content = f"{content[: match.start()]}Port {port}\n{content[match.start() :]}"
+            else:
+                separator = "" if not content or content.endswith("\n") else "\n"
+                content = f"{content}{separator}Port {port}\n"
+    if disable_password_auth:
+        content = SSHD_PASSWORD_AUTH_PATTERN.sub("PasswordAuthentication no", content)
+    return content
+
+
+def _write_sshd_config(content: str) -> CommandResult:
+    """Replace sshd_config as root with one sudo call.
+
+    The new file is written next to the old one, checked with ``sshd -t``
+    and only then renamed over it, so sshd never sees a half-written or
+    invalid config. A rejected config prints ``STATUS_SSHD=invalid``.
+    """
+    path = str(SSHD_CONFIG_PATH)
+    tmp = f"{path}.mesh-tmp"
+    script = "\n".join(
+        [
+            f"cat > {tmp} || exit 1",
+            # Never restart a running daemon into a config it would reject
+            f"if ! /usr/sbin/sshd -t -f {tmp}; then",
+            f"    rm -f {tmp}",
+            "    echo STATUS_SSHD=invalid",
+            "    exit 1",
+            "fi",
+            f"mv {tmp} {path}",
+        ]
+    )
+    return run_sudo(["sh", "-c", script], input=content)
 
 
 def get_authorized_keys_path() -> Path:
@@ -92,13 +228,15 @@ def setup_ssh(
         ok("openssh-server already installed")
     else:
         info("Installing openssh-server...")
+        # One sudo for both steps; as before, a failed update doesn't stop the install
         result = run_sudo(
-            ["apt-get", "update"],
-            env={"DEBIAN_FRONTEND": "noninteractive"},
-        )
-        result = run_sudo(
-            ["apt-get", "install", "-y", "openssh-server"],
-            env={"DEBIAN_FRONTEND": "noninteractive"},
+            [
+                "sh",
+                "-c",
+                "export DEBIAN_FRONTEND=noninteractive\n"
+                "apt-get update -qq\n"
+                "apt-get install -y openssh-server\n",
+            ]
         )
         if result.success:
             ok("openssh-server installed")
@@ -106,61 +244,76 @@ def setup_ssh(
             error(f"Failed to install openssh-server: {result.stderr}")
             raise typer.Exit(1)
 
-    # Configure SSH port
-    current_port = get_sshd_port()
-    if current_port == port:
+    # Compare against the live config so an already-correct host is left alone
+    settings = get_sshd_settings() or {}
+    port_ok = settings.get("port") == str(port)
+    password_ok = password_auth or settings.get("passwordauthentication") == "no"
+
+    if port_ok:
         ok(f"SSH already configured for port {port}")
     else:
         info(f"Configuring SSH on port {port}...")
-        # Update port in sshd_config
-        run_sudo(["sed", "-i", f"s/^#Port 22$/Port {port}/", "/etc/ssh/sshd_config"])
-        run_sudo(["sed", "-i", f"s/^Port [0-9]*$/Port {port}/", "/etc/ssh/sshd_config"])
-        ok(f"SSH configured for port {port}")
-
-    # Configure password authentication
-    if not password_auth:
+    if password_auth:
+        info("Keeping password authentication enabled")
+    elif password_ok:
+        ok("Password authentication already disabled")
+    else:
         info("Disabling password authentication...")
-        run_sudo(
-            [
-                "sed",
-                "-i",
-                "s/^#PasswordAuthentication yes$/PasswordAuthentication no/",
-                "/etc/ssh/sshd_config",
-            ]
-        )
-        run_sudo(
-            [
-                "sed",
-                "-i",
-                "s/^PasswordAuthentication yes$/PasswordAuthentication no/",
-                "/etc/ssh/sshd_config",
-            ]
+
+    # Edit the config in-process and write it back with a single sudo call
+    config_changed = False
+    if not (port_ok and password_ok):
+        try:
+            current = SSHD_CONFIG_PATH.read_text()
+        except OSError as e:
+            error(f"Failed to read sshd_config: {e}")
+            raise typer.Exit(1) from None
+        updated = rewrite_sshd_config(
+            current,
+            port=None if port_ok else port,
+            disable_password_auth=not password_ok,
         )
-        ok("Password authentication disabled")
-    else:
-        info("Keeping password authentication enabled")
+        config_changed = updated != current
+        if config_changed:
+            result = _write_sshd_config(updated)
+            if "STATUS_SSHD=invalid" in result.stdout:
+                error(f"sshd rejected the new config, sshd_config left unchanged: {result.stderr}")
+                raise typer.Exit(1)
+            if not result.success:
+                error(f"Failed to update sshd_config: {result.stderr}")
+                raise typer.Exit(1)
+        if not port_ok:
+            ok(f"SSH configured for port {port}")
+        if not password_ok:
+            ok("Password authentication disabled")
 
     # Ensure .ssh directory exists
-    ssh_dir = Path.home() / ".ssh"
-    if not ssh_dir.exists():
-        ssh_dir.mkdir(mode=0o700)
+    try:
+        (Path.home() / ".ssh").mkdir(mode=0o700)
         ok("Created ~/.ssh directory")
+    except FileExistsError:
+        pass
 
-    # Restart sshd to apply changes
-    info("Restarting SSH service...")
-    result = run_sudo(["systemctl", "restart", "ssh"])
-    if result.success:
-        ok("SSH service restarted")
+    if not config_changed and is_sshd_running():
+        # Nothing changed - restarting would only drop existing sessions
+        ok("SSH service already running with this configuration")
     else:
-        # Try sshd service name (some distros use this)
-        result = run_sudo(["systemctl", "restart", "sshd"])
+        # Restart sshd to apply changes (also starts it if stopped)
+        info("Restarting SSH service...")
+        result = run_sudo(["systemctl", "restart", "ssh"])
         if result.success:
             ok("SSH service restarted")
         else:
-            warn("Could not restart SSH service")
+            # Try sshd service name (some distros use this)
+            result = run_sudo(["systemctl", "restart", "sshd"])
+            if result.success:
+                ok("SSH service restarted")
+            else:
+                warn("Could not restart SSH service")
 
     # Enable SSH service
-    run_sudo(["systemctl", "enable", "ssh"])
+    if not run(["systemctl", "is-enabled", "--quiet", "ssh"], timeout=10).success:
+        run_sudo(["systemctl", "enable", "ssh"])
 
     # Verify it's running
     if is_sshd_running():
@@ -192,9 +345,11 @@ def copy_keys(
     """
     section("Copy Authorized Keys")
 
-    # Check SSH connectivity to source
-    info(f"Checking SSH connectivity to {source_host}...")
-    success, output = ssh_to_host(source_host, "echo connected")
+    # Fetch authorized_keys from source; the remote command cannot fail,
+    # so a non-zero exit means SSH itself failed and doubles as the
+    # connectivity check
+    info(f"Fetching authorized_keys from {source_host}...")
+    success, output = ssh_to_host(source_host, "cat ~/.ssh/authorized_keys 2>/dev/null || true")
     if not success:
         error(f"Cannot SSH to {source_host}: {output}")
         info("Ensure you can SSH to the source host first")
@@ -202,14 +357,8 @@ def copy_keys(
 
     ok(f"Connected to {source_host}")
 
-    # Fetch authorized_keys from source
-    info("Fetching authorized_keys from source...")
-    success, output = ssh_to_host(source_host, "cat ~/.ssh/authorized_keys 2>/dev/null || true")
-    if not success:
-        error(f"Failed to fetch keys: {output}")
-        raise typer.Exit(1)
-
-    source_keys = [line.strip() for line in output.strip().splitlines() if line.strip()]
+    # Each distinct key once, in source order
+    source_keys = list(dict.fromkeys(line.strip() for line in output.splitlines() if line.strip()))
     if not source_keys:
         warn("No authorized_keys found on source host")
         raise typer.Exit(1)
@@ -222,20 +371,38 @@ def copy_keys(
 
     auth_keys_path = get_authorized_keys_path()
 
-    if merge and auth_keys_path.exists():
-        # Read existing keys
-        existing_keys = set(auth_keys_path.read_text().strip().splitlines())
-        # Merge
-        all_keys = existing_keys | set(source_keys)
-        new_count = len(all_keys) - len(existing_keys)
-        auth_keys_path.write_text("\n".join(sorted(all_keys)) + "\n")
-        auth_keys_path.chmod(0o600)
-        ok(f"Merged keys - added {new_count} new key(s)")
+    # Stream the existing file in one open; None means there is nothing to merge into
+    existing_keys: set[str] | None = None
+    last_line = "\n"
+    if merge:
+        try:
+            with auth_keys_path.open() as f:
+                existing_keys = set()
+                for last_line in f:
+                    existing_keys.add(last_line.strip())
+        except FileNotFoundError:
+            pass
+
+    if existing_keys is not None:
+        # Append only the keys that are missing; existing lines stay untouched
+        new_keys = [k for k in source_keys if k not in existing_keys]
+        if new_keys:
+            with auth_keys_path.open("a") as f:
+                if not last_line.endswith("\n"):
+                    f.write("\n")  # Don't join the first new key onto the last line
+                f.writelines(f"{key}\n" for key in new_keys)
+            auth_keys_path.chmod(0o600)
+            ok(f"Merged keys - added {len(new_keys)} new key(s)")
+        else:
+            ok("All source keys already present - authorized_keys unchanged")
     else:
-        # Replace
+        # Replace, or create the file when merging into nothing
         auth_keys_path.write_text("\n".join(source_keys) + "\n")
         auth_keys_path.chmod(0o600)
-        ok(f"Replaced authorized_keys with {len(source_keys)} key(s)")
+        if merge:
+            ok(f"Added {len(source_keys)} key(s)")
+        else:
+            ok(f"Replaced authorized_keys with {len(source_keys)} key(s)")
 
     section("Key Copy Complete")
     info(f"Keys copied from {source_host}")
@@ -267,12 +434,13 @@ def add_key(
         info("Key should start with ssh-rsa, ssh-ed25519, ecdsa-sha2, etc.")
         raise typer.Exit(1)
 
-    # Add comment if provided
-    if comment:
-        # Check if key already has a comment (3rd field)
-        parts = pubkey.split()
-        if len(parts) >= 2:
-            pubkey = f"{parts[0]} {parts[1]} {comment}"
+    parts = pubkey.split()
+    # Compare by key body (2nd field) to avoid comment mismatches
+    key_body = parts[1] if len(parts) >= 2 else pubkey
+
+    # Add comment if provided (replaces any existing 3rd field)
+    if comment and len(parts) >= 2:
+        pubkey = f"{parts[0]} {parts[1]} {comment}"
 
     # Ensure .ssh directory exists
     ssh_dir = Path.home() / ".ssh"
@@ -282,13 +450,14 @@ def add_key(
 
     # Check if key already exists
     try:
-        if auth_keys_path.exists():
-            existing = auth_keys_path.read_text()
-            # Check by key body (2nd field) to avoid comment mismatches
-            key_body = pubkey.split()[1] if len(pubkey.split()) >= 2 else pubkey
-            if key_body in existing:
+        # Match whole tokens so a comment or another key that merely
+        # contains the body doesn't count (lines may start with options)
+        with auth_keys_path.open() as f:
+            if any(key_body in line.split() for line in f):
                 ok("Key already exists in authorized_keys")
                 return
+    except FileNotFoundError:
+        pass
     except PermissionError:
         error(f"Permission denied reading {auth_keys_path}")
         info(f"Check permissions with: ls -la {auth_keys_path}")
@@ -331,61 +500,47 @@ def status() -> None:
 
     # Check authorized_keys
     info("Checking authorized_keys...")
-    auth_keys = get_authorized_keys_path()
-    if auth_keys.exists():
-        keys = [line for line in auth_keys.read_text().splitlines() if line.strip()]
-        ok(f"authorized_keys has {len(keys)} key(s)")
-    else:
+    try:
+        with get_authorized_keys_path().open() as f:
+            key_count = sum(1 for line in f if line.strip())
+        ok(f"authorized_keys has {key_count} key(s)")
+    except FileNotFoundError:
         warn("No authorized_keys file")
         info("Add keys with: mesh ubuntu add-key <key>")
 
     # Check firewall
     info("Checking firewall...")
     if command_exists("ufw"):
-        try:
-            result = subprocess.run(
-                ["ufw", "status"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            if "inactive" in result.stdout.lower():
-                info("UFW firewall is inactive")
-            elif "active" in result.stdout.lower():
-                ok("UFW firewall is active")
-                # Check if SSH is allowed
-                if "22" in result.stdout or "ssh" in result.stdout.lower():
-                    ok("SSH allowed through firewall")
-                else:
-                    warn("SSH may not be allowed through firewall")
-                    info("Allow with: sudo ufw allow ssh")
-        except (subprocess.TimeoutExpired, FileNotFoundError):
+        enabled = is_ufw_enabled()
+        if enabled is None:
             info("Could not check UFW status")
+        elif not enabled:
+            info("UFW firewall is inactive")
+        else:
+            ok("UFW firewall is active")
+            # Listing rules needs root; never prompt for it here
+            result = run(["sudo", "-n", "ufw", "status"], timeout=10)
+            if not result.success:
+                info("Run 'sudo ufw status' to check that SSH is allowed")
+            elif "22" in result.stdout or "ssh" in result.stdout.lower():
+                ok("SSH allowed through firewall")
+            else:
+                warn("SSH may not be allowed through firewall")
+                info("Allow with: sudo ufw allow ssh")
     else:
         info("UFW not installed")
 
     # Check Tailscale
     info("Checking Tailscale...")
-    if command_exists("tailscale"):
+    if tailscale.is_installed():
         ok("Tailscale installed")
-        try:
-            result = subprocess.run(
-                ["tailscale", "status", "--json"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            if result.returncode == 0:
-                import json
-
-                status_data = json.loads(result.stdout)
-                state = status_data.get("BackendState", "unknown")
-                if state == "Running":
-                    ok("Tailscale connected")
-                else:
-                    warn(f"Tailscale state: {state}")
-        except Exception:
+        state = tailscale.get_backend_state()
+        if state is None:
             warn("Could not check Tailscale status")
+        elif state == "Running":
+            ok("Tailscale connected")
+        else:
+            warn(f"Tailscale state: {state}")
     else:
         info("Tailscale not installed")
         info("Install with: mesh client setup")
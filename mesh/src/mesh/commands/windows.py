@@ -1,5 +1,6 @@
 """Windows-specific provisioning commands."""
 
+import json
 import os
 import shlex
 import subprocess
@@ -18,13 +19,14 @@ app = typer.Typer(
 )
 
 
-def get_nvidia_sync_pubkey() -> str | None:
-    """Get NVIDIA Sync public key from Windows.
+def get_nvidia_sync_key() -> tuple[Path, str] | None:
+    """Get the NVIDIA Sync private key path and its public key from Windows.
 
-    Returns None if:
-    - NVIDIA Sync key file doesn't exist
-    - ssh-keygen is not available (OpenSSH client not installed)
-    - ssh-keygen fails to extract the public key
+    Returns:
+        Tuple of (private key path, public key), or None if:
+        - NVIDIA Sync key file doesn't exist
+        - ssh-keygen is not available (OpenSSH client not installed)
+        - ssh-keygen fails to extract the public key
     """
     # NVIDIA Sync stores its key in AppData
     appdata = os.environ.get("LOCALAPPDATA", "")
@@ -43,7 +45,7 @@ def get_nvidia_sync_pubkey() -> str | None:
             timeout=10,
         )
         if result.returncode == 0:
-            return result.stdout.strip()
+            return key_path, result.stdout.strip()
     except FileNotFoundError:
         # ssh-keygen not available - OpenSSH client may not be installed
         return None
@@ -61,25 +63,23 @@ def ensure_key_authorized(host: str, pubkey: str, comment: str = "") -> bool:
         return False
     key_body = key_parts[1]
 
-    # Check if key already exists (use shlex.quote for safe shell escaping)
-    check_cmd = (
-        f"grep -qF {shlex.quote(key_body)} ~/.ssh/authorized_keys 2>/dev/null && echo EXISTS"
-    )
-    success, output = ssh_to_host(host, check_cmd)
-    if success and "EXISTS" in output:
-        return True  # Already authorized
-
-    # Add the key
+    # Check and append in one SSH session (shlex.quote for safe shell escaping).
+    # awk matches the body as a whole field, so it isn't fooled by a comment
+    # or a longer key that merely contains it.
     key_line = pubkey if not comment else f"{pubkey} {comment}"
-    # Use printf with escaped content instead of echo with quotes
-    escaped_key = shlex.quote(key_line)
+    has_key = (
+        f"awk -v k={shlex.quote(key_body)} "
+        "'{ for (i = 1; i <= NF; i++) if ($i == k) { found = 1; exit } } END { exit !found }' "
+        "~/.ssh/authorized_keys 2>/dev/null"
+    )
     cmd = (
         f"mkdir -p ~/.ssh && chmod 700 ~/.ssh && "
-        f"printf '%s\\n' {escaped_key} >> ~/.ssh/authorized_keys && "
-        f"chmod 600 ~/.ssh/authorized_keys"
+        f"{{ {has_key} || "
+        f"printf '%s\\n' {shlex.quote(key_line)} >> ~/.ssh/authorized_keys; }} && "
+        f"chmod 600 ~/.ssh/authorized_keys && echo OK"
     )
-    success, _ = ssh_to_host(host, cmd)
-    return success
+    success, output = ssh_to_host(host, cmd)
+    return success and "OK" in output
 
 
 @app.command()
@@ -111,38 +111,28 @@ def sync_keys(
 
     # Find NVIDIA Sync key
     info("Looking for NVIDIA Sync key...")
-    pubkey = get_nvidia_sync_pubkey()
-    if not pubkey:
+    nvidia_key = get_nvidia_sync_key()
+    if not nvidia_key:
         warn("NVIDIA Sync key not found")
         info("NVIDIA Sync may not be installed or configured")
         info("Install from: https://www.nvidia.com/en-us/studio/software/")
         raise typer.Exit(1)
 
+    key_path, pubkey = nvidia_key
     ok(f"Found NVIDIA Sync key: {pubkey[:50]}...")
 
-    # Check SSH connectivity to host
-    info(f"Checking SSH connectivity to {host}...")
-    success, output = ssh_to_host(host, "echo connected")
-    if not success:
-        error(f"Cannot SSH to {host}: {output}")
-        info("Ensure you can SSH to the host with your regular key first")
-        raise typer.Exit(1)
-
-    ok(f"SSH to {host} works")
-
-    # Ensure NVIDIA Sync key is authorized
+    # Ensure NVIDIA Sync key is authorized; ssh_to_host fails fast on an
+    # unreachable host, so this doubles as the connectivity check
     info(f"Ensuring NVIDIA Sync key is authorized on {host}...")
     if ensure_key_authorized(host, pubkey, "NVIDIA Sync"):
         ok("NVIDIA Sync key is authorized")
     else:
-        error("Failed to authorize NVIDIA Sync key")
+        error(f"Failed to authorize NVIDIA Sync key on {host}")
+        info("Ensure you can SSH to the host with your regular key first")
         raise typer.Exit(1)
 
     # Test NVIDIA Sync key specifically
     info("Testing NVIDIA Sync key connection...")
-    appdata = os.environ.get("LOCALAPPDATA", "")
-    key_path = Path(appdata) / "NVIDIA Corporation" / "Sync" / "config" / "nvsync.key"
-
     try:
         result = subprocess.run(
             [
@@ -184,8 +174,7 @@ def status() -> None:
 
     # Check NVIDIA Sync
     info("Checking NVIDIA Sync...")
-    pubkey = get_nvidia_sync_pubkey()
-    if pubkey:
+    if get_nvidia_sync_key():
         ok("NVIDIA Sync key found")
     else:
         warn("NVIDIA Sync key not found")
@@ -205,14 +194,11 @@ def status() -> None:
         ok("Tailscale installed")
         try:
             result = subprocess.run(
-                [str(tailscale_path), "status", "--json"],
+                [str(tailscale_path), "status", "--json", "--peers=false"],
                 capture_output=True,
-                text=True,
                 timeout=10,
             )
             if result.returncode == 0:
-                import json
-
                 status = json.loads(result.stdout)
                 if status.get("BackendState") == "Running":
                     ok("Tailscale connected")
@@ -47,6 +47,110 @@ def run_wsl(cmd: str, as_root: bool = False, distro: str | None = None) -> tuple
         return False, "WSL not found"
 
 
+def parse_listen_port(ss_output: str) -> str | None:
+    """Get the port of the first listening socket in ``ss -tln`` output.
+
+    Rows look like ``LISTEN 0 128 0.0.0.0:2222 0.0.0.0:* ...``; the port is
+    whatever follows the last colon of the local address (4th field).
+    """
+    for line in ss_output.splitlines():
+        fields = line.split()
+        if len(fields) >= 4:
+            port = fields[3].rpartition(":")[2]
+            if port.isdigit():
+                return port
+    return None
+
+
+def parse_status_lines(output: str) -> tuple[dict[str, str], str]:
+    """Split script output into STATUS_<STEP>=<result> markers and other text.
+
+    Returns:
+        Tuple of (markers keyed by step, remaining output for error messages)
+    """
+    status: dict[str, str] = {}
+    other: list[str] = []
+    for line in output.splitlines():
+        key, sep, value = line.strip().partition("=")
+        if sep and key.startswith("STATUS_"):
+            status[key.removeprefix("STATUS_")] = value
+        elif line.strip():
+            other.append(line.strip())
+    return status, "\n".join(other)
+
+
+def _setup_ssh_script(port: int, copy_windows_keys: bool) -> str:
+    """Build the root script that configures and starts sshd inside WSL."""
+    config = "/etc/ssh/sshd_config"
+    listening = f"ss -tln 2>/dev/null | grep -qE ':{port}\\b'"
+    lines = [
+        "mkdir -p /run/sshd && echo STATUS_RUNDIR=ok",
+        # Rewrite the port in one sed pass, then add a Port line if none matched
+        f"if grep -qE '^Port {port}$' {config}; then",
+        "    echo STATUS_PORT=present",
+        f"elif sed -i -e 's/^#Port 22$/Port {port}/' -e 's/^Port 22$/Port {port}/' {config} \\",
+        f"    && {{ grep -qE '^Port {port}$' {config} || echo 'Port {port}' >> {config}; }}; then",
+        "    echo STATUS_PORT=configured",
+        "else",
+        "    echo STATUS_PORT=failed",
+        "    exit 1",
+        "fi",
+    ]
+    if copy_windows_keys:
+        # Windows authorized_keys via the WSL mount; assumes matching usernames
+        win_keys = "/mnt/c/Users/$USER/.ssh/authorized_keys"
+        ssh_dir = "/home/$USER/.ssh"
+        lines += [
+            f"if [ -f {win_keys} ]; then",
+            f"    mkdir -p {ssh_dir}",
+            f"    touch {ssh_dir}/authorized_keys",
+            "    # Append Windows keys not already present, in one awk pass",
+            "    # (existing keys fill the seen set; CRLF is stripped from Windows lines)",
+            "    awk 'FILENAME == ARGV[1] { seen[$0] = 1; next }",
+            '         { sub(/\\r$/, "") }',
+            '         $0 != "" && !seen[$0]++\' \\',
+            f"        {ssh_dir}/authorized_keys {win_keys} >> {ssh_dir}/authorized_keys",
+            f"    chown -R $USER:$USER {ssh_dir}",
+            f"    chmod 700 {ssh_dir}",
+            f"    chmod 600 {ssh_dir}/authorized_keys",
+            "    echo STATUS_KEYS=copied",
+            "else",
+            "    echo STATUS_KEYS=missing",
+            "fi",
+        ]
+    lines += [
+        # Never touch a running daemon with a config it would reject
+        "if ! /usr/sbin/sshd -t; then",
+        "    echo STATUS_SSHD=invalid",
+        "    exit 1",
+        "fi",
+        # Match the port on a word boundary (:22 must not match :2222)
+        f"if {listening}; then",
+        "    echo STATUS_SSHD=listening",
+        "    exit 0",
+        "fi",
+        # SIGHUP makes a running sshd re-exec and bind the configured port
+        # without killing existing sessions; give it a moment to come back
+        "pid=$(cat /run/sshd.pid 2>/dev/null)",
+        'if [ -n "$pid" ] && kill -HUP "$pid" 2>/dev/null; then',
+        "    for _ in 1 2 3 4 5 6 7 8 9 10; do",
+        f"        if {listening}; then echo STATUS_SSHD=reloaded; exit 0; fi",
+        "        sleep 0.2",
+        "    done",
+        "    pkill sshd 2>/dev/null",
+        "fi",
+        # No daemon (or one that did not pick up the port): start fresh. The
+        # port comes from sshd_config so later reloads keep it; sshd binds
+        # its listeners before daemonizing, so ss sees them at once.
+        f"if /usr/sbin/sshd && {listening}; then",
+        "    echo STATUS_SSHD=started",
+        "else",
+        "    echo STATUS_SSHD=failed",
+        "fi",
+    ]
+    return "\n".join(lines) + "\n"
+
+
 def is_wsl_running() -> bool:
     """Check if WSL is running."""
     try:
@@ -116,10 +220,10 @@ def setup_ssh(
         ok("openssh-server already installed")
     else:
         info("Installing openssh-server...")
-        # Update package list (suppress interactive prompts)
-        run_cmd("DEBIAN_FRONTEND=noninteractive apt-get update -qq", as_root=True)
+        # Update package list and install in one WSL call (suppress interactive prompts)
         success, output = run_cmd(
-            "DEBIAN_FRONTEND=noninteractive apt-get install -y openssh-server",
+            "export DEBIAN_FRONTEND=noninteractive; apt-get update -qq; "
+            "apt-get install -y openssh-server",
             as_root=True,
         )
         if success or "openssh-server is already" in output:
@@ -128,82 +232,44 @@ def setup_ssh(
             error(f"Failed to install openssh-server: {output}")
             raise typer.Exit(1)
 
-    # Create privilege separation directory
-    info("Creating /run/sshd directory...")
-    run_cmd("mkdir -p /run/sshd", as_root=True)
-    ok("/run/sshd ready")
-
-    # Configure SSH port
+    # Everything after the install runs as one root script: each wsl.exe
+    # launch pays the interop start-up cost. The script reports each step
+    # as a STATUS_<STEP>=<result> line.
     info(f"Configuring SSH on port {port}...")
-    # Check current port setting
-    success, output = run_cmd(f"grep -E '^Port {port}$' /etc/ssh/sshd_config")
-    if success:
+    _, output = run_cmd(_setup_ssh_script(port, copy_windows_keys), as_root=True)
+    status, details = parse_status_lines(output)
+
+    if status.get("RUNDIR") == "ok":
+        ok("/run/sshd ready")
+
+    port_status = status.get("PORT")
+    if port_status == "present":
         ok(f"SSH already configured for port {port}")
-    else:
-        # Update port configuration
-        run_cmd(f"sed -i 's/^#Port 22$/Port {port}/' /etc/ssh/sshd_config", as_root=True)
-        run_cmd(f"sed -i 's/^Port 22$/Port {port}/' /etc/ssh/sshd_config", as_root=True)
-        # Verify
-        success, _ = run_cmd(f"grep -E '^Port {port}$' /etc/ssh/sshd_config")
-        if not success:
-            # Port line doesn't exist, add it
-            run_cmd(f"echo 'Port {port}' >> /etc/ssh/sshd_config", as_root=True)
+    elif port_status == "configured":
         ok(f"SSH configured for port {port}")
+    else:
+        error(f"Failed to configure SSH port: {details}")
+        raise typer.Exit(1)
 
-    # Copy authorized_keys from Windows if requested
     if copy_windows_keys:
-        info("Copying authorized_keys from Windows...")
-        # Windows authorized_keys path (via WSL mount)
-        win_keys = "/mnt/c/Users/$USER/.ssh/authorized_keys"
-        wsl_ssh_dir = "/home/$USER/.ssh"
-
-        success, output = run_cmd(
-            f"""
-            if [ -f {win_keys} ]; then
-                mkdir -p {wsl_ssh_dir}
-                # Append Windows keys if not already present
-                while IFS= read -r key; do
-                    if ! grep -qF "$key" {wsl_ssh_dir}/authorized_keys 2>/dev/null; then
-                        echo "$key" >> {wsl_ssh_dir}/authorized_keys
-                    fi
-                done < {win_keys}
-                chown -R $USER:$USER {wsl_ssh_dir}
-                chmod 700 {wsl_ssh_dir}
-                chmod 600 {wsl_ssh_dir}/authorized_keys
-                echo "Keys copied"
-            else
-                echo "No Windows authorized_keys found"
-            fi
-        """,
-            as_root=True,
-        )
-        if "Keys copied" in output:
+        if status.get("KEYS") == "copied":
             ok("Authorized keys copied from Windows")
         else:
             warn("No Windows authorized_keys to copy")
 
-    # Check if sshd is already running on the port
-    # Use word boundary to avoid matching port as part of larger number (e.g., :22 vs :2222)
-    success, output = run_cmd(f"ss -tlnp 2>/dev/null | grep -E ':{port}\\b'")
-    if success and f":{port}" in output:
+    sshd_status = status.get("SSHD")
+    if sshd_status == "listening":
         ok(f"SSH already listening on port {port}")
+    elif sshd_status == "reloaded":
+        ok(f"SSH daemon reloaded on port {port}")
+    elif sshd_status == "started":
+        ok(f"SSH daemon started on port {port}")
+    elif sshd_status == "invalid":
+        error(f"sshd rejected its configuration: {details}")
+        raise typer.Exit(1)
     else:
-        # Start sshd
-        info("Starting SSH daemon...")
-        # Kill any existing sshd first
-        run_cmd("pkill -9 sshd 2>/dev/null || true", as_root=True)
-        success, output = run_cmd(f"/usr/sbin/sshd -p {port}", as_root=True)
-        if success or output.strip() == "":
-            # Verify it started
-            success, output = run_cmd(f"ss -tlnp 2>/dev/null | grep -E ':{port}\\b'")
-            if success:
-                ok(f"SSH daemon started on port {port}")
-            else:
-                error("Failed to start SSH daemon")
-                raise typer.Exit(1)
-        else:
-            error(f"Failed to start SSH daemon: {output}")
-            raise typer.Exit(1)
+        error(f"Failed to start SSH daemon: {details}")
+        raise typer.Exit(1)
 
     section("WSL SSH Setup Complete")
     ok(f"SSH server running on port {port}")
@@ -239,11 +305,7 @@ def status() -> None:
     # Check if sshd is listening
     success, output = run_wsl("ss -tlnp 2>/dev/null | grep sshd")
     if success and "sshd" in output:
-        # Extract port
-        import re
-
-        match = re.search(r":(\d+)\s", output)
-        port = match.group(1) if match else "unknown"
+        port = parse_listen_port(output) or "unknown"
         ok(f"SSH daemon running on port {port}")
     else:
         warn("SSH daemon not running")
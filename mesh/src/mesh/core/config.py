@@ -1,14 +1,27 @@
 """Configuration paths and settings management."""
 
+import functools
+import json
 import os
 import re
 from dataclasses import dataclass
 from pathlib import Path
 
-import yaml
-
 from mesh.core.environment import OSType, Role, detect_os_type, detect_role
 
+# Per-role Syncthing ports, so instances sharing a machine (WSL2 + Windows)
+# don't collide; unknown roles use the server's
+SYNCTHING_GUI_PORTS = {
+    Role.SERVER: 8384,
+    Role.WSL2: 8385,
+    Role.WINDOWS: 8386,
+}
+SYNCTHING_SYNC_PORTS = {
+    Role.SERVER: 22000,
+    Role.WSL2: 22001,
+    Role.WINDOWS: 22002,
+}
+
 
 def get_syncthing_config_dir() -> Path:
     """Get Syncthing config directory based on OS type."""
@@ -17,53 +30,59 @@ def get_syncthing_config_dir() -> Path:
         return Path(os.environ.get("LOCALAPPDATA", "")) / "Syncthing"
 
     # Modern Syncthing (1.27+) uses XDG_STATE_HOME, fallback to legacy location
-    state_dir = Path.home() / ".local" / "state" / "syncthing"
-    if state_dir.exists():
+    home = Path.home()
+    state_dir = home / ".local" / "state" / "syncthing"
+    if state_dir.is_dir():
         return state_dir
-    return Path.home() / ".config" / "syncthing"
+    return home / ".config" / "syncthing"
 
 
 def get_syncthing_port() -> int:
     """Get Syncthing GUI port based on role."""
-    role = detect_role()
-    ports = {
-        Role.SERVER: 8384,
-        Role.WSL2: 8385,
-        Role.WINDOWS: 8386,
-    }
-    return ports.get(role, 8384)
+    return SYNCTHING_GUI_PORTS.get(detect_role(), SYNCTHING_GUI_PORTS[Role.SERVER])
 
 
 def get_syncthing_sync_port() -> int:
     """Get Syncthing sync port based on role."""
-    role = detect_role()
-    ports = {
-        Role.SERVER: 22000,
-        Role.WSL2: 22001,
-        Role.WINDOWS: 22002,
-    }
-    return ports.get(role, 22000)
+    return SYNCTHING_SYNC_PORTS.get(detect_role(), SYNCTHING_SYNC_PORTS[Role.SERVER])
 
 
 def get_mesh_config_dir() -> Path:
-    """Get mesh CLI config directory."""
-    config_dir = Path.home() / ".config" / "mesh"
-    config_dir.mkdir(parents=True, exist_ok=True)
-    return config_dir
+    """Get mesh CLI config directory, creating it on first use."""
+    return _ensure_dir(Path.home() / ".config" / "mesh")
+
+
+@functools.lru_cache(maxsize=4)
+def _ensure_dir(path: Path) -> Path:
+    """Create a directory once per process and return it."""
+    path.mkdir(parents=True, exist_ok=True)
+    return path
 
 
 def get_headscale_server() -> str | None:
-    """Get saved Headscale server URL."""
+    """Get saved Headscale server URL.
+
+    Cached like load_hosts(): the file is re-read only when it changes.
+    """
     config_file = get_mesh_config_dir() / "headscale-server"
-    if config_file.exists():
-        return config_file.read_text().strip()
-    return None
+    try:
+        st = config_file.stat()
+    except FileNotFoundError:
+        return None
+    return _read_text_file(config_file, st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=4)
+def _read_text_file(path: Path, mtime_ns: int, size: int) -> str:
+    """Read and strip a small text file. Cached on (path, mtime, size)."""
+    return path.read_text().strip()
 
 
 def save_headscale_server(url: str) -> None:
     """Save Headscale server URL."""
     config_file = get_mesh_config_dir() / "headscale-server"
     config_file.write_text(url)
+    _read_text_file.cache_clear()
 
 
 def get_shared_folder() -> Path:
@@ -85,56 +104,124 @@ def get_default_user() -> str:
     return os.environ.get("MESH_DEFAULT_USER", os.environ.get("USER", "user"))
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Host:
-    """A registered mesh host."""
+    """A registered mesh host.
+
+    Frozen because load_hosts() hands out the cached instances.
+    """
 
     name: str
     ip: str
     port: int = 22
     user: str | None = None
+    compression: bool = False  # ssh -C, for slow WAN links
 
     def __post_init__(self):
         if self.user is None:
-            self.user = get_default_user()
+            object.__setattr__(self, "user", get_default_user())
+
+
+# Host registry file and the YAML file it replaced (migrated on first load)
+HOSTS_FILE_NAME = "hosts.json"
+LEGACY_HOSTS_FILE_NAME = "hosts.yaml"
 
 
 def _get_hosts_file() -> Path:
-    """Get path to hosts.yaml registry file."""
-    return get_mesh_config_dir() / "hosts.yaml"
+    """Get path to hosts.json registry file."""
+    return get_mesh_config_dir() / HOSTS_FILE_NAME
 
 
 def load_hosts() -> dict[str, Host]:
-    """Load hosts from ~/.config/mesh/hosts.yaml.
+    """Load hosts from ~/.config/mesh/hosts.json.
+
+    The parsed registry is cached and re-read only when the file's
+    mtime or size changes. A registry left in the old hosts.yaml format
+    is converted on first load.
 
     Returns:
         Dict mapping hostname to Host object.
     """
     hosts_file = _get_hosts_file()
-    if not hosts_file.exists():
+    try:
+        st = hosts_file.stat()
+    except FileNotFoundError:
+        return _migrate_legacy_hosts(hosts_file.with_name(LEGACY_HOSTS_FILE_NAME))
+    # Copy so callers can mutate the result without corrupting the cache
+    return dict(_parse_hosts_file(hosts_file, st.st_mtime_ns, st.st_size))
+
+
+@functools.lru_cache(maxsize=4)
+def _parse_hosts_file(hosts_file: Path, mtime_ns: int, size: int) -> dict[str, Host]:
+    """Parse hosts.json. Cached on (path, mtime, size) by load_hosts()."""
+    try:
+        return _hosts_from_data(json.loads(hosts_file.read_text()))
+    except ValueError:
         return {}
 
+
+def _migrate_legacy_hosts(legacy_file: Path) -> dict[str, Host]:
+    """Convert a hosts.yaml registry to hosts.json, keeping it as hosts.yaml.bak.
+
+    An unreadable or empty legacy file is left in place untouched.
+
+    Returns:
+        The migrated hosts (empty if there was nothing to migrate).
+    """
     try:
-        data = yaml.safe_load(hosts_file.read_text()) or {}
-        hosts_data = data.get("hosts", {}) or {}
-        result = {}
-        for name, info in hosts_data.items():
-            # Skip malformed entries (null or non-dict values)
-            if not isinstance(info, dict):
-                continue
-            result[name] = Host(
-                name=name,
-                ip=info.get("ip", ""),
-                port=info.get("port", 22),
-                user=info.get("user"),  # None triggers default in __post_init__
-            )
-        return result
+        hosts = parse_hosts_yaml(legacy_file.read_text())
+    except FileNotFoundError:
+        return {}
+    if hosts:
+        save_hosts(hosts)
+        legacy_file.replace(legacy_file.with_name(f"{LEGACY_HOSTS_FILE_NAME}.bak"))
+    return hosts
+
+
+def parse_hosts_yaml(text: str) -> dict[str, Host]:
+    """Parse hosts from YAML text in the hosts.yaml layout.
+
+    PyYAML is imported here rather than at module level: only
+    ``host add-batch`` and the one-time registry migration read YAML.
+
+    Args:
+        text: YAML content with a top-level ``hosts`` mapping
+
+    Returns:
+        Dict mapping hostname to Host object (empty if the YAML is invalid).
+    """
+    import yaml
+
+    # libyaml-backed parser when PyYAML was built with it
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    try:
+        return _hosts_from_data(yaml.load(text, Loader=loader))
     except yaml.YAMLError:
         return {}
 
 
+def _hosts_from_data(data: object) -> dict[str, Host]:
+    """Build Host objects from a parsed ``{"hosts": {name: {...}}}`` document."""
+    hosts_data = (data.get("hosts") if isinstance(data, dict) else None) or {}
+    if not isinstance(hosts_data, dict):
+        return {}
+    result = {}
+    for name, info in hosts_data.items():
+        # Skip malformed entries (null or non-dict values)
+        if not isinstance(info, dict):
+            continue
+        result[name] = Host(
+            name=name,
+            ip=info.get("ip", ""),
+            port=info.get("port", 22),
+            user=info.get("user"),  # None triggers default in __post_init__
+            compression=bool(info.get("compression", False)),
+        )
+    return result
+
+
 def save_hosts(hosts: dict[str, Host]) -> None:
-    """Save hosts to ~/.config/mesh/hosts.yaml."""
+    """Save hosts to ~/.config/mesh/hosts.json."""
     hosts_file = _get_hosts_file()
     data = {
         "hosts": {
@@ -142,15 +229,19 @@ def save_hosts(hosts: dict[str, Host]) -> None:
                 "ip": host.ip,
                 "port": host.port,
                 "user": host.user,
+                # Only written when enabled to keep the common entry minimal
+                **({"compression": True} if host.compression else {}),
             }
             for host in hosts.values()
         }
     }
-    hosts_file.write_text(yaml.dump(data, default_flow_style=False, sort_keys=False))
+    hosts_file.write_text(json.dumps(data, indent=2) + "\n")
+    # mtime granularity can be coarser than back-to-back writes; drop the cache
+    _parse_hosts_file.cache_clear()
 
 
 # Valid hostname: alphanumeric, hyphens, underscores (no spaces or special chars)
-VALID_HOSTNAME_PATTERN = re.compile(r"^[a-zA-Z0-9][a-zA-Z0-9_-]*$")
+VALID_HOSTNAME_PATTERN = re.compile(r"[a-zA-Z0-9][a-zA-Z0-9_-]*")
 
 
 def validate_hostname(name: str) -> bool:
@@ -164,7 +255,8 @@ def validate_hostname(name: str) -> bool:
     """
     if not name or len(name) > 63:
         return False
-    return bool(VALID_HOSTNAME_PATTERN.match(name))
+    # fullmatch: "$" would also accept a trailing newline
+    return VALID_HOSTNAME_PATTERN.fullmatch(name) is not None
 
 
 class InvalidHostnameError(ValueError):
@@ -173,7 +265,9 @@ class InvalidHostnameError(ValueError):
     pass
 
 
-def add_host(name: str, ip: str, port: int = 22, user: str | None = None) -> Host:
+def add_host(
+    name: str, ip: str, port: int = 22, user: str | None = None, compression: bool = False
+) -> Host:
     """Add or update a host in the registry. Idempotent.
 
     Args:
@@ -181,6 +275,7 @@ def add_host(name: str, ip: str, port: int = 22, user: str | None = None) -> Hos
         ip: IP address or hostname (e.g., "192.168.50.10")
         port: SSH port (default 22)
         user: SSH username (default from MESH_DEFAULT_USER env var)
+        compression: Enable SSH compression for this host (slow WAN links)
 
     Returns:
         The created or updated Host.
@@ -195,12 +290,38 @@ def add_host(name: str, ip: str, port: int = 22, user: str | None = None) -> Hos
         )
 
     hosts = load_hosts()
-    host = Host(name=name, ip=ip, port=port, user=user)
+    host = Host(name=name, ip=ip, port=port, user=user, compression=compression)
+    if hosts.get(name) == host:
+        return host  # Already registered as-is; skip the rewrite
     hosts[name] = host
     save_hosts(hosts)
     return host
 
 
+def add_hosts(new_hosts: list[Host]) -> None:
+    """Add or update several hosts with a single registry write.
+
+    Args:
+        new_hosts: Hosts to add; existing entries with the same name are replaced
+
+    Raises:
+        InvalidHostnameError: If any hostname contains invalid characters.
+            Nothing is written in that case.
+    """
+    for host in new_hosts:
+        if not validate_hostname(host.name):
+            raise InvalidHostnameError(
+                f"Invalid hostname '{host.name}': must be alphanumeric with "
+                "hyphens/underscores, start with letter/number, max 63 chars"
+            )
+
+    hosts = load_hosts()
+    if all(hosts.get(host.name) == host for host in new_hosts):
+        return
+    hosts.update((host.name, host) for host in new_hosts)
+    save_hosts(hosts)
+
+
 def remove_host(name: str) -> bool:
     """Remove a host from the registry.
 
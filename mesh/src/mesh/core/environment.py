@@ -1,5 +1,6 @@
 """Environment detection for OS type and machine role."""
 
+import functools
 import os
 import platform
 import socket
@@ -26,13 +27,18 @@ class Role(Enum):
     UNKNOWN = "unknown"
 
 
+@functools.lru_cache(maxsize=1)
 def detect_os_type() -> OSType:
-    """Detect operating system type."""
+    """Detect operating system type.
+
+    Cached for the process lifetime; the OS cannot change underneath us.
+    """
     # Check for WSL2 first (before generic Linux check)
-    if Path("/proc/version").exists():
-        content = Path("/proc/version").read_text().lower()
-        if "microsoft" in content:
+    try:
+        if "microsoft" in Path("/proc/version").read_text().lower():
             return OSType.WSL2
+    except OSError:
+        pass  # Not Linux
 
     system = platform.system().lower()
     os_map = {
@@ -43,39 +49,27 @@ def detect_os_type() -> OSType:
     return os_map.get(system, OSType.UNKNOWN)
 
 
-def _get_role_config() -> dict[str, Role]:
-    """Get hostname-to-role mapping from environment.
+def _get_role_config(server_hosts: str, wsl2_hosts: str, windows_hosts: str) -> dict[str, Role]:
+    """Get hostname-to-role mapping from the MESH_*_HOSTNAMES values.
 
-    Reads from environment variables:
-    - MESH_SERVER_HOSTNAMES: Comma-separated hostnames that are servers
-    - MESH_WSL2_HOSTNAMES: Comma-separated hostnames that are WSL2 clients
-    - MESH_WINDOWS_HOSTNAMES: Comma-separated hostnames that are Windows clients
+    Args:
+        server_hosts: MESH_SERVER_HOSTNAMES, comma-separated server hostnames
+        wsl2_hosts: MESH_WSL2_HOSTNAMES, comma-separated WSL2 client hostnames
+        windows_hosts: MESH_WINDOWS_HOSTNAMES, comma-separated Windows client hostnames
 
     Returns:
         Dict mapping lowercase hostname to Role.
     """
     config: dict[str, Role] = {}
-
-    # Parse server hostnames
-    server_hosts = os.environ.get("MESH_SERVER_HOSTNAMES", "")
-    for host in server_hosts.split(","):
-        host = host.strip().lower()
-        if host:
-            config[host] = Role.SERVER
-
-    # Parse WSL2 hostnames
-    wsl2_hosts = os.environ.get("MESH_WSL2_HOSTNAMES", "")
-    for host in wsl2_hosts.split(","):
-        host = host.strip().lower()
-        if host:
-            config[host] = Role.WSL2
-
-    # Parse Windows hostnames
-    windows_hosts = os.environ.get("MESH_WINDOWS_HOSTNAMES", "")
-    for host in windows_hosts.split(","):
-        host = host.strip().lower()
-        if host:
-            config[host] = Role.WINDOWS
+    for hosts, role in (
+        (server_hosts, Role.SERVER),
+        (wsl2_hosts, Role.WSL2),
+        (windows_hosts, Role.WINDOWS),
+    ):
+        for host in hosts.split(","):
+            host = host.strip().lower()
+            if host:
+                config[host] = role
 
     return config
 
@@ -96,16 +90,31 @@ def detect_role() -> Role:
     Note: WSL2 and Windows often share a hostname. The OS type is used
     to distinguish them when the hostname is configured in both.
     """
-    hostname = socket.gethostname().lower()
+    return _detect_role(
+        get_hostname().lower(),
+        os.environ.get("MESH_SERVER_HOSTNAMES", ""),
+        os.environ.get("MESH_WSL2_HOSTNAMES", ""),
+        os.environ.get("MESH_WINDOWS_HOSTNAMES", ""),
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _detect_role(hostname: str, server_hosts: str, wsl2_hosts: str, windows_hosts: str) -> Role:
+    """Resolve the role for a hostname and role configuration.
+
+    Memoized on its inputs so repeated detect_role()/is_server() calls in one
+    command skip re-parsing, while env or hostname changes are still seen.
+    """
     os_type = detect_os_type()
 
     # Check configured mappings
-    config = _get_role_config()
+    config = _get_role_config(server_hosts, wsl2_hosts, windows_hosts)
 
     # Direct hostname match
     if hostname in config:
         role = config[hostname]
-        # For shared hostnames (WSL2/Windows on same machine), use OS to disambiguate
+        # For shared hostnames (WSL2/Windows on same machine), use OS to disambiguate.
+        # A hostname listed in both client lists maps to a client role either way.
         if role in (Role.WSL2, Role.WINDOWS):
             if os_type == OSType.WSL2:
                 return Role.WSL2
@@ -113,21 +122,6 @@ def detect_role() -> Role:
                 return Role.WINDOWS
         return role
 
-    # Check if hostname is in multiple role configs (shared WSL2/Windows hostname)
-    # This handles the case where a hostname appears in both MESH_WSL2_HOSTNAMES
-    # and MESH_WINDOWS_HOSTNAMES for a machine running both
-    all_client_hosts = set()
-    wsl2_hosts = os.environ.get("MESH_WSL2_HOSTNAMES", "").lower().split(",")
-    windows_hosts = os.environ.get("MESH_WINDOWS_HOSTNAMES", "").lower().split(",")
-    all_client_hosts.update(h.strip() for h in wsl2_hosts if h.strip())
-    all_client_hosts.update(h.strip() for h in windows_hosts if h.strip())
-
-    if hostname in all_client_hosts:
-        if os_type == OSType.WSL2:
-            return Role.WSL2
-        elif os_type == OSType.WINDOWS:
-            return Role.WINDOWS
-
     # No configuration found - if we're on WSL2 or Windows, return that role
     # This provides sensible defaults for simple setups
     if os_type == OSType.WSL2:
@@ -137,7 +131,7 @@ def detect_role() -> Role:
 
     # For Linux servers, check if we might be the server
     # (only if MESH_SERVER_HOSTNAMES is not set, indicating no explicit config)
-    if os_type == OSType.UBUNTU and not os.environ.get("MESH_SERVER_HOSTNAMES"):
+    if os_type == OSType.UBUNTU and not server_hosts:
         # No config at all - could be the server
         # Return UNKNOWN to be safe; user should configure explicitly
         return Role.UNKNOWN
@@ -150,6 +144,17 @@ def is_server() -> bool:
     return detect_role() == Role.SERVER
 
 
+@functools.cache
 def get_hostname() -> str:
-    """Get the current hostname."""
+    """Get the current hostname.
+
+    Cached for the process lifetime, like detect_os_type().
+    """
     return socket.gethostname()
+
+
+def _reset_env_cache() -> None:
+    """Forget cached OS type, hostname and role (for tests)."""
+    detect_os_type.cache_clear()
+    get_hostname.cache_clear()
+    _detect_role.cache_clear()
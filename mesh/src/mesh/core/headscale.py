@@ -1,12 +1,23 @@
 """Headscale server management."""
 
-import httpx
+import json
+import platform
+import re
 
 from mesh.utils.process import command_exists, run, run_sudo
 
+try:
+    # Faster decoder for large node lists (the ``json`` extra); same ValueError contract
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 HEADSCALE_VERSION = "0.27.1"
 HEADSCALE_URL = f"https://github.com/juanfont/headscale/releases/download/v{HEADSCALE_VERSION}"
 
+# A bare pre-auth key on its own line (48+ hex chars), for non-JSON output
+PREAUTH_KEY_PATTERN = re.compile(r"^[a-f0-9]{48,}$")
+
 
 def is_installed() -> bool:
     """Check if Headscale is installed."""
@@ -19,42 +30,69 @@ def is_running() -> bool:
     return result.success and result.stdout.strip() == "active"
 
 
-def get_health(server_url: str) -> bool:
-    """Check Headscale server health."""
+def get_health(server_url: str, timeout: float = 5) -> bool:
+    """Check Headscale server health.
+
+    Args:
+        server_url: Base URL of the Headscale server.
+        timeout: Seconds to wait before treating the server as unreachable.
+    """
+    # httpx is a heavy import and this is its only use here; host/remote
+    # commands import this module just for the headscale CLI wrappers
+    import httpx
+
     try:
-        resp = httpx.get(f"{server_url}/health", timeout=5)
+        resp = httpx.get(f"{server_url}/health", timeout=timeout)
         return resp.status_code == 200
     except httpx.RequestError:
         return False
 
 
+# Parsed `headscale users list` output, reused until a user is created
+_users: list[dict] | None = None
+
+
 def create_user(name: str) -> bool:
     """Create a Headscale user/namespace."""
     result = run_sudo(["headscale", "users", "create", name])
+    if result.success:
+        invalidate_users_cache()
     return result.success or "already exists" in result.stderr.lower()
 
 
-def get_user_id(username: str) -> int | None:
-    """Get user ID from username (headscale 0.27+ requires ID, not name)."""
-    import json
+def invalidate_users_cache() -> None:
+    """Forget the cached user list so the next lookup re-queries Headscale."""
+    global _users
+    _users = None
 
-    result = run_sudo(["headscale", "users", "list", "--output", "json"])
-    if result.success:
+
+def _list_users() -> list[dict]:
+    """Get Headscale users, querying the server once per process.
+
+    Failed queries are not cached, so a later call can still succeed.
+    """
+    global _users
+    if _users is None:
+        result = run_sudo(["headscale", "users", "list", "--output", "json"])
+        if not result.success:
+            return []
         try:
-            users = json.loads(result.stdout)
-            for user in users:
-                if user.get("name") == username or user.get("username") == username:
-                    return user.get("id")
-        except json.JSONDecodeError:
-            pass
+            _users = _json_loads(result.stdout)
+        except ValueError:
+            return []
+    return _users
+
+
+def get_user_id(username: str) -> int | None:
+    """Get user ID from username (headscale 0.27+ requires ID, not name)."""
+    for user in _list_users():
+        if user.get("name") == username or user.get("username") == username:
+            return user.get("id")
     return None
 
 
 def create_preauth_key(user: str, reusable: bool = True, ephemeral: bool = False) -> str | None:
     """Create a pre-authentication key."""
-    import json
-    import re
-
     # Headscale 0.27+ requires user ID, not username
     user_id = get_user_id(user)
     if user_id is None:
@@ -72,10 +110,10 @@ def create_preauth_key(user: str, reusable: bool = True, ephemeral: bool = False
 
         # Try parsing full JSON first
         try:
-            data = json.loads(output)
+            data = _json_loads(output)
             if key := data.get("key"):
                 return key
-        except json.JSONDecodeError:
+        except ValueError:
             pass
 
         # Headscale may pollute stdout with warnings (issue #1797)
@@ -83,16 +121,16 @@ def create_preauth_key(user: str, reusable: bool = True, ephemeral: bool = False
         try:
             start = output.index("{")
             end = output.rindex("}") + 1
-            data = json.loads(output[start:end])
+            data = _json_loads(output[start:end])
             if key := data.get("key"):
                 return key
-        except (ValueError, json.JSONDecodeError):
+        except ValueError:
             pass
 
         # Fallback: look for the key on a line by itself (48+ char hex string)
         for line in output.split("\n"):
             line = line.strip()
-            if re.match(r"^[a-f0-9]{48,}$", line):
+            if PREAUTH_KEY_PATTERN.match(line):
                 return line
     return None
 
@@ -108,11 +146,9 @@ def list_nodes(user: str | None = None) -> list[dict]:
 
     result = run_sudo(cmd)
     if result.success:
-        import json
-
         try:
-            return json.loads(result.stdout)
-        except json.JSONDecodeError:
+            return _json_loads(result.stdout)
+        except ValueError:
             return []
     return []
 
@@ -126,8 +162,6 @@ def get_server_url() -> str:
 
 def install_headscale() -> bool:
     """Install Headscale binary."""
-    import platform
-
     arch = platform.machine()
     if arch == "aarch64":
         arch = "arm64"
@@ -11,6 +11,12 @@ from pathlib import Path
 
 import yaml
 
+try:
+    # libyaml-backed parser when PyYAML was built with it
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 from mesh.core.environment import OSType, detect_os_type
 from mesh.utils.process import run
 
@@ -181,15 +187,15 @@ def check_logtail_suppression() -> LogtailStatus:
         file_path = "/etc/default/tailscaled"
 
     try:
-        path = Path(file_path)
-        if not path.exists():
+        try:
+            content = Path(file_path).read_text()
+        except FileNotFoundError:
             return LogtailStatus(
                 suppressed=False,
                 file_path=file_path,
                 file_exists=False,
             )
 
-        content = path.read_text()
         suppressed = "TS_NO_LOGS_NO_SUPPORT=true" in content
 
         return LogtailStatus(
@@ -258,15 +264,15 @@ def check_headscale_config(
     )
 
     try:
-        path = Path(config_path)
-        if not path.exists():
+        try:
+            content = Path(config_path).read_text()
+        except FileNotFoundError:
             return HeadscaleConfigStatus(
                 **_defaults,
                 error=f"Config file not found: {config_path}",
             )
 
-        content = path.read_text()
-        config = yaml.safe_load(content) or {}
+        config = yaml.load(content, Loader=_YamlLoader) or {}
 
         derp = config.get("derp", {}) or {}
         derp_server = derp.get("server", {}) or {}
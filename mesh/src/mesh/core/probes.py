@@ -0,0 +1,44 @@
+"""Host facts shared by the status-style commands.
+
+``mesh status`` and ``mesh smb status`` both need the OS type, role and
+Tailscale state. Collecting them once into a ProbeContext keeps the two
+commands from re-probing the same things and gives every section of one
+report the same snapshot.
+"""
+
+import functools
+from dataclasses import dataclass
+
+from mesh.core import tailscale
+from mesh.core.environment import OSType, Role, detect_os_type, detect_role
+
+
+@dataclass(frozen=True)
+class ProbeContext:
+    """Snapshot of host facts taken once per command invocation."""
+
+    os_type: OSType
+    role: Role
+    tailscale_installed: bool
+    tailscale_connected: bool
+
+    @property
+    def is_server(self) -> bool:
+        """Whether this host is the coordination server."""
+        return self.role == Role.SERVER
+
+
+@functools.lru_cache(maxsize=1)
+def probe_context() -> ProbeContext:
+    """Collect the shared host facts (cached for the process lifetime).
+
+    Returns:
+        ProbeContext for this host.
+    """
+    installed = tailscale.is_installed()
+    return ProbeContext(
+        os_type=detect_os_type(),
+        role=detect_role(),
+        tailscale_installed=installed,
+        tailscale_connected=installed and tailscale.is_connected(),
+    )
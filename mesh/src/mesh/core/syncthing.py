@@ -1,12 +1,36 @@
 """Syncthing REST API client."""
 
+import functools
 import xml.etree.ElementTree as ET
+from pathlib import Path
 
 import httpx
 
 from mesh.core.config import get_syncthing_config_dir, get_syncthing_port
 
 
+@functools.lru_cache(maxsize=4)
+def _read_api_key(path: Path, mtime_ns: int, size: int) -> str | None:
+    """Read the API key from an api-key file or config.xml.
+
+    Cached on (path, mtime, size), so every SyncthingClient in a process
+    shares one read, and one XML parse, of an unchanged file.
+    """
+    if path.name != "config.xml":
+        return path.read_text().strip()
+    # Stream the file and stop at <apikey> (under <gui>, near the top) rather
+    # than building the whole folder/device tree. Text is only complete at "end".
+    events = ET.iterparse(path, events=("end",))
+    try:
+        for _event, elem in events:
+            if elem.tag == "apikey":
+                return elem.text or None
+            elem.clear()
+    finally:
+        events.close()
+    return None
+
+
 class SyncthingClient:
     """Client for interacting with Syncthing REST API."""
 
@@ -15,6 +39,29 @@ class SyncthingClient:
         self.port = port or get_syncthing_port()
         self.base_url = f"http://localhost:{self.port}"
         self._api_key: str | None = None
+        self._http: httpx.Client | None = None
+
+    @property
+    def http(self) -> httpx.Client:
+        """Get the shared HTTP client, keeping connections alive across calls."""
+        if self._http is None:
+            self._http = httpx.Client(
+                base_url=self.base_url,
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+            )
+        return self._http
+
+    def close(self) -> None:
+        """Close pooled connections, if any were opened."""
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+
+    def __enter__(self) -> "SyncthingClient":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
 
     @property
     def api_key(self) -> str:
@@ -27,18 +74,16 @@ class SyncthingClient:
         """Extract API key from config."""
         config_dir = get_syncthing_config_dir()
 
-        # Try api-key file first
-        api_key_file = config_dir / "api-key"
-        if api_key_file.exists():
-            return api_key_file.read_text().strip()
-
-        # Parse config.xml
-        config_xml = config_dir / "config.xml"
-        if config_xml.exists():
-            tree = ET.parse(config_xml)
-            apikey = tree.find(".//apikey")
-            if apikey is not None and apikey.text:
-                return apikey.text
+        # Try api-key file first, then config.xml
+        for name in ("api-key", "config.xml"):
+            path = config_dir / name
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            api_key = _read_api_key(path, st.st_mtime_ns, st.st_size)
+            if api_key is not None:
+                return api_key
 
         raise RuntimeError("Could not find Syncthing API key")
 
@@ -49,7 +94,7 @@ class SyncthingClient:
     def is_running(self) -> bool:
         """Check if Syncthing is running."""
         try:
-            resp = httpx.get(f"{self.base_url}/rest/system/ping", timeout=2)
+            resp = self.http.get("/rest/system/ping", timeout=2)
             # 200 = OK, 403 = CSRF (running but needs auth)
             return resp.status_code in (200, 403)
         except httpx.RequestError:
@@ -57,8 +102,8 @@ class SyncthingClient:
 
     def get_device_id(self) -> str:
         """Get local device ID."""
-        resp = httpx.get(
-            f"{self.base_url}/rest/system/status",
+        resp = self.http.get(
+            "/rest/system/status",
             headers=self._headers(),
             timeout=5,
         )
@@ -67,8 +112,8 @@ class SyncthingClient:
 
     def get_connections(self) -> dict:
         """Get connection status for all devices."""
-        resp = httpx.get(
-            f"{self.base_url}/rest/system/connections",
+        resp = self.http.get(
+            "/rest/system/connections",
             headers=self._headers(),
             timeout=5,
         )
@@ -77,8 +122,8 @@ class SyncthingClient:
 
     def get_devices(self) -> list[dict]:
         """Get all configured devices."""
-        resp = httpx.get(
-            f"{self.base_url}/rest/config/devices",
+        resp = self.http.get(
+            "/rest/config/devices",
             headers=self._headers(),
             timeout=5,
         )
@@ -87,8 +132,8 @@ class SyncthingClient:
 
     def add_device(self, device_id: str, name: str) -> None:
         """Add a new device."""
-        resp = httpx.post(
-            f"{self.base_url}/rest/config/devices",
+        resp = self.http.post(
+            "/rest/config/devices",
             headers=self._headers(),
             json={"deviceID": device_id, "name": name},
             timeout=10,
@@ -97,8 +142,8 @@ class SyncthingClient:
 
     def get_folders(self) -> list[dict]:
         """Get all configured folders."""
-        resp = httpx.get(
-            f"{self.base_url}/rest/config/folders",
+        resp = self.http.get(
+            "/rest/config/folders",
             headers=self._headers(),
             timeout=5,
         )
@@ -108,20 +153,21 @@ class SyncthingClient:
     def share_folder(self, folder_id: str, device_id: str) -> None:
         """Share a folder with a device."""
         # Get current folder config
-        resp = httpx.get(
-            f"{self.base_url}/rest/config/folders/{folder_id}",
+        resp = self.http.get(
+            f"/rest/config/folders/{folder_id}",
             headers=self._headers(),
             timeout=5,
         )
         resp.raise_for_status()
         folder = resp.json()
 
-        # Add device if not already shared
-        device_ids = [d["deviceID"] for d in folder.get("devices", [])]
-        if device_id not in device_ids:
-            folder.setdefault("devices", []).append({"deviceID": device_id})
-            resp = httpx.put(
-                f"{self.base_url}/rest/config/folders/{folder_id}",
+        # Add device if not already shared. PATCH would not save the GET:
+        # it replaces the devices list wholesale, so the current list is needed
+        devices = folder.setdefault("devices", [])
+        if not any(d.get("deviceID") == device_id for d in devices):
+            devices.append({"deviceID": device_id})
+            resp = self.http.put(
+                f"/rest/config/folders/{folder_id}",
                 headers=self._headers(),
                 json=folder,
                 timeout=10,
@@ -1,9 +1,24 @@
 """Tailscale client management."""
 
 import json
+import time
+from dataclasses import dataclass
 
 from mesh.utils.process import command_exists, run
 
+try:
+    # Faster decoder for large tailnets (the ``json`` extra); same ValueError contract
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# How long (seconds) a `tailscale status --json` result is reused
+STATUS_CACHE_TTL = 1.0
+
+# Last parsed status per query, keyed on whether it includes the peer map:
+# {with_peers: (time.monotonic() of the query, status)}
+_status_cache: dict[bool, tuple[float, dict]] = {}
+
 
 def is_installed() -> bool:
     """Check if Tailscale is installed."""
@@ -12,42 +27,78 @@ def is_installed() -> bool:
 
 def is_connected() -> bool:
     """Check if Tailscale is connected."""
-    if not is_installed():
-        return False
-    result = run(["tailscale", "status", "--json"])
-    if not result.success:
-        return False
-    try:
-        status = json.loads(result.stdout)
-        return status.get("BackendState") == "Running"
-    except json.JSONDecodeError:
-        return False
+    return get_backend_state() == "Running"
+
+
+def get_backend_state() -> str | None:
+    """Get the Tailscale BackendState (e.g. "Running", "NeedsLogin").
+
+    Returns:
+        The state string, or None if Tailscale is not installed or not answering.
+    """
+    status = _query_status(with_peers=False)
+    if status is None:
+        return None
+    return status.get("BackendState", "unknown")
 
 
 def get_status() -> dict | None:
     """Get Tailscale status as dict."""
+    return _query_status(with_peers=True)
+
+
+def _query_status(with_peers: bool) -> dict | None:
+    """Run ``tailscale status --json``, reusing a recent result.
+
+    A successful result is reused for STATUS_CACHE_TTL seconds so that
+    is_connected(), get_ip() and get_peers() called back to back share one
+    run. A full status also answers queries that do not need peers.
+
+    Args:
+        with_peers: Whether the peer map is needed (otherwise --peers=false)
+    """
+    now = time.monotonic()
+    for key in (True,) if with_peers else (False, True):
+        cached = _status_cache.get(key)
+        if cached is not None and now - cached[0] < STATUS_CACHE_TTL:
+            return cached[1]
     if not is_installed():
         return None
-    result = run(["tailscale", "status", "--json"])
+    cmd = ["tailscale", "status", "--json"]
+    if not with_peers:
+        # Skip serialising the peer map when only our own node is needed
+        cmd.append("--peers=false")
+    result = run(cmd, timeout=10)
     if not result.success:
         return None
     try:
-        return json.loads(result.stdout)
-    except json.JSONDecodeError:
+        status = _json_loads(result.stdout)
+    except ValueError:
         return None
+    _status_cache[with_peers] = (time.monotonic(), status)
+    return status
+
+
+def invalidate_status_cache() -> None:
+    """Forget the cached status, e.g. after connecting or disconnecting."""
+    _status_cache.clear()
 
 
 def get_ip() -> str | None:
-    """Get Tailscale IP address."""
-    result = run(["tailscale", "ip", "-4"])
-    if result.success and result.stdout.strip():
-        return result.stdout.strip().split("\n")[0]
+    """Get Tailscale IPv4 address."""
+    status = _query_status(with_peers=False)
+    if status is None:
+        return None
+    # TailscaleIPs lists IPv4 first, then IPv6
+    for ip in status.get("TailscaleIPs") or ():
+        if "." in ip:
+            return ip
     return None
 
 
-def up(login_server: str, auth_key: str, accept_dns: bool = True) -> bool:
-    """Connect to Tailscale with auth key."""
-    cmd = [
+def _up_command(login_server: str, auth_key: str, accept_dns: bool = True) -> list[str]:
+    """Build the ``tailscale up`` argument list."""
+    return [
         "tailscale",
         "up",
         "--login-server",
@@ -57,31 +108,62 @@ def up(login_server: str, auth_key: str, accept_dns: bool = True) -> bool:
         "--accept-routes",
         f"--accept-dns={'true' if accept_dns else 'false'}",
     ]
-    result = run(cmd)
+
+
+def up(login_server: str, auth_key: str, accept_dns: bool = True) -> bool:
+    """Connect to Tailscale with auth key."""
+    result = run(_up_command(login_server, auth_key, accept_dns))
+    invalidate_status_cache()
     return result.success
 
 
+def up_and_get_ip(
+    login_server: str, auth_key: str, accept_dns: bool = True
+) -> tuple[bool, str | None]:
+    """Connect to Tailscale and read back the assigned IPv4.
+
+    Connected is decided by ``tailscale up`` alone; the IP comes from
+    get_ip(), so a failed lookup never masks a successful join.
+
+    Returns:
+        Tuple of (connected, ip). ip is None if it could not be determined.
+    """
+    if not up(login_server, auth_key, accept_dns):
+        return False, None
+    return True, get_ip()
+
+
 def down() -> bool:
     """Disconnect from Tailscale."""
     result = run(["tailscale", "down"])
+    invalidate_status_cache()
     return result.success
 
 
-def get_peers() -> list[dict]:
+@dataclass(slots=True)
+class Peer:
+    """A tailnet peer from ``tailscale status --json``."""
+
+    id: str
+    hostname: str
+    ip: str
+    online: bool
+
+
+def get_peers() -> list[Peer]:
     """Get list of connected peers."""
     status = get_status()
     if not status:
         return []
     peers = []
     for peer_id, peer_info in status.get("Peer", {}).items():
+        ips = peer_info.get("TailscaleIPs")
         peers.append(
-            {
-                "id": peer_id,
-                "hostname": peer_info.get("HostName", ""),
-                "ip": peer_info.get("TailscaleIPs", [""])[0]
-                if peer_info.get("TailscaleIPs")
-                else "",
-                "online": peer_info.get("Online", False),
-            }
+            Peer(
+                id=peer_id,
+                hostname=peer_info.get("HostName", ""),
+                ip=ips[0] if ips else "",
+                online=peer_info.get("Online", False),
+            )
         )
     return peers
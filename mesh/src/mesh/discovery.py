@@ -1,9 +1,12 @@
 """mDNS service discovery for mesh network servers."""
 
+import functools
+import ipaddress
 import socket
+import threading
 from typing import TYPE_CHECKING
 
-from mesh.utils.output import error, info, warn
+from mesh.utils.output import batch, error, info, warn
 
 if TYPE_CHECKING:
     from zeroconf import Zeroconf
@@ -48,9 +51,10 @@ def advertise_server(port: int = 8080, hostname: str | None = None) -> "Zeroconf
     )
 
     zc.register_service(service_info)
-    info(f"Advertising mesh server on port {port}")
-    for ip in local_ips:
-        info(f"  Address: {ip}:{port}")
+    with batch():
+        info(f"Advertising mesh server on port {port}")
+        for ip in local_ips:
+            info(f"  Address: {ip}:{port}")
 
     return zc
 
@@ -65,16 +69,56 @@ def discover_server(timeout: float = 5.0) -> str | None:
         Server URL (e.g., "http://192.168.1.10:8080") or None if not found.
     """
     try:
-        from zeroconf import ServiceBrowser, ServiceListener, Zeroconf
+        from zeroconf import ServiceBrowser, Zeroconf
+
+        listener_class = _listener_class()
     except ImportError:
         error("zeroconf not installed - run: uv add zeroconf")
         return None
 
+    try:
+        zc = Zeroconf()
+        listener = listener_class()
+        browser = ServiceBrowser(zc, SERVICE_TYPE, listener)
+
+        # Wake as soon as the listener resolves a server, not on a poll tick
+        listener.found.wait(timeout)
+
+        browser.cancel()
+        zc.close()
+
+        return listener.server_url
+
+    except OSError as e:
+        warn(f"Discovery failed: {e}")
+        info("Ensure UDP port 5353 is open for mDNS")
+        return None
+
+
+@functools.cache
+def _listener_class() -> type:
+    """Build the discovery listener class once per process.
+
+    ServiceListener lives in the optional zeroconf package, so the class
+    cannot be defined at import time; caching it spares discover_server()
+    from recreating it on every call.
+
+    Raises:
+        ImportError: If zeroconf is not installed.
+    """
+    from zeroconf import ServiceListener
+
     class Listener(ServiceListener):
         def __init__(self) -> None:
             self.server_url: str | None = None
-
-        def add_service(self, zc: Zeroconf, type_: str, name: str) -> None:
+            # Set from zeroconf's thread as soon as a server is resolved
+            self.found = threading.Event()
+
+        def add_service(self, zc: "Zeroconf", type_: str, name: str) -> None:
+            # Re-announcements (one per interface) would each cost another
+            # blocking get_service_info() round trip; the first answer wins
+            if self.found.is_set():
+                return
             info_obj = zc.get_service_info(type_, name)
             if info_obj:
                 addresses = info_obj.parsed_addresses()
@@ -82,48 +126,27 @@ def discover_server(timeout: float = 5.0) -> str | None:
                     ip = addresses[0]
                     port = info_obj.port
                     self.server_url = f"http://{ip}:{port}"
+                    self.found.set()
 
-        def remove_service(self, zc: Zeroconf, type_: str, name: str) -> None:
+        def remove_service(self, zc: "Zeroconf", type_: str, name: str) -> None:
             pass
 
-        def update_service(self, zc: Zeroconf, type_: str, name: str) -> None:
+        def update_service(self, zc: "Zeroconf", type_: str, name: str) -> None:
             pass
 
-    try:
-        zc = Zeroconf()
-        listener = Listener()
-        browser = ServiceBrowser(zc, SERVICE_TYPE, listener)
-
-        # Wait for discovery
-        import time
-
-        start = time.time()
-        while listener.server_url is None and (time.time() - start) < timeout:
-            time.sleep(0.1)
-
-        browser.cancel()
-        zc.close()
-
-        return listener.server_url
-
-    except OSError as e:
-        warn(f"Discovery failed: {e}")
-        info("Ensure UDP port 5353 is open for mDNS")
-        return None
+    return Listener
 
 
-def _get_local_ips() -> list[str]:
-    """Get local IP addresses (excluding loopback)."""
-    ips = []
+def _get_local_ips() -> tuple[str, ...]:
+    """Get local IP addresses (excluding loopback and link-local), without duplicates."""
+    ips: tuple[str, ...] = ()
     try:
         # Get all network interfaces
         hostname = socket.gethostname()
-        # Try to get all addresses for this host
+        # getaddrinfo returns one tuple per socket type, so each address
+        # usually appears several times; keep the first of each
         addrs = socket.getaddrinfo(hostname, None, socket.AF_INET)
-        for addr in addrs:
-            ip = addr[4][0]
-            if not ip.startswith("127."):
-                ips.append(ip)
+        ips = tuple(ip for ip in dict.fromkeys(addr[4][0] for addr in addrs) if _is_reachable(ip))
     except socket.gaierror:
         pass
 
@@ -131,12 +154,23 @@ def _get_local_ips() -> list[str]:
     if not ips:
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
-            s.close()
-            if not ip.startswith("127."):
-                ips.append(ip)
+            try:
+                s.connect(("8.8.8.8", 80))
+                ip = s.getsockname()[0]
+            finally:
+                s.close()
+            if _is_reachable(ip):
+                ips = (ip,)
         except Exception:
             pass
 
     return ips
+
+
+def _is_reachable(ip: str) -> bool:
+    """Check whether an address can be advertised to other hosts on the LAN."""
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return not (addr.is_loopback or addr.is_link_local)
@@ -1,40 +1,79 @@
 """Rich console output helpers."""
 
-from rich.console import Console
+import contextlib
+from collections.abc import Iterator
+
+from rich.console import Console, RenderableType
 from rich.panel import Panel
 from rich.table import Table
 
 console = Console()
 
+# Markup lines collected inside batch(), or None when printing directly
+_pending: list[str] | None = None
+
+
+@contextlib.contextmanager
+def batch() -> Iterator[None]:
+    """Collect message lines and render them with one console.print on exit.
+
+    Use around loops that emit many info()/ok()/warn() lines. Nested
+    batches join the outermost one.
+    """
+    global _pending
+    if _pending is not None:
+        yield
+        return
+    _pending = []
+    try:
+        yield
+    finally:
+        lines, _pending = _pending, None
+        if lines:
+            console.print("\n".join(lines))
+
+
+def _print(renderable: RenderableType) -> None:
+    """Print now, or queue markup while a batch() is open."""
+    if _pending is not None:
+        if isinstance(renderable, str):
+            _pending.append(renderable)
+            return
+        # Keep ordering: flush queued lines before a panel or table
+        if _pending:
+            console.print("\n".join(_pending))
+            _pending.clear()
+    console.print(renderable)
+
 
 def info(msg: str) -> None:
     """Print an info message."""
-    console.print(f"[blue]INFO:[/blue] {msg}")
+    _print(f"[blue]INFO:[/blue] {msg}")
 
 
 def ok(msg: str) -> None:
     """Print a success message."""
-    console.print(f"[green]OK:[/green] {msg}")
+    _print(f"[green]OK:[/green] {msg}")
 
 
 def warn(msg: str) -> None:
     """Print a warning message."""
-    console.print(f"[yellow]WARN:[/yellow] {msg}")
+    _print(f"[yellow]WARN:[/yellow] {msg}")
 
 
 def error(msg: str) -> None:
     """Print an error message."""
-    console.print(f"[red]ERROR:[/red] {msg}")
+    _print(f"[red]ERROR:[/red] {msg}")
 
 
 def section(title: str) -> None:
     """Print a section header."""
-    console.print(f"\n[bold]=== {title} ===[/bold]")
+    _print(f"\n[bold]=== {title} ===[/bold]")
 
 
 def panel(content: str, title: str | None = None) -> None:
     """Print content in a panel."""
-    console.print(Panel(content, title=title))
+    _print(Panel(content, title=title))
 
 
 def create_table(title: str, columns: list[str]) -> Table:
@@ -47,4 +86,4 @@ def create_table(title: str, columns: list[str]) -> Table:
 
 def print_table(table: Table) -> None:
     """Print a table."""
-    console.print(table)
+    _print(table)
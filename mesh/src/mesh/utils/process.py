@@ -1,9 +1,25 @@
 """Subprocess execution helpers."""
 
+import contextlib
+import functools
+import os
 import shutil
 import subprocess
+import threading
+import time
+from collections.abc import Iterator
 from dataclasses import dataclass
 
+# Default wall-clock budget (seconds) for a command_budget() block;
+# override with MESH_CMD_TIMEOUT
+DEFAULT_CMD_BUDGET = 60.0
+
+# time.monotonic() deadline of the active command_budget() block, if any
+_deadline: float | None = None
+
+# Per-thread deadlines set by thread_budget(), on top of the shared one
+_thread_state = threading.local()
+
 
 @dataclass
 class CommandResult:
@@ -24,25 +40,38 @@ def run(
     *,
     check: bool = False,
     capture: bool = True,
-    timeout: int | None = None,
+    timeout: float | None = None,
     env: dict[str, str] | None = None,
+    input: str | None = None,
 ) -> CommandResult:
-    """Run a command and return the result."""
-    import os
+    """Run a command and return the result.
+
+    ``input`` is written to the command's stdin when given. Inside a
+    command_budget() or thread_budget() block the timeout is capped by the
+    remaining budget.
+    """
+    remaining = budget_remaining()
+    if remaining is not None:
+        if remaining <= 0:
+            return CommandResult(returncode=-1, stdout="", stderr="Command budget exhausted")
+        timeout = remaining if timeout is None else min(timeout, remaining)
 
-    # Merge provided env with current environment
-    run_env = None
-    if env:
-        run_env = os.environ.copy()
-        run_env.update(env)
+    # Merge provided env with current environment in a single pass
+    run_env = os.environ | env if env else None
+
+    # A path-qualified executable lets CPython start the child with
+    # posix_spawn(); a bare name forces the fork/exec path. argv is unchanged.
+    executable = resolve_command(cmd[0]) if os.name != "nt" else None
 
     try:
         result = subprocess.run(
             cmd,
+            executable=executable,
             capture_output=capture,
             text=True,
             timeout=timeout,
             env=run_env,
+            input=input,
         )
         return CommandResult(
             returncode=result.returncode,
@@ -55,6 +84,68 @@ def run(
         return CommandResult(returncode=-1, stdout="", stderr=f"Command not found: {cmd[0]}")
 
 
+@contextlib.contextmanager
+def command_budget(seconds: float | None = None) -> Iterator[None]:
+    """Bound the total time run() calls may take inside the block.
+
+    Each run() timeout becomes the stricter of its own value and what is
+    left of the budget, so one hung probe cannot stall a whole command.
+    Also usable as a decorator.
+
+    Args:
+        seconds: Budget in seconds (default: MESH_CMD_TIMEOUT or 60)
+    """
+    global _deadline
+    if seconds is None:
+        try:
+            seconds = float(os.environ.get("MESH_CMD_TIMEOUT", DEFAULT_CMD_BUDGET))
+        except ValueError:
+            seconds = DEFAULT_CMD_BUDGET
+    previous = _deadline
+    deadline = time.monotonic() + seconds
+    # A nested block can only tighten the outer budget
+    _deadline = deadline if previous is None else min(previous, deadline)
+    try:
+        yield
+    finally:
+        _deadline = previous
+
+
+@contextlib.contextmanager
+def thread_budget(seconds: float) -> Iterator[None]:
+    """Bound the total time run() calls from the current thread may take.
+
+    Like command_budget(), but the deadline is private to the calling
+    thread, so pool workers can each carry their own budget. It combines
+    with any enclosing command_budget(); the stricter deadline wins.
+
+    Args:
+        seconds: Budget in seconds
+    """
+    previous = getattr(_thread_state, "deadline", None)
+    deadline = time.monotonic() + seconds
+    _thread_state.deadline = deadline if previous is None else min(previous, deadline)
+    try:
+        yield
+    finally:
+        _thread_state.deadline = previous
+
+
+def budget_remaining() -> float | None:
+    """Get the seconds left in the tightest active budget.
+
+    Subprocess helpers that bypass run() use this to cap their own timeouts.
+
+    Returns:
+        Seconds remaining (zero or negative once spent), or None if no
+        budget is active.
+    """
+    deadlines = [d for d in (_deadline, getattr(_thread_state, "deadline", None)) if d is not None]
+    if not deadlines:
+        return None
+    return min(deadlines) - time.monotonic()
+
+
 def run_sudo(cmd: list[str], **kwargs) -> CommandResult:
     """Run a command with sudo."""
     return run(["sudo"] + cmd, **kwargs)
@@ -62,7 +153,49 @@ def run_sudo(cmd: list[str], **kwargs) -> CommandResult:
 
 def command_exists(cmd: str) -> bool:
     """Check if a command exists in PATH."""
-    return shutil.which(cmd) is not None
+    return resolve_command(cmd) is not None
+
+
+def resolve_command(cmd: str) -> str | None:
+    """Resolve a command name to the path of the executable PATH would run.
+
+    Returns:
+        Path to the executable, or None if it is not found.
+    """
+    if os.name == "nt" or os.sep in cmd:
+        # PATHEXT and explicit paths need shutil.which's full resolution
+        return shutil.which(cmd)
+    path_env = os.environ.get("PATH", os.defpath)
+    directories = _path_index(path_env).get(cmd)
+    if directories is None:
+        # Not indexed - may have been installed since the scan, so ask PATH directly
+        return shutil.which(cmd)
+    for directory in directories:
+        candidate = os.path.join(directory, cmd)
+        if os.access(candidate, os.X_OK):
+            return candidate
+    return None
+
+
+@functools.lru_cache(maxsize=4)
+def _path_index(path_env: str) -> dict[str, tuple[str, ...]]:
+    """Map file names to the PATH directories containing them, in PATH order.
+
+    One scandir pass per distinct PATH value replaces the per-lookup stat
+    of every PATH entry that shutil.which performs.
+    """
+    index: dict[str, list[str]] = {}
+    for directory in dict.fromkeys(path_env.split(os.pathsep)):
+        if not directory:
+            continue
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        index.setdefault(entry.name, []).append(directory)
+        except OSError:
+            continue
+    return {name: tuple(dirs) for name, dirs in index.items()}
 
 
 def require_command(cmd: str) -> None:
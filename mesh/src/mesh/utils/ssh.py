@@ -1,37 +1,52 @@
 """SSH configuration management."""
 
+import asyncio
+import atexit
+import contextlib
+import functools
+import os
+import re
+import shutil
 import subprocess
+import tempfile
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Default timeout buffer added to SSH ConnectTimeout
 SSH_TIMEOUT_BUFFER = 5
 
+# Upper bound on the TCP connect + handshake phase, so an unreachable host
+# fails fast even when the caller allows a long-running remote command
+SSH_CONNECT_TIMEOUT = 10
 
-def ssh_to_host(host: str, cmd: str, timeout: int = 30, port: int = 22) -> tuple[bool, str]:
+# Drop sessions whose peer stopped answering (15 s x 4 probes)
+SSH_KEEPALIVE_OPTS = ["-o", "ServerAliveInterval=15", "-o", "ServerAliveCountMax=4"]
+
+
+def ssh_to_host(
+    host: str,
+    cmd: str,
+    timeout: int = 30,
+    port: int = 22,
+    extra_opts: list[str] | None = None,
+) -> tuple[bool, str]:
     """Run a command on a remote host via SSH.
 
     Args:
         host: Remote hostname or user@host
         cmd: Command to execute on remote host
-        timeout: SSH connection timeout in seconds
+        timeout: Overall timeout in seconds; connecting is capped at SSH_CONNECT_TIMEOUT
         port: SSH port (default 22)
+        extra_opts: Additional ssh options (e.g. from control_master_opts())
 
     Returns:
         Tuple of (success, output) where output is stdout+stderr
     """
     try:
         result = subprocess.run(
-            [
-                "ssh",
-                "-o",
-                "BatchMode=yes",
-                "-o",
-                f"ConnectTimeout={timeout}",
-                "-p",
-                str(port),
-                host,
-                cmd,
-            ],
+            _ssh_argv(host, cmd, timeout, port, extra_opts),
             capture_output=True,
             text=True,
             timeout=timeout + SSH_TIMEOUT_BUFFER,
@@ -43,9 +58,161 @@ def ssh_to_host(host: str, cmd: str, timeout: int = 30, port: int = 22) -> tuple
         return False, "SSH client not found"
 
 
+async def ssh_to_host_async(
+    host: str,
+    cmd: str,
+    timeout: int = 30,
+    port: int = 22,
+    extra_opts: list[str] | None = None,
+) -> tuple[bool, str]:
+    """Run a command on a remote host via SSH without blocking the event loop.
+
+    Same contract as ssh_to_host(), for callers already running inside
+    asyncio; the loop keeps serving other tasks while ssh runs.
+
+    Returns:
+        Tuple of (success, output) where output is stdout+stderr
+    """
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *_ssh_argv(host, cmd, timeout, port, extra_opts),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        return False, "SSH client not found"
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            proc.communicate(), timeout=timeout + SSH_TIMEOUT_BUFFER
+        )
+    except TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return False, "SSH connection timed out"
+    output = stdout.decode(errors="replace") + stderr.decode(errors="replace")
+    return proc.returncode == 0, output
+
+
+def _ssh_argv(
+    host: str, cmd: str, timeout: int, port: int, extra_opts: list[str] | None
+) -> list[str]:
+    """Build the ssh command line shared by ssh_to_host() and its async twin."""
+    return [
+        "ssh",
+        "-o",
+        "BatchMode=yes",
+        "-o",
+        f"ConnectTimeout={min(timeout, SSH_CONNECT_TIMEOUT)}",
+        *SSH_KEEPALIVE_OPTS,
+        *(extra_opts or []),
+        "-p",
+        str(port),
+        host,
+        cmd,
+    ]
+
+
+def ssh_to_hosts(
+    targets: list[tuple[str, int]],
+    cmd: str,
+    timeout: int = 30,
+    max_workers: int = 16,
+) -> list[tuple[bool, str]]:
+    """Run the same command on several hosts concurrently.
+
+    Each ssh_to_host() call blocks on its own subprocess, so running them
+    from a thread pool makes N hosts take about as long as the slowest one.
+
+    Args:
+        targets: (user@host, port) pairs
+        cmd: Command to execute on every host
+        timeout: Per-host timeout in seconds, as for ssh_to_host()
+        max_workers: Upper bound on concurrent ssh processes
+
+    Returns:
+        One (success, output) tuple per target, in the order given.
+    """
+    if not targets:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(targets), max_workers)) as pool:
+        futures = [
+            pool.submit(ssh_to_host, host, cmd, timeout=timeout, port=port)
+            for host, port in targets
+        ]
+        return [future.result() for future in futures]
+
+
+def control_master_opts() -> list[str]:
+    """Get ssh options that multiplex connections over a shared master socket.
+
+    The first connection to a (user, host, port) becomes the master and
+    later ones reuse it, skipping the TCP handshake, key exchange and auth.
+    Sockets live in a directory private to this process, never the
+    ~/.ssh/cm path managed host entries use, so closing a master can't
+    tear down the user's own multiplexed sessions.
+
+    Returns:
+        List of ``-o`` options to splice into an ssh command line.
+    """
+    return [
+        "-o",
+        "ControlMaster=auto",
+        "-o",
+        f"ControlPath={_control_dir()}/%C",
+        "-o",
+        "ControlPersist=60s",
+    ]
+
+
+@functools.cache
+def _control_dir() -> Path:
+    """Create this process's ControlMaster socket directory (removed at exit).
+
+    A short temp path keeps socket names under the AF_UNIX length limit.
+    """
+    control_dir = Path(tempfile.mkdtemp(prefix="mesh-ssh-"))
+    atexit.register(shutil.rmtree, control_dir, ignore_errors=True)
+    return control_dir
+
+
+def close_control_master(host: str, port: int = 22) -> None:
+    """Ask mesh's persisted ControlMaster for host:port to exit, if one is running.
+
+    Args:
+        host: Remote hostname or user@host
+        port: SSH port (default 22)
+    """
+    with contextlib.suppress(subprocess.TimeoutExpired, FileNotFoundError):
+        subprocess.run(
+            ["ssh", *control_master_opts(), "-p", str(port), "-O", "exit", host],
+            capture_output=True,
+            timeout=10,
+        )
+
+
+@contextlib.contextmanager
+def multiplexed_ssh(host: str, port: int = 22) -> Iterator[list[str]]:
+    """Share one SSH connection across several calls to the same host.
+
+    Yields the control_master_opts() list for the caller to pass to each ssh
+    invocation, and closes the master when the block exits.
+
+    Args:
+        host: Remote hostname or user@host
+        port: SSH port (default 22)
+    """
+    try:
+        yield control_master_opts()
+    finally:
+        close_control_master(host, port)
+
+
 SSH_CONFIG_MARKER = "# Mesh network hosts - managed by mesh CLI"
 SSH_CONFIG_END = "# End mesh network hosts"
 
+# Blank (or whitespace-only) lines at the start of the file
+LEADING_BLANK_LINES_PATTERN = re.compile(r"\A(?:[ \t]*\n)+")
+
 MESH_SSH_CONFIG = """
 # Mesh network hosts - managed by mesh CLI
 # Example entries (customize for your mesh network):
@@ -68,6 +235,32 @@ MESH_SSH_CONFIG = """
 """
 
 
+class _BatchState(threading.local):
+    """Per-thread ssh_config_batch() nesting depth and pending content."""
+
+    depth = 0
+    # Pending config content (None: nothing written yet)
+    content: str | None = None
+
+
+_batch = _BatchState()
+
+# Serializes config read-modify-write cycles across threads; a batch holds
+# it until its single write, so no other thread's edit can be overwritten
+_config_lock = threading.RLock()
+
+
+def _with_config_lock(func):
+    """Run a config-editing function while holding _config_lock."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _config_lock:
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
 def get_ssh_config_path() -> Path:
     """Get SSH config file path."""
     return Path.home() / ".ssh" / "config"
@@ -75,13 +268,11 @@ def get_ssh_config_path() -> Path:
 
 def has_mesh_config() -> bool:
     """Check if mesh SSH config is already present."""
-    config_path = get_ssh_config_path()
-    if not config_path.exists():
-        return False
-    content = config_path.read_text()
-    return SSH_CONFIG_MARKER in content
+    content = _read_ssh_config_text()
+    return content is not None and SSH_CONFIG_MARKER in content
 
 
+@_with_config_lock
 def add_mesh_config() -> bool:
     """Add mesh SSH config to user's SSH config."""
     config_path = get_ssh_config_path()
@@ -90,9 +281,7 @@ def add_mesh_config() -> bool:
     config_path.parent.mkdir(mode=0o700, exist_ok=True)
 
     # Read existing config
-    existing = ""
-    if config_path.exists():
-        existing = config_path.read_text()
+    existing = _read_ssh_config_text() or ""
 
     # Check if already present
     if SSH_CONFIG_MARKER in existing:
@@ -100,41 +289,41 @@ def add_mesh_config() -> bool:
 
     # Prepend mesh config
     new_content = MESH_SSH_CONFIG.strip() + "\n\n" + existing
-    config_path.write_text(new_content)
-    config_path.chmod(0o600)
+    _write_ssh_config(config_path, new_content)
     return True
 
 
+@_with_config_lock
 def remove_mesh_config() -> bool:
     """Remove mesh SSH config from user's SSH config."""
-    config_path = get_ssh_config_path()
-    if not config_path.exists():
+    content = _read_ssh_config_text()
+    if content is None:
         return True
 
-    content = config_path.read_text()
     if SSH_CONFIG_MARKER not in content:
         return True  # Not present
 
-    # Remove the mesh config block
-    lines = content.split("\n")
-    new_lines = []
-    in_mesh_block = False
-
-    for line in lines:
-        if SSH_CONFIG_MARKER in line:
-            in_mesh_block = True
-            continue
-        if SSH_CONFIG_END in line:
-            in_mesh_block = False
-            continue
-        if not in_mesh_block:
-            new_lines.append(line)
+    # Cut each mesh block, marker lines included, with find/slice rather than
+    # a per-line loop; a block missing its end marker runs to end of file.
+    # Kept spans are joined once instead of rebuilding the text per block.
+    kept: list[str] = []
+    pos = 0
+    while (marker_at := content.find(SSH_CONFIG_MARKER, pos)) != -1:
+        line_start = content.rfind("\n", pos, marker_at) + 1 or pos
+        kept.append(content[pos:line_start])
+        end_at = content.find(SSH_CONFIG_END, marker_at)
+        end = -1 if end_at == -1 else content.find("\n", end_at)
+        if end == -1:
+            pos = len(content)
+            break
+        pos = end + 1
+    kept.append(content[pos:])
+    content = "".join(kept)
 
     # Remove leading blank lines
-    while new_lines and not new_lines[0].strip():
-        new_lines.pop(0)
+    content = LEADING_BLANK_LINES_PATTERN.sub("", content)
 
-    config_path.write_text("\n".join(new_lines))
+    _write_ssh_config(get_ssh_config_path(), content)
     return True
 
 
@@ -145,11 +334,130 @@ def remove_mesh_config() -> bool:
 #       HostName 192.168.50.10
 #       Port 22
 #       User ubuntu
+#       ControlMaster auto
+#       ControlPath ~/.ssh/cm/%r@%h:%p
+#       ControlPersist 60s
+#       ServerAliveInterval 30
 #   # end mesh-managed: ubu1
 
 DYNAMIC_HOST_START = "# mesh-managed:"
 DYNAMIC_HOST_END = "# end mesh-managed:"
 
+# Host directive line; group 1 holds the alias patterns (keyword is case-insensitive)
+HOST_LINE_PATTERN = re.compile(r"^[ \t]*host[ \t]+(.+)$", re.I | re.M)
+
+# Runs of two or more blank lines, collapsed to one after removing a block
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+# Directory (under ~/.ssh) holding ControlMaster sockets for multiplexed connections
+SSH_CONTROL_DIR = "cm"
+
+
+def _read_ssh_config() -> tuple[str, frozenset[str]] | None:
+    """Read SSH config content and its Host aliases.
+
+    The parse is cached and redone only when the file's mtime or size changes.
+
+    Returns:
+        Tuple of (content, aliases), or None if the config file doesn't exist.
+    """
+    if _batch.content is not None:
+        return _batch.content, frozenset(_parse_host_aliases(_batch.content))
+
+    config_path = get_ssh_config_path()
+    try:
+        st = config_path.stat()
+    except FileNotFoundError:
+        return None
+    return _parse_ssh_config_file(config_path, st.st_mtime_ns, st.st_size)
+
+
+def _read_ssh_config_text() -> str | None:
+    """Read SSH config content only, for callers that don't need the aliases.
+
+    Unlike _read_ssh_config(), this never re-parses the pending content of an
+    ssh_config_batch(), so a batch of N edits stays linear in the file size.
+
+    Returns:
+        The content, or None if the config file doesn't exist.
+    """
+    if _batch.content is not None:
+        return _batch.content
+    config = _read_ssh_config()
+    return config[0] if config else None
+
+
+@functools.lru_cache(maxsize=4)
+def _parse_ssh_config_file(
+    config_path: Path, mtime_ns: int, size: int
+) -> tuple[str, frozenset[str]]:
+    """Parse SSH config. Cached on (path, mtime, size) by _read_ssh_config()."""
+    content = config_path.read_text()
+    return content, frozenset(_parse_host_aliases(content))
+
+
+def _write_ssh_config(config_path: Path, content: str) -> None:
+    """Write SSH config content and invalidate the parse cache.
+
+    Inside ssh_config_batch() the content is held in memory instead and
+    written once when the batch ends.
+    """
+    if _batch.depth:
+        _batch.content = content
+        return
+    _atomic_write(config_path, content)
+    # mtime granularity can be coarser than back-to-back writes; drop the cache
+    _parse_ssh_config_file.cache_clear()
+
+
+def _atomic_write(path: Path, content: str) -> None:
+    """Replace a file's content atomically, readable only by its owner.
+
+    The content goes to a 0600 temp file in the same directory, which is
+    fsynced and renamed over the target. A crash mid-write leaves the old
+    file intact, and the file is never briefly world-readable. A symlinked
+    target (e.g. a dotfile manager's ~/.ssh/config) is written through.
+    """
+    target = Path(os.path.realpath(path))
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, target)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_name)
+        raise
+
+
+@contextlib.contextmanager
+def ssh_config_batch() -> Iterator[None]:
+    """Batch add_ssh_host()/remove_ssh_host() calls into a single config write.
+
+    Pending edits are written only if the block exits cleanly; if it raises,
+    the edits made inside it are discarded. Other threads' config edits wait
+    until the batch has been written.
+
+    Example:
+        with ssh_config_batch():
+            for host in hosts:
+                add_ssh_host(host.name, host.ip, host.port, host.user)
+    """
+    with _config_lock:
+        snapshot = _batch.content
+        _batch.depth += 1
+        try:
+            yield
+        except BaseException:
+            _batch.content = snapshot
+            raise
+        finally:
+            _batch.depth -= 1
+        if not _batch.depth and _batch.content is not None:
+            content, _batch.content = _batch.content, None
+            _write_ssh_config(get_ssh_config_path(), content)
+
 
 def host_exists(name: str) -> bool:
     """Check if a host entry exists in SSH config (static or dynamic).
@@ -160,24 +468,47 @@ def host_exists(name: str) -> bool:
     Returns:
         True if host entry exists.
     """
-    config_path = get_ssh_config_path()
-    if not config_path.exists():
+    config = _read_ssh_config()
+    if config is None:
         return False
 
-    content = config_path.read_text()
-    # Check for dynamic marker
-    if f"{DYNAMIC_HOST_START} {name}" in content:
-        return True
-    # Check for Host directive (catches static entries too)
-    for line in content.split("\n"):
-        stripped = line.strip()
-        if stripped.lower().startswith("host "):
-            hosts = stripped[5:].split()
-            if name in hosts:
-                return True
-    return False
+    content, aliases = config
+    # Host directive (static or managed entries), then a bare managed marker
+    return name in aliases or _dynamic_block_pattern(name).search(content) is not None
+
+
+def load_ssh_config() -> frozenset[str]:
+    """Load all Host aliases defined in SSH config.
+
+    Parses the config once so callers checking many hosts can do
+    in-memory membership tests instead of calling host_exists() per host.
+
+    Returns:
+        Set of host aliases (empty if the config file doesn't exist).
+    """
+    config = _read_ssh_config()
+    if config is None:
+        return frozenset()
+    return config[1]
+
 
+def _parse_host_aliases(content: str) -> set[str]:
+    """Collect the aliases from every Host directive in SSH config content.
 
+    Args:
+        content: SSH config content
+
+    Returns:
+        Set of host aliases.
+    """
+    aliases: set[str] = set()
+    for match in HOST_LINE_PATTERN.finditer(content):
+        # Drop a trailing comment before splitting out the patterns
+        aliases.update(match[1].split("#", 1)[0].split())
+    return aliases
+
+
+@_with_config_lock
 def add_ssh_host(name: str, hostname: str, port: int = 22, user: str | None = None) -> bool:
     """Add or update a dynamic SSH host entry.
 
@@ -190,18 +521,16 @@ def add_ssh_host(name: str, hostname: str, port: int = 22, user: str | None = No
     Returns:
         True on success.
     """
-    import os
-
     if user is None:
         user = os.environ.get("USER", "ubuntu")
 
     config_path = get_ssh_config_path()
     config_path.parent.mkdir(mode=0o700, exist_ok=True)
+    # Socket directory for ControlMaster connection reuse
+    (config_path.parent / SSH_CONTROL_DIR).mkdir(mode=0o700, exist_ok=True)
 
     # Read existing config
-    existing = ""
-    if config_path.exists():
-        existing = config_path.read_text()
+    existing = _read_ssh_config_text() or ""
 
     # Remove existing dynamic entry for this host if present
     existing = _remove_dynamic_host_block(existing, name)
@@ -213,16 +542,20 @@ Host {name}
     HostName {hostname}
     Port {port}
     User {user}
+    ControlMaster auto
+    ControlPath ~/.ssh/{SSH_CONTROL_DIR}/%r@%h:%p
+    ControlPersist 60s
+    ServerAliveInterval 30
 {DYNAMIC_HOST_END} {name}
 """
 
     # Append to config
     new_content = existing.rstrip() + "\n" + entry.strip() + "\n"
-    config_path.write_text(new_content)
-    config_path.chmod(0o600)
+    _write_ssh_config(config_path, new_content)
     return True
 
 
+@_with_config_lock
 def remove_ssh_host(name: str) -> bool:
     """Remove a dynamic SSH host entry.
 
@@ -232,17 +565,15 @@ def remove_ssh_host(name: str) -> bool:
     Returns:
         True if host was removed, False if not found.
     """
-    config_path = get_ssh_config_path()
-    if not config_path.exists():
+    content = _read_ssh_config_text()
+    if content is None:
         return False
 
-    content = config_path.read_text()
-    marker = f"{DYNAMIC_HOST_START} {name}"
-    if marker not in content:
+    if not _dynamic_block_pattern(name).search(content):
         return False
 
     new_content = _remove_dynamic_host_block(content, name)
-    config_path.write_text(new_content)
+    _write_ssh_config(get_ssh_config_path(), new_content)
     return True
 
 
@@ -256,25 +587,20 @@ def _remove_dynamic_host_block(content: str, name: str) -> str:
     Returns:
         Content with the host block removed.
     """
-    start_marker = f"{DYNAMIC_HOST_START} {name}"
-    end_marker = f"{DYNAMIC_HOST_END} {name}"
-
-    lines = content.split("\n")
-    new_lines = []
-    in_block = False
-
-    for line in lines:
-        if start_marker in line:
-            in_block = True
-            continue
-        if end_marker in line:
-            in_block = False
-            continue
-        if not in_block:
-            new_lines.append(line)
-
+    result = _dynamic_block_pattern(name).sub("", content)
     # Clean up extra blank lines
-    result = "\n".join(new_lines)
-    while "\n\n\n" in result:
-        result = result.replace("\n\n\n", "\n\n")
-    return result.strip() + "\n" if result.strip() else ""
+    result = BLANK_LINES_PATTERN.sub("\n\n", result).strip()
+    return result + "\n" if result else ""
+
+
+@functools.lru_cache(maxsize=32)
+def _dynamic_block_pattern(name: str) -> re.Pattern[str]:
+    """Compile the pattern matching one host's managed block.
+
+    The match runs from the start marker line through the end marker line,
+    or to end of file if the block was left unterminated. Markers must fill
+    the whole line, so removing "ubu1" leaves "ubu10" alone.
+    """
+    start = re.escape(f"{DYNAMIC_HOST_START} {name}")
+    end = re.escape(f"{DYNAMIC_HOST_END} {name}")
+    return re.compile(rf"^[ \t]*{start}[ \t]*$.*?(?:^[ \t]*{end}[ \t]*$\n?|\Z)", re.M | re.S)
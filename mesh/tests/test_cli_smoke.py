@@ -15,6 +15,12 @@ class TestCLIHelp:
         assert result.exit_code == 0
         assert "harden" in result.output
 
+    def test_mesh_help_lists_commands_before_groups(self):
+        result = runner.invoke(app, ["--help"])
+        names = ["init", "status", "peer", "server", "client", "host", "smb", "harden"]
+        positions = [result.output.index(f" {name} ") for name in names]
+        assert positions == sorted(positions)
+
     def test_harden_help(self):
         result = runner.invoke(app, ["harden", "--help"])
         assert result.exit_code == 0
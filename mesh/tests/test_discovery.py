@@ -43,6 +43,36 @@ class TestDiscoverServer:
             result = discover_server(timeout=0.1)
             assert result is None
 
+    def test_ignores_reannouncements_after_first_answer(self):
+        """Should resolve only the first announcement of the server."""
+        import zeroconf
+
+        service = MagicMock(port=8080)
+        service.parsed_addresses.return_value = ["192.168.1.10"]
+        zc = MagicMock()
+        zc.get_service_info.return_value = service
+
+        def browser(zc, type_, listener):
+            # zeroconf announces once per interface
+            for _ in range(3):
+                listener.add_service(zc, type_, "mesh-headscale")
+            return MagicMock()
+
+        with (
+            patch.object(zeroconf, "Zeroconf", return_value=zc),
+            patch.object(zeroconf, "ServiceBrowser", side_effect=browser),
+        ):
+            from mesh.discovery import discover_server
+
+            assert discover_server(timeout=1) == "http://192.168.1.10:8080"
+        zc.get_service_info.assert_called_once()
+
+    def test_listener_class_built_once(self):
+        """Should reuse one listener class across discoveries."""
+        from mesh.discovery import _listener_class
+
+        assert _listener_class() is _listener_class()
+
 
 class TestAdvertiseServer:
     """Tests for server advertisement."""
@@ -91,6 +121,32 @@ class TestGetLocalIps:
         assert "127.0.0.1" not in result
         assert "192.168.1.50" in result
 
+    @patch("socket.getaddrinfo")
+    def test_filters_link_local(self, mock_getaddrinfo):
+        """Should skip self-assigned 169.254.x.x addresses."""
+        mock_getaddrinfo.return_value = [
+            (None, None, None, None, ("169.254.10.20", 0)),
+            (None, None, None, None, ("127.0.1.1", 0)),
+            (None, None, None, None, ("10.0.0.5", 0)),
+        ]
+
+        from mesh.discovery import _get_local_ips
+
+        assert _get_local_ips() == ("10.0.0.5",)
+
+    @patch("socket.getaddrinfo")
+    def test_deduplicates_addresses(self, mock_getaddrinfo):
+        """Should list each address once even if getaddrinfo repeats it."""
+        mock_getaddrinfo.return_value = [
+            (None, None, None, None, ("192.168.1.50", 0)),
+            (None, None, None, None, ("192.168.1.50", 0)),
+            (None, None, None, None, ("10.0.0.5", 0)),
+        ]
+
+        from mesh.discovery import _get_local_ips
+
+        assert _get_local_ips() == ("192.168.1.50", "10.0.0.5")
+
     @patch("socket.socket")
     @patch("socket.getaddrinfo")
     def test_fallback_to_connect_method(self, mock_getaddrinfo, mock_socket_class):
@@ -0,0 +1,50 @@
+"""Tests for OS type and role detection."""
+
+from unittest.mock import patch
+
+import pytest
+
+from mesh.core.environment import OSType, Role, _reset_env_cache, detect_role
+
+
+@pytest.fixture(autouse=True)
+def fresh_env_cache(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("socket.gethostname", lambda: "MyClient")
+    monkeypatch.setenv("MESH_SERVER_HOSTNAMES", "myserver")
+    monkeypatch.setenv("MESH_WSL2_HOSTNAMES", "myclient")
+    monkeypatch.setenv("MESH_WINDOWS_HOSTNAMES", " myclient ,other")
+    _reset_env_cache()
+    yield
+    _reset_env_cache()
+
+
+class TestDetectRole:
+    """Tests for hostname-based role detection."""
+
+    @pytest.mark.parametrize(
+        ("os_type", "expected"),
+        [(OSType.WSL2, Role.WSL2), (OSType.WINDOWS, Role.WINDOWS)],
+    )
+    def test_shared_client_hostname_uses_os(self, os_type: OSType, expected: Role):
+        with patch("mesh.core.environment.detect_os_type", return_value=os_type):
+            assert detect_role() == expected
+
+    def test_server_hostname(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr("socket.gethostname", lambda: "MYSERVER")
+        _reset_env_cache()
+        with patch("mesh.core.environment.detect_os_type", return_value=OSType.UBUNTU):
+            assert detect_role() == Role.SERVER
+
+    def test_unconfigured_linux_host(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr("socket.gethostname", lambda: "elsewhere")
+        _reset_env_cache()
+        with patch("mesh.core.environment.detect_os_type", return_value=OSType.UBUNTU):
+            assert detect_role() == Role.UNKNOWN
+
+    def test_sees_env_changes(self, monkeypatch: pytest.MonkeyPatch):
+        with patch("mesh.core.environment.detect_os_type", return_value=OSType.UBUNTU):
+            assert detect_role() == Role.WINDOWS
+            monkeypatch.setenv("MESH_SERVER_HOSTNAMES", "myclient")
+            monkeypatch.setenv("MESH_WSL2_HOSTNAMES", "")
+            monkeypatch.setenv("MESH_WINDOWS_HOSTNAMES", "")
+            assert detect_role() == Role.SERVER
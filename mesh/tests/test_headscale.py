@@ -0,0 +1,74 @@
+"""Tests for Headscale helpers."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from mesh.core import headscale
+from mesh.utils.process import CommandResult
+
+USERS = [{"id": 1, "name": "mesh"}, {"id": 2, "name": "other"}]
+
+
+@pytest.fixture(autouse=True)
+def fresh_users_cache():
+    headscale.invalidate_users_cache()
+    yield
+    headscale.invalidate_users_cache()
+
+
+class TestGetUserId:
+    """Tests for user ID lookup."""
+
+    @patch("mesh.core.headscale.run_sudo")
+    def test_lists_users_once(self, mock_run_sudo):
+        mock_run_sudo.return_value = CommandResult(0, json.dumps(USERS), "")
+        assert headscale.get_user_id("mesh") == 1
+        assert headscale.get_user_id("other") == 2
+        assert headscale.get_user_id("missing") is None
+        assert mock_run_sudo.call_count == 1
+
+    @patch("mesh.core.headscale.run_sudo")
+    def test_failure_is_not_cached(self, mock_run_sudo):
+        mock_run_sudo.side_effect = [
+            CommandResult(1, "", "permission denied"),
+            CommandResult(0, json.dumps(USERS), ""),
+        ]
+        assert headscale.get_user_id("mesh") is None
+        assert headscale.get_user_id("mesh") == 1
+
+    @patch("mesh.core.headscale.run_sudo")
+    def test_create_user_invalidates(self, mock_run_sudo):
+        mock_run_sudo.side_effect = [
+            CommandResult(0, json.dumps(USERS), ""),
+            CommandResult(0, "", ""),
+            CommandResult(0, json.dumps(USERS + [{"id": 3, "name": "new"}]), ""),
+        ]
+        assert headscale.get_user_id("new") is None
+        assert headscale.create_user("new")
+        assert headscale.get_user_id("new") == 3
+
+
+class TestCreatePreauthKey:
+    """Tests for pre-auth key extraction."""
+
+    @pytest.mark.parametrize(
+        "stdout",
+        [
+            '{"key": "abc123"}',
+            'WARN some noise\n{"key": "abc123"}\n',
+        ],
+    )
+    @patch("mesh.core.headscale.get_user_id", return_value=1)
+    @patch("mesh.core.headscale.run_sudo")
+    def test_parses_json(self, mock_run_sudo, _mock_user_id, stdout):
+        mock_run_sudo.return_value = CommandResult(0, stdout, "")
+        assert headscale.create_preauth_key("mesh") == "abc123"
+
+    @patch("mesh.core.headscale.get_user_id", return_value=1)
+    @patch("mesh.core.headscale.run_sudo")
+    def test_falls_back_to_bare_key_line(self, mock_run_sudo, _mock_user_id):
+        key = "0123456789abcdef" * 3
+        mock_run_sudo.return_value = CommandResult(0, f"WARN noise\n  {key}  \n", "")
+        assert headscale.create_preauth_key("mesh") == key
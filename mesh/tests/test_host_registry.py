@@ -1,5 +1,6 @@
 """Unit tests for host registry functionality."""
 
+import os
 import tempfile
 from pathlib import Path
 from unittest.mock import patch
@@ -10,6 +11,7 @@ from mesh.core.config import (
     Host,
     InvalidHostnameError,
     add_host,
+    add_hosts,
     get_host,
     load_hosts,
     remove_host,
@@ -43,6 +45,7 @@ class TestValidateHostname:
         assert validate_hostname("host@name") is False  # special char
         assert validate_hostname("host.name") is False  # dot
         assert validate_hostname("a" * 64) is False  # too long
+        assert validate_hostname("host\n") is False  # trailing newline
 
 
 class TestHostRegistry:
@@ -61,6 +64,15 @@ class TestHostRegistry:
         assert loaded is not None
         assert loaded.ip == "192.168.50.10"
 
+    def test_loaded_hosts_are_immutable(self, temp_config_dir, monkeypatch):
+        monkeypatch.setenv("MESH_DEFAULT_USER", "meshuser")
+        add_host("ubu1", "192.168.50.10")
+
+        host = get_host("ubu1")
+        assert host.user == "meshuser"
+        with pytest.raises(AttributeError):
+            host.ip = "10.0.0.1"
+
     def test_add_host_is_idempotent(self, temp_config_dir):
         add_host("ubu1", "192.168.50.10", 22, "testuser")
         add_host("ubu1", "192.168.50.10", 22, "testuser")  # Second call
@@ -68,6 +80,15 @@ class TestHostRegistry:
         hosts = load_hosts()
         assert len(hosts) == 1  # Still only one entry
 
+    def test_unchanged_host_is_not_rewritten(self, temp_config_dir):
+        add_host("ubu1", "192.168.50.10", 22, "testuser")
+        hosts_file = temp_config_dir / "hosts.json"
+        hosts_file.write_text(hosts_file.read_text() + "\n")  # Marker a rewrite would drop
+        add_host("ubu1", "192.168.50.10", 22, "testuser")
+        assert hosts_file.read_text().endswith("\n\n")
+        add_host("ubu1", "192.168.50.10", 2222, "testuser")
+        assert get_host("ubu1").port == 2222
+
     def test_add_host_updates_existing(self, temp_config_dir):
         add_host("ubu1", "192.168.50.10", 22, "testuser")
         add_host("ubu1", "192.168.50.20", 2222, "admin")  # Update
@@ -112,8 +133,22 @@ class TestHostRegistry:
         assert "host1" in hosts
         assert "host2" in hosts
 
-    def test_load_hosts_handles_malformed_yaml(self, temp_config_dir):
-        """Test that malformed YAML entries are skipped."""
+    def test_load_hosts_handles_malformed_entries(self, temp_config_dir):
+        """Test that malformed registry entries are skipped."""
+        (temp_config_dir / "hosts.json").write_text(
+            '{"hosts": {"valid_host": {"ip": "192.168.1.1", "port": 22, "user": "testuser"},'
+            ' "null_host": null, "invalid_host": "just a string"}}'
+        )
+
+        hosts = load_hosts()
+        assert set(hosts) == {"valid_host"}
+
+    def test_load_hosts_invalid_json(self, temp_config_dir):
+        (temp_config_dir / "hosts.json").write_text("{not json")
+        assert load_hosts() == {}
+
+    def test_load_hosts_migrates_yaml_registry(self, temp_config_dir):
+        """A hosts.yaml registry is converted to hosts.json; bad entries are skipped."""
         hosts_file = temp_config_dir / "hosts.yaml"
         hosts_file.write_text(
             """hosts:
@@ -132,6 +167,44 @@ class TestHostRegistry:
         assert "null_host" not in hosts
         assert "invalid_host" not in hosts
 
+        assert (temp_config_dir / "hosts.json").exists()
+        assert not hosts_file.exists()
+        assert (temp_config_dir / "hosts.yaml.bak").exists()
+        assert set(load_hosts()) == {"valid_host"}
+
+    def test_load_hosts_picks_up_external_edit(self, temp_config_dir):
+        """Cached registry is re-read when the file changes on disk."""
+        add_host("host1", "192.168.1.1", 22, "user1")
+        assert set(load_hosts()) == {"host1"}
+
+        (temp_config_dir / "hosts.json").write_text(
+            '{"hosts": {"host2": {"ip": "192.168.1.2", "port": 2222, "user": "user2"}}}'
+        )
+
+        assert set(load_hosts()) == {"host2"}
+
+    def test_compression_round_trip(self, temp_config_dir):
+        add_host("wan1", "203.0.113.5", 22, "testuser", compression=True)
+        add_host("lan1", "192.168.1.1", 22, "testuser")
+
+        assert get_host("wan1").compression is True
+        assert get_host("lan1").compression is False
+        # Disabled is the default and is not written out
+        assert (temp_config_dir / "hosts.json").read_text().count("compression") == 1
+
+    def test_add_hosts_single_write(self, temp_config_dir):
+        add_host("host1", "192.168.1.1", 22, "user1")
+        add_hosts([Host("host2", "192.168.1.2", 2222, "user2"), Host("host3", "192.168.1.3")])
+
+        assert set(load_hosts()) == {"host1", "host2", "host3"}
+        assert get_host("host2").port == 2222
+
+    def test_add_hosts_invalid_hostname_writes_nothing(self, temp_config_dir):
+        with pytest.raises(InvalidHostnameError):
+            add_hosts([Host("good", "192.168.1.1"), Host("bad host", "192.168.1.2")])
+
+        assert load_hosts() == {}
+
 
 class TestSSHHost:
     """Tests for SSH config host management."""
@@ -153,6 +226,9 @@ class TestSSHHost:
             assert "HostName 192.168.1.1" in content
             assert "Port 22" in content
             assert "User testuser" in content
+            assert "ControlMaster auto" in content
+            assert "ControlPersist 60s" in content
+            assert (tmp_path / "cm").is_dir()
 
     def test_remove_ssh_host(self, tmp_path: Path):
         from mesh.utils.ssh import add_ssh_host, get_ssh_config_path, host_exists, remove_ssh_host
@@ -165,6 +241,94 @@ class TestSSHHost:
             assert result is True
             assert host_exists("testhost") is False
 
+    def test_ssh_config_batch_defers_write(self, tmp_path: Path):
+        from mesh.utils.ssh import add_ssh_host, host_exists, remove_ssh_host, ssh_config_batch
+
+        config_file = tmp_path / "config"
+        with patch("mesh.utils.ssh.get_ssh_config_path", return_value=config_file):
+            with ssh_config_batch():
+                add_ssh_host("host1", "192.168.1.1", 22, "testuser")
+                add_ssh_host("host2", "192.168.1.2", 22, "testuser")
+                remove_ssh_host("host1")
+                # Pending edits are visible but nothing is on disk yet
+                assert host_exists("host2") is True
+                assert host_exists("host1") is False
+                assert not config_file.exists()
+
+            content = config_file.read_text()
+            assert "Host host2" in content
+            assert "Host host1" not in content
+            assert host_exists("host2") is True
+
+    def test_config_written_atomically_with_private_mode(self, tmp_path: Path):
+        from mesh.utils.ssh import add_ssh_host
+
+        config_file = tmp_path / "config"
+        with patch("mesh.utils.ssh.get_ssh_config_path", return_value=config_file):
+            add_ssh_host("host1", "192.168.1.1", 22, "testuser")
+
+        assert config_file.stat().st_mode & 0o777 == 0o600
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["cm", "config"]
+
+    def test_config_write_follows_symlink(self, tmp_path: Path):
+        from mesh.utils.ssh import add_ssh_host
+
+        real_file = tmp_path / "dotfiles-ssh-config"
+        real_file.write_text("Host existing\n")
+        config_file = tmp_path / "config"
+        config_file.symlink_to(real_file)
+        with patch("mesh.utils.ssh.get_ssh_config_path", return_value=config_file):
+            add_ssh_host("host1", "192.168.1.1", 22, "testuser")
+
+        assert config_file.is_symlink()
+        assert "Host host1" in real_file.read_text()
+
+    def test_ssh_config_batch_discards_edits_on_error(self, tmp_path: Path):
+        from mesh.utils.ssh import add_ssh_host, load_ssh_config, ssh_config_batch
+
+        config_file = tmp_path / "config"
+        with patch("mesh.utils.ssh.get_ssh_config_path", return_value=config_file):
+            with ssh_config_batch():
+                add_ssh_host("kept", "192.168.1.1", 22, "testuser")
+                with pytest.raises(RuntimeError), ssh_config_batch():
+                    add_ssh_host("dropped", "192.168.1.2", 22, "testuser")
+                    raise RuntimeError("boom")
+            assert load_ssh_config() == {"kept"}
+
+            with pytest.raises(RuntimeError), ssh_config_batch():
+                add_ssh_host("also-dropped", "192.168.1.3", 22, "testuser")
+                raise RuntimeError("boom")
+            assert load_ssh_config() == {"kept"}
+
+    def test_concurrent_edits_are_not_lost(self, tmp_path: Path):
+        from concurrent.futures import ThreadPoolExecutor
+
+        from mesh.utils.ssh import add_ssh_host, load_ssh_config, ssh_config_batch
+
+        def add_pair(i: int) -> None:
+            with ssh_config_batch():
+                add_ssh_host(f"a{i}", f"10.0.0.{i}", 22, "testuser")
+                add_ssh_host(f"b{i}", f"10.0.1.{i}", 22, "testuser")
+
+        with patch("mesh.utils.ssh.get_ssh_config_path", return_value=tmp_path / "config"):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(add_pair, range(16)))
+            assert load_ssh_config() == {f"{p}{i}" for p in "ab" for i in range(16)}
+
+    def test_ssh_config_batch_skips_alias_parsing(self, tmp_path: Path):
+        from mesh.utils import ssh
+
+        with (
+            patch("mesh.utils.ssh.get_ssh_config_path", return_value=tmp_path / "config"),
+            patch("mesh.utils.ssh._parse_host_aliases", wraps=ssh._parse_host_aliases) as parse,
+        ):
+            with ssh.ssh_config_batch():
+                for i in range(5):
+                    ssh.add_ssh_host(f"host{i}", f"192.168.1.{i}", 22, "testuser")
+                ssh.remove_ssh_host("host0")
+            parse.assert_not_called()
+            assert ssh.load_ssh_config() == {"host1", "host2", "host3", "host4"}
+
     def test_host_exists_static_entry(self, tmp_path: Path):
         from mesh.utils.ssh import get_ssh_config_path, host_exists
 
@@ -179,3 +343,174 @@ class TestSSHHost:
         with patch("mesh.utils.ssh.get_ssh_config_path", return_value=config_file):
             assert host_exists("myserver") is True
             assert host_exists("nonexistent") is False
+
+    def test_parse_host_aliases(self):
+        from mesh.utils.ssh import _parse_host_aliases
+
+        content = (
+            "Host alpha beta # laptops\n"
+            "  host\tgamma\n"
+            "Hostname not-an-alias\n"
+            "# Host commented\n"
+            "Match host delta\n"
+        )
+        assert _parse_host_aliases(content) == {"alpha", "beta", "gamma"}
+
+    def test_load_ssh_config_collects_aliases(self, tmp_path: Path):
+        from mesh.utils.ssh import add_ssh_host, load_ssh_config
+
+        config_file = tmp_path / "config"
+        config_file.write_text(
+            """Host myserver alias2
+    HostName server.local
+"""
+        )
+
+        with patch("mesh.utils.ssh.get_ssh_config_path", return_value=config_file):
+            add_ssh_host("testhost", "192.168.1.1", 22, "testuser")
+            assert load_ssh_config() == {"myserver", "alias2", "testhost"}
+
+    def test_load_ssh_config_missing_file(self, tmp_path: Path):
+        from mesh.utils.ssh import load_ssh_config
+
+        with patch("mesh.utils.ssh.get_ssh_config_path", return_value=tmp_path / "config"):
+            assert load_ssh_config() == set()
+
+    def test_mesh_config_block_round_trip(self, tmp_path: Path):
+        from mesh.utils.ssh import (
+            add_mesh_config,
+            add_ssh_host,
+            has_mesh_config,
+            host_exists,
+            remove_mesh_config,
+        )
+
+        with patch("mesh.utils.ssh.get_ssh_config_path", return_value=tmp_path / "config"):
+            add_ssh_host("testhost", "192.168.1.1", 22, "testuser")
+            assert has_mesh_config() is False
+
+            add_mesh_config()
+            assert has_mesh_config() is True
+            assert host_exists("testhost") is True
+
+            remove_mesh_config()
+            assert has_mesh_config() is False
+            assert host_exists("testhost") is True
+
+    def test_remove_mesh_config_cuts_every_block(self, tmp_path: Path):
+        from mesh.utils.ssh import SSH_CONFIG_END, SSH_CONFIG_MARKER, remove_mesh_config
+
+        config_file = tmp_path / "config"
+        config_file.write_text(
+            f"{SSH_CONFIG_MARKER}\nHost *\n{SSH_CONFIG_END}\n\nHost keep\n"
+            f"  {SSH_CONFIG_MARKER}\nHost dup\n{SSH_CONFIG_END}\nHost also-keep\n"
+            f"{SSH_CONFIG_MARKER}\nHost unterminated\n"
+        )
+        with patch("mesh.utils.ssh.get_ssh_config_path", return_value=config_file):
+            remove_mesh_config()
+
+        assert config_file.read_text() == "Host keep\nHost also-keep\n"
+
+    def test_remove_ssh_host_leaves_prefixed_names(self, tmp_path: Path):
+        from mesh.utils.ssh import add_ssh_host, host_exists, remove_ssh_host
+
+        with patch("mesh.utils.ssh.get_ssh_config_path", return_value=tmp_path / "config"):
+            add_ssh_host("ubu10", "192.168.1.10", 22, "testuser")
+            assert host_exists("ubu1") is False
+            assert remove_ssh_host("ubu1") is False
+
+            add_ssh_host("ubu1", "192.168.1.1", 22, "testuser")
+            assert remove_ssh_host("ubu1") is True
+            assert host_exists("ubu1") is False
+            assert host_exists("ubu10") is True
+            assert "\n\n\n" not in (tmp_path / "config").read_text()
+
+
+class TestSSHToHosts:
+    """Tests for running a command on several hosts at once."""
+
+    def test_runs_concurrently_in_order(self):
+        import time
+
+        from mesh.utils.ssh import ssh_to_hosts
+
+        def fake_ssh(host, cmd, timeout=30, port=22):
+            time.sleep(0.2)
+            return host != "bad", f"{host}:{port} {cmd}"
+
+        with patch("mesh.utils.ssh.ssh_to_host", side_effect=fake_ssh):
+            start = time.monotonic()
+            results = ssh_to_hosts([("a", 22), ("bad", 2222), ("c", 22)], "uptime")
+            elapsed = time.monotonic() - start
+
+        assert results == [(True, "a:22 uptime"), (False, "bad:2222 uptime"), (True, "c:22 uptime")]
+        assert elapsed < 0.5
+
+    def test_no_targets(self):
+        from mesh.utils.ssh import ssh_to_hosts
+
+        assert ssh_to_hosts([], "uptime") == []
+
+
+class TestControlMaster:
+    """Tests for mesh's private ControlMaster sockets."""
+
+    def test_socket_dir_is_private_to_mesh(self, tmp_path: Path):
+        from mesh.utils.ssh import control_master_opts
+
+        with patch("mesh.utils.ssh.get_ssh_config_path", return_value=tmp_path / "config"):
+            opts = control_master_opts()
+
+        control_path = next(o for o in opts if o.startswith("ControlPath="))
+        socket_dir = Path(control_path.removeprefix("ControlPath=")).parent
+        assert socket_dir.is_dir()
+        assert socket_dir.stat().st_mode & 0o777 == 0o700
+        assert not socket_dir.is_relative_to(tmp_path)
+        assert not (tmp_path / "cm").exists()
+
+    def test_close_targets_private_socket(self):
+        from mesh.utils.ssh import close_control_master, control_master_opts
+
+        with patch("mesh.utils.ssh.subprocess.run") as mock_run:
+            close_control_master("user@host", 2222)
+
+        argv = mock_run.call_args.args[0]
+        assert argv[-3:] == ["-O", "exit", "user@host"]
+        assert set(control_master_opts()) <= set(argv)
+
+
+class TestSSHToHostAsync:
+    """Tests for the asyncio SSH runner."""
+
+    @pytest.fixture
+    def fake_ssh(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+        script = tmp_path / "ssh"
+        script.write_text('#!/bin/sh\nfor last; do :; done\nexec sh -c "$last"\n')
+        script.chmod(0o755)
+        monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+        return script
+
+    def test_returns_combined_output(self, fake_ssh: Path):
+        import asyncio
+
+        from mesh.utils.ssh import ssh_to_host_async
+
+        ok, output = asyncio.run(ssh_to_host_async("host", "echo out; echo err >&2"))
+        assert ok is True
+        assert output == "out\nerr\n"
+
+    def test_reports_failure(self, fake_ssh: Path):
+        import asyncio
+
+        from mesh.utils.ssh import ssh_to_host_async
+
+        assert asyncio.run(ssh_to_host_async("host", "exit 3")) == (False, "")
+
+    def test_times_out(self, fake_ssh: Path, monkeypatch: pytest.MonkeyPatch):
+        import asyncio
+
+        from mesh.utils import ssh
+
+        monkeypatch.setattr(ssh, "SSH_TIMEOUT_BUFFER", 0)
+        ok, output = asyncio.run(ssh.ssh_to_host_async("host", "exec sleep 5", timeout=0.2))
+        assert (ok, output) == (False, "SSH connection timed out")
@@ -1,150 +1,106 @@
 """Tests for the init wizard module."""
 
-import os
-import platform
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 import pytest
+from rich.prompt import Confirm, Prompt
+from typer.testing import CliRunner
 
+from mesh.cli import app
 from mesh.commands.init import (
     detect_platform,
     get_hostname,
+    init,
     read_existing_env,
     write_env_file,
 )
+from mesh.core.environment import OSType
 
+runner = CliRunner()
 
-class TestDetectPlatform:
-    """Tests for platform detection."""
+# (.env content, expected parse): comments, blank lines and lines without "=" are skipped
+ENV_PARSE_CASES = [
+    (
+        "\n# Comment\nKEY1=value1\nKEY2=value2\nEMPTY=\n",
+        {"KEY1": "value1", "KEY2": "value2", "EMPTY": ""},
+    ),
+    ("\nVALID=value\ninvalid line without equals\n# comment\n", {"VALID": "value"}),
+]
 
-    @patch("mesh.commands.init.detect_os_type")
-    @patch("platform.machine")
-    def test_linux_x64(self, mock_machine, mock_os_type):
-        from mesh.core.environment import OSType
-        mock_os_type.return_value = OSType.UBUNTU
-        mock_machine.return_value = "x86_64"
 
-        result = detect_platform()
-        assert result == "Linux (x64)"
-
-    @patch("mesh.commands.init.detect_os_type")
-    @patch("platform.machine")
-    def test_linux_arm64(self, mock_machine, mock_os_type):
-        from mesh.core.environment import OSType
-        mock_os_type.return_value = OSType.UBUNTU
-        mock_machine.return_value = "aarch64"
-
-        result = detect_platform()
-        assert result == "Linux (arm64)"
-
-    @patch("mesh.commands.init.detect_os_type")
-    @patch("platform.machine")
-    def test_wsl2(self, mock_machine, mock_os_type):
-        from mesh.core.environment import OSType
-        mock_os_type.return_value = OSType.WSL2
-        mock_machine.return_value = "x86_64"
-
-        result = detect_platform()
-        assert result == "WSL2 (x64)"
+class TestDetectPlatform:
+    """Tests for platform detection."""
 
+    @pytest.mark.parametrize(
+        ("os_type", "machine", "expected"),
+        [
+            (OSType.UBUNTU, "x86_64", "Linux (x64)"),
+            (OSType.UBUNTU, "aarch64", "Linux (arm64)"),
+            (OSType.WSL2, "x86_64", "WSL2 (x64)"),
+            (OSType.WINDOWS, "arm64", "Windows (arm64)"),
+        ],
+    )
     @patch("mesh.commands.init.detect_os_type")
     @patch("platform.machine")
-    def test_windows_arm64(self, mock_machine, mock_os_type):
-        from mesh.core.environment import OSType
-        mock_os_type.return_value = OSType.WINDOWS
-        mock_machine.return_value = "arm64"
+    def test_detect_platform(self, mock_machine, mock_os_type, os_type, machine, expected):
+        mock_os_type.return_value = os_type
+        mock_machine.return_value = machine
 
-        result = detect_platform()
-        assert result == "Windows (arm64)"
+        assert detect_platform() == expected
 
 
 class TestGetHostname:
     """Tests for hostname retrieval."""
 
-    @patch("socket.gethostname")
-    def test_returns_hostname(self, mock_gethostname):
-        mock_gethostname.return_value = "testhost"
+    def test_returns_hostname(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr("socket.gethostname", lambda: "testhost")
         assert get_hostname() == "testhost"
 
 
+@pytest.fixture
+def env_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Point ENV_PATH at a real, initially absent file under tmp_path."""
+    path = tmp_path / ".env"
+    monkeypatch.setattr("mesh.commands.init.ENV_PATH", path)
+    return path
+
+
 class TestReadExistingEnv:
     """Tests for reading existing .env files."""
 
-    @patch("mesh.commands.init.ENV_PATH")
-    def test_nonexistent_file(self, mock_path):
-        mock_path.exists.return_value = False
-        result = read_existing_env()
-        assert result == {}
-
-    @patch("mesh.commands.init.ENV_PATH")
-    def test_parses_env_file(self, mock_path):
-        mock_path.exists.return_value = True
-        mock_path.read_text.return_value = """
-# Comment
-KEY1=value1
-KEY2=value2
-EMPTY=
-"""
-        result = read_existing_env()
-        assert result == {
-            "KEY1": "value1",
-            "KEY2": "value2",
-            "EMPTY": "",
-        }
-
-    @patch("mesh.commands.init.ENV_PATH")
-    def test_ignores_invalid_lines(self, mock_path):
-        mock_path.exists.return_value = True
-        mock_path.read_text.return_value = """
-VALID=value
-invalid line without equals
-# comment
-"""
-        result = read_existing_env()
-        assert result == {"VALID": "value"}
+    def test_nonexistent_file(self, env_path: Path):
+        assert read_existing_env() == {}
+
+    @pytest.mark.parametrize(("content", "expected"), ENV_PARSE_CASES)
+    def test_parses_env_file(self, env_path: Path, content: str, expected: dict[str, str]):
+        env_path.write_text(content)
+        assert read_existing_env() == expected
 
 
 class TestWriteEnvFile:
     """Tests for writing .env files."""
 
-    @patch("mesh.commands.init.read_existing_env")
-    @patch("mesh.commands.init.ENV_PATH")
-    def test_dry_run_does_not_write(self, mock_path, mock_read):
-        mock_read.return_value = {}
-        mock_path.exists.return_value = False
-
+    def test_dry_run_does_not_write(self, env_path: Path):
         write_env_file({"KEY": "value"}, dry_run=True)
 
-        mock_path.write_text.assert_not_called()
+        assert not env_path.exists()
 
-    @patch("shutil.copy")
-    @patch("mesh.commands.init.read_existing_env")
-    @patch("mesh.commands.init.ENV_PATH")
-    def test_creates_backup(self, mock_path, mock_read, mock_copy):
-        mock_read.return_value = {}
-        mock_path.exists.return_value = True
-        mock_backup = MagicMock()
-        mock_path.with_suffix.return_value = mock_backup
+    def test_creates_backup(self, env_path: Path):
+        env_path.write_text("OLD=1\n")
 
         write_env_file({"KEY": "value"}, dry_run=False)
 
-        mock_copy.assert_called_once_with(mock_path, mock_backup)
+        assert env_path.with_suffix(".env.backup").read_text() == "OLD=1\n"
 
-    @patch("shutil.copy")
-    @patch("mesh.commands.init.read_existing_env")
-    @patch("mesh.commands.init.ENV_PATH")
-    def test_merges_with_existing(self, mock_path, mock_read, mock_copy):
-        mock_read.return_value = {"EXISTING": "old"}
-        mock_path.exists.return_value = True
-        mock_path.with_suffix.return_value = MagicMock()
+    def test_merges_with_existing(self, env_path: Path):
+        env_path.write_text("EXISTING=old\n")
 
         write_env_file({"NEW": "value"}, dry_run=False)
 
-        # Verify write was called with merged content
-        call_args = mock_path.write_text.call_args[0][0]
-        assert "EXISTING=old" in call_args
-        assert "NEW=value" in call_args
+        content = env_path.read_text()
+        assert "EXISTING=old" in content
+        assert "NEW=value" in content
 
 
 class TestInitIntegration:
@@ -152,45 +108,40 @@ class TestInitIntegration:
 
     def test_init_command_registered(self):
         """Verify init command is registered in CLI."""
-        from mesh.cli import app
-        from typer.testing import CliRunner
-
-        runner = CliRunner()
         result = runner.invoke(app, ["init", "--help"])
 
         assert result.exit_code == 0
         assert "Interactive setup wizard" in result.output
         assert "--dry-run" in result.output
 
-    def test_init_dry_run_shows_preview(self):
+    def test_init_dry_run_shows_preview(self, env_path: Path, capsys: pytest.CaptureFixture):
         """Verify --dry-run shows what would be written."""
-        from mesh.cli import app
-        from typer.testing import CliRunner
-
-        runner = CliRunner()
-        # Provide inputs: role (client), server URL, client type (linux), shared folder (n)
-        result = runner.invoke(
-            app,
-            ["init", "--dry-run"],
-            input="client\nhttp://test:8080\nlinux\nn\n",
-        )
-
-        # Should show dry run output
-        assert "Dry Run" in result.output
-        assert result.exit_code == 0
+        # Answers: role (client), server URL, client type (linux); no shared folders
+        with (
+            patch("mesh.commands.init.detect_os_type", return_value=OSType.UBUNTU),
+            patch.object(Prompt, "ask", side_effect=["client", "http://test:8080", "linux"]),
+            patch.object(Confirm, "ask", return_value=False),
+            patch("mesh.commands.init.save_headscale_server") as mock_save,
+        ):
+            init(dry_run=True)
+
+        assert "Dry Run" in capsys.readouterr().out
+        assert not env_path.exists()
+        mock_save.assert_not_called()
 
 
 class TestInitClientSetupWorkflow:
     """Tests for the init → client setup workflow integration."""
 
-    @patch("mesh.core.config.get_mesh_config_dir")
-    def test_init_saves_server_url_for_client_setup(self, mock_config_dir, tmp_path):
+    @pytest.fixture
+    def mesh_config_dir(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+        monkeypatch.setattr("mesh.core.config.get_mesh_config_dir", lambda: tmp_path)
+        return tmp_path
+
+    def test_init_saves_server_url_for_client_setup(self, mesh_config_dir: Path):
         """Verify mesh init saves server URL that client setup can read."""
         from mesh.core.config import get_headscale_server, save_headscale_server
 
-        # Use temp directory for config
-        mock_config_dir.return_value = tmp_path
-
         # Simulate what init does: save server URL
         test_url = "http://testserver:8080"
         save_headscale_server(test_url)
@@ -199,13 +150,10 @@ class TestInitClientSetupWorkflow:
         retrieved = get_headscale_server()
         assert retrieved == test_url
 
-    @patch("mesh.core.config.get_mesh_config_dir")
-    def test_client_setup_uses_saved_url_as_fallback(self, mock_config_dir, tmp_path):
+    def test_client_setup_uses_saved_url_as_fallback(self, mesh_config_dir: Path):
         """Verify client setup falls back to saved URL when no --server provided."""
         from mesh.core.config import get_headscale_server, save_headscale_server
 
-        mock_config_dir.return_value = tmp_path
-
         # Save a server URL (simulating mesh init)
         save_headscale_server("http://saved-server:8080")
 
@@ -213,13 +161,10 @@ class TestInitClientSetupWorkflow:
         url = get_headscale_server()
         assert url == "http://saved-server:8080"
 
-    @patch("mesh.core.config.get_mesh_config_dir")
-    def test_no_saved_url_returns_none(self, mock_config_dir, tmp_path):
+    def test_no_saved_url_returns_none(self, mesh_config_dir: Path):
         """Verify get_headscale_server returns None when no URL saved."""
         from mesh.core.config import get_headscale_server
 
-        mock_config_dir.return_value = tmp_path
-
         # No URL saved
         url = get_headscale_server()
         assert url is None
@@ -0,0 +1,40 @@
+"""Tests for console output helpers."""
+
+from unittest.mock import patch
+
+from mesh.utils import output
+from mesh.utils.output import batch, create_table, info, ok, print_table, warn
+
+
+class TestBatch:
+    """Tests for batched message output."""
+
+    def test_renders_once_in_order(self):
+        with patch.object(output.console, "print") as mock_print, batch():
+            info("one")
+            with batch():
+                ok("two")
+            warn("three")
+            assert mock_print.call_count == 0
+
+        mock_print.assert_called_once_with(
+            "[blue]INFO:[/blue] one\n[green]OK:[/green] two\n[yellow]WARN:[/yellow] three"
+        )
+
+    def test_flushes_before_table(self):
+        table = create_table("Hosts", ["Name"])
+        with patch.object(output.console, "print") as mock_print, batch():
+            info("before")
+            print_table(table)
+            info("after")
+
+        assert [c.args[0] for c in mock_print.call_args_list] == [
+            "[blue]INFO:[/blue] before",
+            table,
+            "[blue]INFO:[/blue] after",
+        ]
+
+    def test_prints_directly_outside_batch(self):
+        with patch.object(output.console, "print") as mock_print:
+            info("now")
+        mock_print.assert_called_once_with("[blue]INFO:[/blue] now")
@@ -0,0 +1,27 @@
+"""Tests for Syncthing peer exchange helpers."""
+
+from mesh.commands.peer import validate_device_id
+
+VALID_ID = "MFZWI3D-BONSGYC-YLTMRWG-C43ENR5-QXGZDMM-FZWI3DP-BONSGYY-LTMRWAD"
+
+
+class TestValidateDeviceId:
+    """Tests for device ID validation."""
+
+    def test_valid_id(self):
+        assert validate_device_id(VALID_ID) is True
+        assert validate_device_id(VALID_ID.lower()) is True
+        assert validate_device_id(VALID_ID.replace("-", "")) is True
+
+    def test_too_short(self):
+        assert validate_device_id("MFZWI3D-BONSGYC") is False
+        assert validate_device_id("") is False
+
+    def test_rejects_non_base32_characters(self):
+        # 0, 1, 8 and 9 are not in the base32 alphabet
+        assert validate_device_id(VALID_ID.replace("3", "8")) is False
+        assert validate_device_id(VALID_ID.replace("M", "É")) is False
+
+    def test_rejects_malformed_dashes(self):
+        assert validate_device_id("-" + VALID_ID) is False
+        assert validate_device_id(VALID_ID.replace("-", "--")) is False
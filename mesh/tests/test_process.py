@@ -0,0 +1,121 @@
+"""Tests for subprocess helpers."""
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from mesh.utils.process import (
+    budget_remaining,
+    command_budget,
+    command_exists,
+    resolve_command,
+    run,
+    thread_budget,
+)
+
+
+class TestCommandExists:
+    """Tests for PATH lookup."""
+
+    @pytest.fixture
+    def bin_dir(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+        tool = tmp_path / "mesh-test-tool"
+        tool.write_text("#!/bin/sh\n")
+        tool.chmod(0o755)
+        (tmp_path / "not-executable").write_text("data\n")
+        (tmp_path / "subdir").mkdir()
+        monkeypatch.setenv("PATH", str(tmp_path))
+        return tmp_path
+
+    def test_finds_executable(self, bin_dir: Path):
+        assert command_exists("mesh-test-tool") is True
+
+    def test_missing_command(self, bin_dir: Path):
+        assert command_exists("mesh-no-such-tool") is False
+
+    def test_resolves_full_path(self, bin_dir: Path):
+        assert resolve_command("mesh-test-tool") == str(bin_dir / "mesh-test-tool")
+        assert resolve_command("not-executable") is None
+
+    def test_ignores_non_executables_and_directories(self, bin_dir: Path):
+        assert command_exists("not-executable") is False
+        assert command_exists("subdir") is False
+
+    def test_follows_path_changes(self, bin_dir: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv("PATH", str(bin_dir / "subdir"))
+        assert command_exists("mesh-test-tool") is False
+
+    def test_sees_commands_installed_after_first_lookup(self, bin_dir: Path):
+        assert command_exists("mesh-late-tool") is False
+        late = bin_dir / "mesh-late-tool"
+        late.write_text("#!/bin/sh\n")
+        late.chmod(0o755)
+        assert command_exists("mesh-late-tool") is True
+
+
+class TestRun:
+    """Tests for the subprocess wrapper."""
+
+    def test_feeds_input_to_stdin(self):
+        result = run(["cat"], input="line one\nline two\n")
+        assert result.success
+        assert result.stdout == "line one\nline two\n"
+
+    def test_env_overrides_extend_parent_env(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv("MESH_TEST_PARENT", "parent")
+        monkeypatch.setenv("MESH_TEST_VALUE", "old")
+        result = run(
+            ["sh", "-c", 'echo "$MESH_TEST_PARENT $MESH_TEST_VALUE"'],
+            env={"MESH_TEST_VALUE": "new"},
+        )
+        assert result.stdout == "parent new\n"
+
+    def test_missing_command(self):
+        result = run(["mesh-no-such-tool"])
+        assert result.returncode == -1
+        assert "not found" in result.stderr
+
+
+class TestCommandBudget:
+    """Tests for the per-command wall-clock budget."""
+
+    def test_caps_subprocess_timeout(self):
+        start = time.monotonic()
+        with command_budget(0.3):
+            result = run(["sleep", "5"], timeout=10)
+        assert result.returncode == -1
+        assert time.monotonic() - start < 3
+
+    def test_exhausted_budget_skips_commands(self):
+        with command_budget(0):
+            result = run(["echo", "hi"])
+        assert result.returncode == -1
+        assert "budget" in result.stderr
+
+    def test_reads_env_and_restores(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv("MESH_CMD_TIMEOUT", "30")
+        with command_budget():
+            assert run(["echo", "hi"]).success
+        assert run(["echo", "hi"]).success
+
+
+class TestThreadBudget:
+    """Tests for per-thread command budgets."""
+
+    def test_caps_only_the_calling_thread(self):
+        seen: list[float | None] = []
+        worker = threading.Thread(target=lambda: seen.append(budget_remaining()))
+        with thread_budget(30):
+            worker.start()
+            worker.join()
+            assert 0 < budget_remaining() <= 30
+        assert seen == [None]
+        assert budget_remaining() is None
+
+    def test_combines_with_command_budget(self):
+        with command_budget(60), thread_budget(0):
+            result = run(["echo", "hi"])
+        assert result.returncode == -1
+        assert "budget" in result.stderr
@@ -0,0 +1,116 @@
+"""Unit tests for remote provisioning helpers."""
+
+import time
+from unittest.mock import patch
+
+from mesh.commands.remote import (
+    TAILSCALE_PRESENT_MARKER,
+    _is_ip_literal,
+    _provision_with_budget,
+    _ps_quote,
+    _run_streamed,
+    _server_host,
+    provision_linux,
+    ssh_run,
+)
+
+
+class TestIsIpLiteral:
+    """Tests for IP-literal host detection."""
+
+    def test_ipv4(self):
+        assert _is_ip_literal("192.168.50.10") is True
+
+    def test_ipv4_with_user(self):
+        assert _is_ip_literal("ubuntu@192.168.50.10") is True
+
+    def test_ipv6(self):
+        assert _is_ip_literal("fe80::1") is True
+
+    def test_hostname(self):
+        assert _is_ip_literal("server.local") is False
+        assert _is_ip_literal("ubuntu@server") is False
+
+
+class TestServerHost:
+    """Tests for Headscale server URL host extraction."""
+
+    def test_ip_with_port(self):
+        assert _server_host("http://192.168.50.10:8080") == "192.168.50.10"
+
+    def test_hostname_with_path(self):
+        assert _server_host("https://mesh.example.com/health") == "mesh.example.com"
+
+    def test_no_host(self):
+        assert _server_host("not a url") == ""
+
+
+class TestProvisionLinux:
+    """Tests for the Linux Tailscale join."""
+
+    @patch("mesh.commands.remote.ssh_run_script", return_value=(True, TAILSCALE_PRESENT_MARKER))
+    @patch("mesh.commands.remote.ssh_run")
+    def test_failed_up_with_hostless_url_is_not_connected(self, mock_run, _mock_script):
+        mock_run.side_effect = [(False, "up failed"), (True, "100.64.0.2  peer  linux  -")]
+        assert provision_linux("host", 22, "not a url", "key") is False
+
+
+class TestProvisionWithBudget:
+    """Tests for the per-host provisioning budget."""
+
+    def test_kills_hung_host_at_budget(self):
+        def hung_provision(host, port, label, *args):
+            success, output = ssh_run(host, port, "sleep 5", timeout=60)
+            return label, success, output, None
+
+        with (
+            patch(
+                "mesh.commands.remote._ssh_command", side_effect=lambda h, p, cmd: ["sh", "-c", cmd]
+            ),
+            patch("mesh.commands.remote._provision_one", side_effect=hung_provision),
+        ):
+            start = time.monotonic()
+            result = _provision_with_budget(1, "host", 22, "h1")
+            elapsed = time.monotonic() - start
+
+        assert result == ("h1", False, "timed out after 1s", None)
+        assert elapsed < 3
+
+
+class TestPsQuote:
+    """Tests for PowerShell string literal quoting."""
+
+    def test_plain(self):
+        assert _ps_quote("http://10.0.0.1:8080") == "'http://10.0.0.1:8080'"
+
+    def test_embedded_single_quote(self):
+        assert _ps_quote("it's") == "'it''s'"
+
+
+class TestRunStreamed:
+    """Tests for live-streamed command execution (real local processes)."""
+
+    def test_captures_stdout_and_stderr(self):
+        success, output = _run_streamed(
+            ["bash", "-c", "echo out; echo '[/] err' >&2"], "local", timeout=10
+        )
+        assert success is True
+        assert output == "out\n[/] err\n"
+
+    def test_passes_stdin_and_reports_failure(self):
+        success, output = _run_streamed(
+            ["bash", "-s"], "local", timeout=10, stdin="echo hi; exit 3"
+        )
+        assert success is False
+        assert output == "hi\n"
+
+    def test_timeout(self):
+        success, output = _run_streamed(["sleep", "5"], "local", timeout=1)
+        assert success is False
+        assert "timed out" in output
+
+    def test_timeout_covers_unread_stdin(self):
+        # Far more than a pipe buffer, to a child that never reads it
+        success, output = _run_streamed(["sleep", "5"], "local", timeout=1, stdin="x" * 1_000_000)
+        assert success is False
+        assert "timed out" in output
@@ -0,0 +1,166 @@
+"""Tests for SMB command helpers."""
+
+import socket
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from mesh.commands.smb import (
+    LIVE_UNIT_STATES,
+    SERVICE_STEP_PATTERN,
+    _map_drive_script,
+    _service_setup_script,
+    _systemctl_cli_states,
+    _tcp_port_listening,
+    _testparm_sections,
+    _wait_services_active,
+)
+
+
+def _fake_tool(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, name: str, body: str, path: str = ""
+) -> None:
+    """Put an executable shell script called name first on PATH.
+
+    Args:
+        body: Script body, after the shebang line
+        path: Directories to keep on PATH after tmp_path (default: none)
+    """
+    tool = tmp_path / name
+    tool.write_text(f"#!/bin/sh\n{body}")
+    tool.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}:{path}" if path else str(tmp_path))
+
+
+class TestSystemctlActiveStates:
+    """Tests for the batched systemd state check."""
+
+    def test_maps_states_in_argument_order(self, tmp_path, monkeypatch):
+        _fake_tool(
+            tmp_path,
+            monkeypatch,
+            "systemctl",
+            "printf 'active\\ninactive\\nactivating\\n'\nexit 3\n",
+        )
+        states = _systemctl_cli_states(("smbd", "nmbd", "winbind"))
+        assert states == {"smbd": "active", "nmbd": "inactive", "winbind": "activating"}
+        assert {svc for svc, state in states.items() if state in LIVE_UNIT_STATES} == {
+            "smbd",
+            "winbind",
+        }
+
+    def test_missing_systemctl(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("PATH", str(tmp_path))
+        assert _systemctl_cli_states(("smbd", "nmbd")) == {"smbd": "unknown", "nmbd": "unknown"}
+
+
+class TestWaitServicesActive:
+    """Tests for post-enable readiness polling."""
+
+    @pytest.fixture(autouse=True)
+    def no_dbus(self, monkeypatch: pytest.MonkeyPatch):
+        # Force the systemctl fallback so the host's real units are never read
+        monkeypatch.setattr("mesh.commands.smb._dbus_active_states", lambda services: None)
+
+    def test_waits_through_activating(self, tmp_path, monkeypatch):
+        # Reports "activating" for the first two polls, then "active"
+        counter = tmp_path / "calls"
+        _fake_tool(
+            tmp_path,
+            monkeypatch,
+            "systemctl",
+            f"echo x >> {counter}\n"
+            f'if [ "$(wc -l < {counter})" -lt 3 ]; then echo activating; else echo active; fi\n',
+            path="/usr/bin:/bin",
+        )
+
+        assert _wait_services_active(("smbd",), timeout=5) == {"smbd": "active"}
+        assert len(counter.read_text().splitlines()) == 3
+
+    def test_gives_up_at_timeout(self, tmp_path, monkeypatch):
+        _fake_tool(tmp_path, monkeypatch, "systemctl", "echo failed\n")
+
+        assert _wait_services_active(("smbd",), timeout=0.2) == {"smbd": "failed"}
+
+
+class TestServiceSetupScript:
+    """Tests for setup-server's single privileged script."""
+
+    @pytest.fixture
+    def tools(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+        log = tmp_path / "calls"
+        for name in ("smbpasswd", "install", "systemctl"):
+            _fake_tool(
+                tmp_path, monkeypatch, name, f'echo "{name} $*" >> {log}\n', path="/usr/bin:/bin"
+            )
+        _fake_tool(
+            tmp_path,
+            monkeypatch,
+            "ufw",
+            f'echo "ufw $*" >> {log}\n[ "$1" = status ] && echo "Status: active"\nexit 0\n',
+            path="/usr/bin:/bin",
+        )
+        return log
+
+    def _run(self, script: str, input: str = "") -> list[tuple[str, str, str]]:
+        result = subprocess.run(["sh", "-c", script], input=input, capture_output=True, text=True)
+        return SERVICE_STEP_PATTERN.findall(result.stdout)
+
+    def test_keeps_share_password_ufw_enable_order(self):
+        script = _service_setup_script(("smbd",), "\n[shared]\n", "alice")
+        positions = [
+            script.index(marker)
+            for marker in ("/etc/samba/smb.conf", "smbpasswd", "ufw allow", "enable --now")
+        ]
+        assert positions == sorted(positions)
+
+    def test_runs_steps_in_order(self, tools: Path):
+        steps = self._run(_service_setup_script(("smbd",), smb_user="alice"), "pw\npw\n")
+        assert [step for step, _, _ in steps] == ["password", "ufw", "dropin", "enable"]
+        assert all(status == "ok" for _, _, status in steps)
+        calls = [line.split()[0] for line in tools.read_text().splitlines()]
+        assert calls == ["smbpasswd", "ufw", "ufw", "install", "systemctl", "systemctl"]
+
+    def test_password_failure_stops_before_firewall(self, tools: Path, tmp_path, monkeypatch):
+        _fake_tool(tmp_path, monkeypatch, "smbpasswd", "exit 1\n", path="/usr/bin:/bin")
+        steps = self._run(_service_setup_script(("smbd",), smb_user="alice"))
+        assert steps == [("password", "smbpasswd", "failed")]
+        assert not tools.exists()
+
+
+class TestTcpPortListening:
+    """Tests for the /proc based listener check."""
+
+    def test_detects_listener(self):
+        with socket.socket() as server:
+            server.bind(("127.0.0.1", 0))
+            port = server.getsockname()[1]
+            assert _tcp_port_listening(port) is False
+            server.listen()
+            assert _tcp_port_listening(port) is True
+
+
+class TestTestparmSections:
+    """Tests for section header parsing."""
+
+    def test_sections_in_order(self):
+        output = (
+            "# Global parameters\n[global]\n\tworkgroup = WORKGROUP\n\n"
+            "[shared]\n\tpath = /opt/shared\n  [print$]  \n\tpath = /var/lib/samba\n"
+        )
+        assert _testparm_sections(output) == ["global", "shared", "print$"]
+
+    def test_ignores_bracketed_values(self):
+        assert _testparm_sections("\tcomment = see [docs]\n") == []
+
+
+class TestMapDriveScript:
+    """Tests for the generated drive-mapping script."""
+
+    def test_renders_values_with_crlf(self):
+        script = _map_drive_script("nas", "shared", "Z:", "alice")
+
+        assert "net use Z: \\\\nas\\shared /user:alice /persistent:yes\r\n" in script
+        assert "if (-not $Cred) {\r\n" in script
+        assert "\n" not in script.replace("\r\n", "")
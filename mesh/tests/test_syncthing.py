@@ -0,0 +1,95 @@
+"""Tests for the Syncthing API client."""
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from mesh.core.syncthing import SyncthingClient
+
+CONFIG_XML = """<configuration>
+  <gui enabled="true">
+    <apikey>{key}</apikey>
+  </gui>
+</configuration>
+"""
+
+
+@pytest.fixture
+def config_dir(tmp_path: Path):
+    with patch("mesh.core.syncthing.get_syncthing_config_dir", return_value=tmp_path):
+        yield tmp_path
+
+
+class TestApiKey:
+    """Tests for API key discovery."""
+
+    def test_prefers_api_key_file(self, config_dir: Path):
+        (config_dir / "api-key").write_text("from-file\n")
+        (config_dir / "config.xml").write_text(CONFIG_XML.format(key="from-xml"))
+        assert SyncthingClient(port=8384).api_key == "from-file"
+
+    def test_reads_config_xml(self, config_dir: Path):
+        (config_dir / "config.xml").write_text(CONFIG_XML.format(key="from-xml"))
+        assert SyncthingClient(port=8384).api_key == "from-xml"
+
+    def test_finds_key_after_other_elements(self, config_dir: Path):
+        folders = "".join(f'<folder id="f{i}"><device id="d{i}"/></folder>' for i in range(50))
+        xml = f"<configuration>{folders}<gui><apikey>late</apikey></gui></configuration>"
+        (config_dir / "config.xml").write_text(xml)
+        assert SyncthingClient(port=8384).api_key == "late"
+
+    def test_rereads_changed_config(self, config_dir: Path):
+        (config_dir / "config.xml").write_text(CONFIG_XML.format(key="old"))
+        assert SyncthingClient(port=8384).api_key == "old"
+        (config_dir / "config.xml").write_text(CONFIG_XML.format(key="rotated"))
+        assert SyncthingClient(port=8384).api_key == "rotated"
+
+    def test_missing_key(self, config_dir: Path):
+        (config_dir / "config.xml").write_text("<configuration/>")
+        with pytest.raises(RuntimeError):
+            _ = SyncthingClient(port=8384).api_key
+
+
+class TestConnectionPool:
+    """Tests for the shared HTTP client."""
+
+    def test_reuses_and_closes_client(self):
+        with SyncthingClient(port=8384) as client:
+            http = client.http
+            assert client.http is http
+        assert http.is_closed
+        assert client._http is None
+
+
+class TestShareFolder:
+    """Tests for sharing a folder with a device."""
+
+    @pytest.fixture
+    def client(self):
+        self.requests: list[httpx.Request] = []
+        folder = {"id": "shared", "devices": [{"deviceID": "AAA"}]}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            return httpx.Response(200, json=folder)
+
+        client = SyncthingClient(port=8384)
+        client._api_key = "key"
+        client._http = httpx.Client(
+            base_url=client.base_url, transport=httpx.MockTransport(handler)
+        )
+        with client:
+            yield client
+
+    def test_adds_new_device(self, client: SyncthingClient):
+        client.share_folder("shared", "BBB")
+        assert [r.method for r in self.requests] == ["GET", "PUT"]
+        sent = json.loads(self.requests[1].content)
+        assert [d["deviceID"] for d in sent["devices"]] == ["AAA", "BBB"]
+
+    def test_skips_put_when_already_shared(self, client: SyncthingClient):
+        client.share_folder("shared", "AAA")
+        assert [r.method for r in self.requests] == ["GET"]
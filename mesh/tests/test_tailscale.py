@@ -0,0 +1,103 @@
+"""Tests for Tailscale helpers."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from mesh.core import tailscale
+from mesh.core.tailscale import Peer
+from mesh.utils.process import CommandResult
+
+STATUS = {
+    "BackendState": "Running",
+    "Peer": {
+        "nodekey:a": {
+            "HostName": "alpha",
+            "TailscaleIPs": ["100.64.0.2", "fd7a::2"],
+            "Online": True,
+        },
+        "nodekey:b": {"HostName": "beta", "TailscaleIPs": [], "Online": False},
+    },
+}
+
+
+class TestGetPeers:
+    """Tests for peer extraction from status JSON."""
+
+    @patch("mesh.core.tailscale.get_status", return_value=STATUS)
+    def test_builds_peers(self, _mock_status):
+        assert tailscale.get_peers() == [
+            Peer(id="nodekey:a", hostname="alpha", ip="100.64.0.2", online=True),
+            Peer(id="nodekey:b", hostname="beta", ip="", online=False),
+        ]
+
+    @patch("mesh.core.tailscale.get_status", return_value=None)
+    def test_no_status(self, _mock_status):
+        assert tailscale.get_peers() == []
+
+
+class TestStatusCache:
+    """Tests for sharing one `tailscale status` run between lookups."""
+
+    SELF_STATUS = '{"BackendState": "Running", "TailscaleIPs": ["100.64.0.1", "fd7a::1"]}'
+
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self):
+        tailscale.invalidate_status_cache()
+        with patch("mesh.core.tailscale.is_installed", return_value=True):
+            yield
+        tailscale.invalidate_status_cache()
+
+    @patch("mesh.core.tailscale.run")
+    def test_state_and_ip_share_one_run(self, mock_run):
+        mock_run.return_value = CommandResult(0, self.SELF_STATUS, "")
+        assert tailscale.is_connected() is True
+        assert tailscale.get_ip() == "100.64.0.1"
+        assert mock_run.call_count == 1
+        assert "--peers=false" in mock_run.call_args.args[0]
+
+    @patch("mesh.core.tailscale.run")
+    def test_full_status_answers_self_queries(self, mock_run):
+        mock_run.return_value = CommandResult(0, json.dumps(STATUS), "")
+        assert len(tailscale.get_peers()) == 2
+        assert tailscale.get_backend_state() == "Running"
+        assert mock_run.call_count == 1
+
+    @patch("mesh.core.tailscale.run")
+    def test_peers_need_full_status(self, mock_run):
+        mock_run.side_effect = [
+            CommandResult(0, self.SELF_STATUS, ""),
+            CommandResult(0, json.dumps(STATUS), ""),
+        ]
+        assert tailscale.is_connected() is True
+        assert len(tailscale.get_peers()) == 2
+        assert mock_run.call_count == 2
+
+    @patch("mesh.core.tailscale.run")
+    def test_down_invalidates(self, mock_run):
+        mock_run.return_value = CommandResult(0, self.SELF_STATUS, "")
+        assert tailscale.is_connected() is True
+        tailscale.down()
+        mock_run.return_value = CommandResult(0, '{"BackendState": "Stopped"}', "")
+        assert tailscale.is_connected() is False
+
+    @patch("mesh.core.tailscale.run")
+    def test_up_and_get_ip_reads_ip_from_status(self, mock_run):
+        mock_run.side_effect = [
+            CommandResult(0, "", ""),
+            CommandResult(0, self.SELF_STATUS, ""),
+        ]
+        assert tailscale.up_and_get_ip("http://hs:8080", "key") == (True, "100.64.0.1")
+        assert mock_run.call_args_list[0].args[0][:2] == ["tailscale", "up"]
+
+    @patch("mesh.core.tailscale.run")
+    def test_up_and_get_ip_connected_without_ip(self, mock_run):
+        mock_run.side_effect = [CommandResult(0, "", ""), CommandResult(1, "", "error")]
+        assert tailscale.up_and_get_ip("http://hs:8080", "key") == (True, None)
+
+    @patch("mesh.core.tailscale.run")
+    def test_up_and_get_ip_failed_up(self, mock_run):
+        mock_run.return_value = CommandResult(1, "", "auth failed")
+        assert tailscale.up_and_get_ip("http://hs:8080", "key") == (False, None)
+        assert mock_run.call_count == 1
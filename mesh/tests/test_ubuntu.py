@@ -0,0 +1,118 @@
+"""Tests for Ubuntu provisioning helpers."""
+
+import pytest
+import typer
+
+from mesh.commands import ubuntu
+from mesh.commands.ubuntu import _parse_sshd_settings, rewrite_sshd_config
+from mesh.utils.process import CommandResult
+
+
+class TestParseSshdSettings:
+    """Tests for parsing sshd configuration text."""
+
+    def test_sshd_t_output(self):
+        settings = _parse_sshd_settings("addressfamily any\nport 2222\nport 22\n")
+        assert settings == {"addressfamily": "any", "port": "2222"}
+
+    def test_config_skips_comments_and_lowercases(self):
+        settings = _parse_sshd_settings("#Port 22\n  Port 2200\nPasswordAuthentication no\n")
+        assert settings == {"port": "2200", "passwordauthentication": "no"}
+
+    def test_first_value_wins(self):
+        assert _parse_sshd_settings("Port 2200\nPort 2201\n")["port"] == "2200"
+
+
+class TestIsUfwEnabled:
+    """Tests for reading UFW state from ufw.conf."""
+
+    def test_reads_enabled_flag(self, tmp_path, monkeypatch):
+        conf = tmp_path / "ufw.conf"
+        monkeypatch.setattr(ubuntu, "UFW_CONF_PATH", conf)
+        conf.write_text("# comment\nENABLED=yes\nLOGLEVEL=low\n")
+        assert ubuntu.is_ufw_enabled() is True
+        conf.write_text('ENABLED="no"\n')
+        assert ubuntu.is_ufw_enabled() is False
+
+    def test_unreadable_config(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(ubuntu, "UFW_CONF_PATH", tmp_path / "missing.conf")
+        assert ubuntu.is_ufw_enabled() is None
+
+
+class TestRewriteSshdConfig:
+    """Tests for setup-ssh's sshd_config edits."""
+
+    def test_rewrites_port_and_password_auth(self):
+        content = "#Port 22\n#PasswordAuthentication yes\nUsePAM yes\n"
+        updated = rewrite_sshd_config(content, port=2222, disable_password_auth=True)
+        assert updated == "Port 2222\nPasswordAuthentication no\nUsePAM yes\n"
+
+    def test_appends_port_when_no_line_matches(self):
+        assert rewrite_sshd_config("UsePAM yes", port=2222) == "UsePAM yes\nPort 2222\n"
+
+    def test_inserts_port_before_match_block(self):
+        content = "UsePAM yes\nMatch User sftp\n    ForceCommand internal-sftp\n"
+        assert rewrite_sshd_config(content, port=2222) == (
+            "UsePAM yes\nPort 2222\nMatch User sftp\n    ForceCommand internal-sftp\n"
+        )
+
+    def test_leaves_other_lines_alone(self):
+        content = "#Port 2200\nPasswordAuthentication no\n"
+        assert rewrite_sshd_config(content, disable_password_auth=True) == content
+
+
+class TestSetupSshConfigWrite:
+    """Tests for setup-ssh refusing a config sshd rejects."""
+
+    def test_invalid_config_aborts_before_restart(self, tmp_path, monkeypatch):
+        config = tmp_path / "sshd_config"
+        config.write_text("#Port 22\n")
+        monkeypatch.setattr(ubuntu, "SSHD_CONFIG_PATH", config)
+        monkeypatch.setattr(ubuntu, "is_sshd_installed", lambda: True)
+        monkeypatch.setattr(ubuntu, "get_sshd_settings", lambda: {"port": "22"})
+        calls = []
+
+        def fake_sudo(cmd, **kwargs):
+            calls.append(cmd)
+            return CommandResult(returncode=1, stdout="STATUS_SSHD=invalid\n", stderr="bad")
+
+        monkeypatch.setattr(ubuntu, "run_sudo", fake_sudo)
+        with pytest.raises(typer.Exit):
+            ubuntu.setup_ssh(port=2222, password_auth=True)
+        assert len(calls) == 1
+        assert "sshd -t -f" in calls[0][-1]
+        assert config.read_text() == "#Port 22\n"
+
+
+class TestCopyKeys:
+    """Tests for copying authorized_keys from another host."""
+
+    def _run(self, tmp_path, monkeypatch, output, merge=True):
+        monkeypatch.setattr(ubuntu.Path, "home", lambda: tmp_path)
+        monkeypatch.setattr(ubuntu, "ssh_to_host", lambda host, cmd: (True, output))
+        messages = []
+        monkeypatch.setattr(ubuntu, "ok", messages.append)
+        auth_keys = tmp_path / ".ssh" / "authorized_keys"
+        monkeypatch.setattr(ubuntu, "get_authorized_keys_path", lambda: auth_keys)
+        ubuntu.copy_keys(source_host="src", merge=merge)
+        return auth_keys, messages
+
+    def test_merge_into_missing_file_reports_added(self, tmp_path, monkeypatch):
+        auth_keys, messages = self._run(tmp_path, monkeypatch, "key-a\nkey-b\nkey-a\n")
+        assert auth_keys.read_text() == "key-a\nkey-b\n"
+        assert "Added 2 key(s)" in messages
+        assert not any(m.startswith("Replaced") for m in messages)
+
+    def test_merge_appends_missing_keys_once(self, tmp_path, monkeypatch):
+        (tmp_path / ".ssh").mkdir()
+        (tmp_path / ".ssh" / "authorized_keys").write_text("key-a")
+        auth_keys, messages = self._run(tmp_path, monkeypatch, "key-b\nkey-a\nkey-b\n")
+        assert auth_keys.read_text() == "key-a\nkey-b\n"
+        assert "Merged keys - added 1 new key(s)" in messages
+
+    def test_replace_dedupes_source_keys(self, tmp_path, monkeypatch):
+        (tmp_path / ".ssh").mkdir()
+        (tmp_path / ".ssh" / "authorized_keys").write_text("old-key\n")
+        auth_keys, messages = self._run(tmp_path, monkeypatch, "key-a\nkey-a\n", merge=False)
+        assert auth_keys.read_text() == "key-a\n"
+        assert "Replaced authorized_keys with 1 key(s)" in messages
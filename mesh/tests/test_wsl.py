@@ -0,0 +1,31 @@
+"""Tests for WSL helpers."""
+
+from mesh.commands.wsl import parse_listen_port, parse_status_lines
+
+
+class TestParseListenPort:
+    """Tests for extracting the sshd port from ss output."""
+
+    def test_ipv4_and_ipv6_rows(self):
+        output = (
+            'LISTEN 0 128 0.0.0.0:2222 0.0.0.0:* users:(("sshd",pid=42,fd=3))\n'
+            'LISTEN 0 128 [::]:2222 [::]:* users:(("sshd",pid=42,fd=4))\n'
+        )
+        assert parse_listen_port(output) == "2222"
+
+    def test_ipv6_only(self):
+        assert parse_listen_port('LISTEN 0 128 [::]:22 [::]:* users:(("sshd"))') == "22"
+
+    def test_unparseable(self):
+        assert parse_listen_port("") is None
+        assert parse_listen_port("sshd running\n") is None
+
+
+class TestParseStatusLines:
+    """Tests for splitting setup script markers from other output."""
+
+    def test_splits_markers_and_details(self):
+        output = "STATUS_RUNDIR=ok\nsshd: no hostkeys available\n\nSTATUS_SSHD=failed\n"
+        status, details = parse_status_lines(output)
+        assert status == {"RUNDIR": "ok", "SSHD": "failed"}
+        assert details == "sshd: no hostkeys available"